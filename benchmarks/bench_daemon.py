@@ -0,0 +1,83 @@
+"""
+Cold-start vs warm-daemon latency.
+
+Cold:  `python main.py --local <request>` (full UmbrasolCore boot per request)
+Warm:  `python main.py <request>` forwarded to a running `main.py --serve`
+Warm (in-process client): UmbrasolClient round trip, no interpreter start.
+
+Usage: python benchmarks/bench_daemon.py [--runs 10] [--request "stats"]
+The default request hits the heuristic layer so Ollama is not required.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from config import settings
+from core.daemon import UmbrasolClient
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{label:<28} median {statistics.median(samples) * 1000:8.1f} ms | p95 {p95 * 1000:8.1f} ms | n={len(samples)}")
+
+def run_cli(args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", *args], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+async def wait_for_daemon(client, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if client.is_available():
+            try:
+                await client.ping()
+                return True
+            except (OSError, asyncio.TimeoutError):
+                pass
+        await asyncio.sleep(0.2)
+    return False
+
+async def bench(runs, request):
+    client = UmbrasolClient()
+    if client.is_available():
+        print(f"A daemon is already listening on {settings.DAEMON_SOCKET_PATH}; stop it first.")
+        return
+
+    cold = [run_cli(["--local", request]) for _ in range(runs)]
+
+    daemon = subprocess.Popen([sys.executable, "main.py", "--serve"], cwd=ROOT,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not await wait_for_daemon(client):
+            print("Daemon did not come up.")
+            return
+        warm_cli = [run_cli([request]) for _ in range(runs)]
+
+        warm_client = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            async for _event in client.stream(request):
+                pass
+            warm_client.append(time.perf_counter() - start)
+    finally:
+        daemon.terminate()
+        daemon.wait(timeout=10)
+
+    print(f"\nRequest: {request!r}")
+    report("cold (main.py --local)", cold)
+    report("warm (main.py -> daemon)", warm_cli)
+    report("warm (in-process client)", warm_client)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--request", default="stats")
+    args = parser.parse_args()
+    asyncio.run(bench(args.runs, args.request))
@@ -0,0 +1,56 @@
+"""
+Compares the legacy ACT fallback (a fresh re.sub per tool x keyword, built
+on every call) with the precompiled IntentExtractor, over the fallback
+cases of tests/intent_corpus.json. Also reports corpus accuracy for both.
+
+    python benchmarks/bench_intent.py --repeat 500
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.intent import TOOL_KEYWORDS, extractor
+
+def legacy_fallback(user_request, full_response):
+    """The pre-extractor second pass of MonolithSoul.execute_task_stream."""
+    actions = []
+    detected = [t for t, kws in TOOL_KEYWORDS.items() if any(kw in full_response.lower() for kw in kws)]
+    for tool_name in detected:
+        query = user_request
+        for other_tool, other_kws in TOOL_KEYWORDS.items():
+            if other_tool == tool_name: continue
+            for okw in other_kws:
+                query = re.sub(rf"(?:and|also|then|finally|,)?\s*(?:check|run|use|list|search|tell me)?\s*\b{re.escape(okw)}\b.*?(?:and|also|then|finally|,|$)", "", query, flags=re.IGNORECASE).strip()
+        if tool_name == "ls":
+            match = re.search(r"(?:in|of)\s+['\"]?([\w/.-]+)['\"]?", query)
+            if match: query = match.group(1)
+        elif tool_name == "net":
+            query = re.sub(r"^(search|check|find|tell me|what is|how is)\s+(?:for|about|the)?\s*", "", query, flags=re.IGNORECASE)
+        actions.append({"tool": tool_name, "cmd": query})
+    return actions
+
+def bench(cases, repeat):
+    for label, fn in (("legacy fallback", legacy_fallback), ("IntentExtractor", extractor.from_request)):
+        correct = sum(fn(c["request"], c["response"]) == c["expect"] for c in cases)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for c in cases:
+                fn(c["request"], c["response"])
+        per_call = (time.perf_counter() - start) / (repeat * len(cases))
+        print(f"{label:<18} {per_call * 1e6:8.1f} us/call   accuracy {correct}/{len(cases)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=os.path.join(ROOT, "tests", "intent_corpus.json"))
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        cases = json.load(f)["fallback"]
+    bench(cases, args.repeat)
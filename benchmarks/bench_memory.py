@@ -0,0 +1,92 @@
+"""
+Commits (fsync groups) per request and per-request latency of OmegaMemory
+under concurrent load, with one commit per write (the old behaviour) and
+with write-behind group commits.
+
+Each simulated request does the brain-path write pattern: add_task, the
+"thinking" checkpoint, one "executing" checkpoint per attempt, log_action,
+set_cache, increment_habit and the final "completed" checkpoint,
+with a little think/tool time in between. Every commit costs SQLite a
+fixed number of fsyncs (journal + database in rollback mode), so commits
+per request is the fsync multiplier.
+
+    python benchmarks/bench_memory.py --requests 400 --concurrency 16
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.omega_memory import OmegaMemory
+
+class ImmediateMemory(OmegaMemory):
+    """Pre-write-behind behaviour: every write commits on its own."""
+    async def _write(self, sql, params, durable=False):
+        await self.ensure_db()
+        cursor = await self._conn.execute(sql, params)
+        await self._conn.commit()
+        self.writes += 1
+        self.commits += 1
+        return cursor
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def one_request(memory, i, rng, attempts):
+    spent = 0.0
+
+    async def timed(coro):
+        nonlocal spent
+        start = time.perf_counter()
+        result = await coro
+        spent += time.perf_counter() - start
+        return result
+
+    task_id = await timed(memory.add_task(f"request {i}"))
+    await timed(memory.update_task_checkpoint(task_id, "running", {"stage": "thinking"}))
+    await asyncio.sleep(rng.uniform(0.001, 0.005))  # Model
+    for _ in range(attempts):
+        await timed(memory.update_task_checkpoint(task_id, "running", {"stage": "executing", "tool": "stats"}))
+        await asyncio.sleep(rng.uniform(0.001, 0.003))  # Tool
+    await timed(memory.log_action("stats()", "ok", "LOW"))
+    await timed(memory.set_cache(f"hash{i}", "stats", ""))
+    await timed(memory.increment_habit(f"slot|app{i % 7}", "stats:"))
+    await timed(memory.update_task_checkpoint(task_id, "completed", {"stage": "finished"}))
+    return spent
+
+async def run(label, args, memory_cls):
+    memory = memory_cls(db_path=os.path.join(tempfile.mkdtemp(dir=args.dir), "bench.db"))
+    await memory.ensure_db()
+    rng = random.Random(3)
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def guarded(i):
+        async with sem:
+            return await one_request(memory, i, rng, args.attempts)
+
+    start = time.perf_counter()
+    spent = await asyncio.gather(*(guarded(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    await memory.close()
+    print(f"{label:<14} {memory.commits / args.requests:6.2f} commits/req  {memory.writes / args.requests:5.1f} writes/req  "
+          f"memory time p50 {percentile(spent, 50) * 1e3:6.2f} ms  p99 {percentile(spent, 99) * 1e3:6.2f} ms  "
+          f"{args.requests / elapsed:7.1f} req/s")
+
+async def main(args):
+    await run("immediate", args, ImmediateMemory)
+    await run("write-behind", args, OmegaMemory)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=2, help="Executing checkpoints per request (retries)")
+    parser.add_argument("--dir", default=None, help="Directory for the benchmark database (use a real disk)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""
+Startup cost of OmegaMemory on a large database: open + schema check +
+the crash-resume query (get_pending_tasks), which the core runs on every
+start. The database holds --tasks task rows (all but --open of them
+completed) and as many audit rows.
+
+  baseline  - the old profile: default journal, no pragmas, no indexes,
+              "status != 'completed' AND status != 'failed'" full scan
+  tuned     - OmegaMemory as shipped (WAL, pragmas, partial open-task
+              index, reader pool); the first tuned start also builds the
+              indexes once and is reported separately
+
+    python benchmarks/bench_memory_startup.py --tasks 1000000
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import sqlite3
+import argparse
+import tempfile
+
+import aiosqlite
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.omega_memory import OmegaMemory
+
+def build(path, tasks, open_tasks):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, request TEXT NOT NULL, status TEXT DEFAULT 'pending',
+            checkpoint TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+    conn.execute("""
+        CREATE TABLE audit_trail (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, command TEXT NOT NULL, result TEXT, risk_level TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""")
+    stride = max(1, tasks // max(open_tasks, 1))
+    conn.executemany(
+        "INSERT INTO tasks (request, status, checkpoint) VALUES (?, ?, ?)",
+        ((f"request {i}", "running" if i % stride == 0 else "completed", '{"stage": "finished"}') for i in range(tasks)),
+    )
+    conn.executemany(
+        "INSERT INTO audit_trail (command, result, risk_level) VALUES (?, ?, ?)",
+        (("stats()", "ok", "LOW") for _ in range(tasks)),
+    )
+    conn.commit()
+    conn.close()
+
+async def baseline_start(path):
+    start = time.perf_counter()
+    conn = await aiosqlite.connect(path)
+    async with conn.execute("SELECT * FROM tasks WHERE status != 'completed' AND status != 'failed'") as cursor:
+        rows = await cursor.fetchall()
+    elapsed = time.perf_counter() - start
+    await conn.close()
+    return elapsed, len(rows)
+
+async def tuned_start(path, limit):
+    start = time.perf_counter()
+    memory = OmegaMemory(db_path=path)
+    await memory.ensure_db()
+    rows = await memory.get_pending_tasks(limit=limit)
+    elapsed = time.perf_counter() - start
+    await memory.close()
+    return elapsed, len(rows)
+
+async def main(args):
+    work = tempfile.mkdtemp(dir=args.dir)
+    template = os.path.join(work, "template.db")
+    start = time.perf_counter()
+    build(template, args.tasks, args.open)
+    print(f"Built {args.tasks:,} tasks / {args.tasks:,} audit rows in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(template) / 1e6:.0f} MB)")
+
+    base_db = os.path.join(work, "baseline.db")
+    tuned_db = os.path.join(work, "tuned.db")
+    shutil.copy(template, base_db)
+    shutil.copy(template, tuned_db)
+
+    elapsed, found = await tuned_start(tuned_db, -1)
+    print(f"{'tuned, first start':<26} {elapsed * 1e3:9.1f} ms  (one-time index build, {found} open tasks)")
+    for label, fn in (("baseline", lambda: baseline_start(base_db)), ("tuned", lambda: tuned_start(tuned_db, -1)),
+                      ("tuned, resume limit 10", lambda: tuned_start(tuned_db, 10))):
+        runs = [await fn() for _ in range(args.repeat)]
+        best = min(r[0] for r in runs)
+        print(f"{label:<26} {best * 1e3:9.1f} ms  ({runs[0][1]} open tasks, best of {args.repeat})")
+    shutil.rmtree(work)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--open", type=int, default=25, help="Tasks left running (what a crash leaves)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--dir", default=None, help="Directory for the benchmark databases")
+    asyncio.run(main(parser.parse_args()))
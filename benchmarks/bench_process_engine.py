@@ -0,0 +1,88 @@
+"""
+100 shell commands started at once (the way gathered plan actions and
+concurrent daemon clients start them): the old path, subprocess.run in
+asyncio.to_thread, against the asyncio ProcessEngine. Reports wall time,
+peak thread count, event-loop stall, and, for a cancelled batch, how many
+commands were still running afterwards.
+
+    python benchmarks/bench_process_engine.py --commands 100 --sleep 0.5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.process_engine import ProcessEngine
+
+def legacy_shell(command):
+    """LinuxHands.execute_shell before the process engine."""
+    try:
+        result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=60)
+        return {"exit_code": result.returncode, "output": result.stdout if result.returncode == 0 else result.stderr}
+    except Exception as e:
+        return {"exit_code": -1, "output": str(e)}
+
+async def observe(batch):
+    """Runs batch() while sampling the thread count and the longest event-loop gap."""
+    peak, worst, done = threading.active_count(), 0.0, asyncio.Event()
+    async def sampler():
+        nonlocal peak, worst
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.005)
+            now = time.perf_counter()
+            peak, worst, last = max(peak, threading.active_count()), max(worst, now - last - 0.005), now
+    task = asyncio.create_task(sampler())
+    start = time.perf_counter()
+    results = await batch()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await task
+    return elapsed, peak, worst, results
+
+def running(marker):
+    """Commands from the cancelled batch that are still alive."""
+    out = subprocess.run(["pgrep", "-f", marker], capture_output=True, text=True).stdout
+    return len(out.split())
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=100)
+    parser.add_argument("--sleep", type=float, default=0.5)
+    args = parser.parse_args()
+    commands = [f"sleep {args.sleep}; echo {i}" for i in range(args.commands)]
+    engine = ProcessEngine()
+
+    async def old():
+        return await asyncio.gather(*(asyncio.to_thread(legacy_shell, c) for c in commands))
+    async def new():
+        return await asyncio.gather(*(engine.run(c) for c in commands))
+
+    print(f"{args.commands} parallel commands of {args.sleep}s each")
+    for label, batch in (("to_thread+run", old), ("ProcessEngine", new)):
+        elapsed, peak, worst, results = await observe(batch)
+        ok = sum(r["exit_code"] == 0 and r["output"].strip() == str(i) for i, r in enumerate(results))
+        print(f"{label:>14}: {elapsed:6.2f}s wall  {peak:4d} peak threads  {worst * 1000:6.1f}ms max loop stall  {ok}/{len(results)} ok")
+
+    # Cancel a batch of long commands half a second in
+    for n, (label, runner) in enumerate((("to_thread+run", lambda c: asyncio.to_thread(legacy_shell, c)),
+                                         ("ProcessEngine", engine.run))):
+        marker = f"sleep 30.{n}17"
+        tasks = [asyncio.ensure_future(runner(f"{marker}; echo x")) for _ in range(10)]
+        await asyncio.sleep(0.5)
+        for task in tasks:
+            task.cancel()
+        start = time.perf_counter()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        settled = time.perf_counter() - start
+        print(f"{label:>14}: cancel settled in {settled * 1000:.0f}ms, {running(marker)}/10 commands still running")
+    subprocess.run(["pkill", "-f", "sleep 30.017"])  # What the old path left behind
+
+if __name__ == "__main__":
+    asyncio.run(main())
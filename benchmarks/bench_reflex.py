@@ -0,0 +1,81 @@
+"""
+Reflex micro-benchmark: the old `key in req` loop over INSTANT_MAP vs the
+compiled Aho-Corasick ReflexEngine, with a few thousand synthetic patterns.
+
+Note the two are not equivalent: the loop stops at the first substring hit,
+while the engine returns every boundary-respecting match in one pass.
+
+Usage: python benchmarks/bench_reflex.py [--patterns 3000] [--requests 2000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from config import settings
+from core.reflex import ReflexEngine
+
+VOCAB = [
+    "battery", "network", "disk", "volume", "screen", "brightness", "wifi", "bluetooth",
+    "kernel", "docker", "service", "printer", "camera", "temperature", "fan", "swap",
+    "usage", "status", "log", "update", "driver", "mount", "port", "socket", "user",
+]
+
+def build_map(n, rng):
+    instant_map = dict(settings.INSTANT_MAP)
+    while len(instant_map) < n:
+        phrase = " ".join(rng.sample(VOCAB, rng.randint(1, 3))) + f" {len(instant_map)}"
+        instant_map[phrase] = ("stats", "")
+    return instant_map
+
+def build_requests(n, instant_map, rng):
+    keys = list(instant_map)
+    requests = []
+    for _ in range(n):
+        words = rng.sample(VOCAB, 4) + [rng.choice(keys)] * rng.randint(0, 1)
+        rng.shuffle(words)
+        requests.append("please check " + " ".join(words))
+    return requests
+
+def old_loop(instant_map, req):
+    req = req.lower().strip()
+    for key, (tool, cmd) in instant_map.items():
+        if key in req:
+            return tool, cmd
+    return None
+
+def bench(n_patterns, n_requests):
+    rng = random.Random(7)
+    instant_map = build_map(n_patterns, rng)
+    requests = build_requests(n_requests, instant_map, rng)
+
+    start = time.perf_counter()
+    engine = ReflexEngine(instant_map)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for req in requests:
+        old_loop(instant_map, req)
+    loop_us = (time.perf_counter() - start) / n_requests * 1e6
+
+    start = time.perf_counter()
+    for req in requests:
+        engine.match(req)
+    engine_us = (time.perf_counter() - start) / n_requests * 1e6
+
+    print(f"patterns: {len(engine.patterns)} | requests: {n_requests} | automaton states: {len(engine._goto)}")
+    print(f"compile once        {compile_ms:9.1f} ms")
+    print(f"old `in` loop       {loop_us:9.1f} us/request (first hit only)")
+    print(f"ReflexEngine.match  {engine_us:9.1f} us/request (all matches)")
+    print(f"speedup             {loop_us / engine_us:9.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--patterns", type=int, default=3000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    bench(args.patterns, args.requests)
@@ -0,0 +1,110 @@
+"""
+Throughput of OmegaSafety.analyze_risk over a corpus of shell lines: the
+old per-pattern re.search loop, the compiled automaton with the memo
+bypassed (every line new), and the memoised analyzer on the same stream.
+
+The corpus is either a shell history (--history ~/.bash_history, repeated
+to --lines) or a synthetic one built from everyday commands (git, ls, grep,
+find, docker, pip, curl, ...) with random paths and words, drawn Zipf-like
+so some lines recur as they do in real history. A sample of the lines
+where the two analyzers disagree is printed (quoted text, /dev/null, the
+wider MEDIUM rules).
+
+    python benchmarks/bench_safety.py --lines 200000
+    python benchmarks/bench_safety.py --history ~/.bash_history
+"""
+import os
+import re
+import sys
+import time
+import random
+import string
+import argparse
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.omega_safety import OmegaSafety, _classify
+
+TEMPLATES = [
+    "ls -la {dir}", "cd {dir}", "git status", "git log --oneline -n {n}", "git commit -m '{words}'",
+    "git checkout -b {word}", "git diff {file}", "grep -rn {word} {dir}", "grep -c 'rm {word}' {file}",
+    "find {dir} -name '*.{ext}'", "cat {file} | less", "tail -f /var/log/{word}.log", "vim {file}",
+    "python3 {file}", "pip install {word}", "docker ps -a", "docker run --rm -it {word} bash",
+    "curl -s https://{word}.com/api | jq .", "curl -o {file} https://{word}.org/{word}", "make -j{n}",
+    "echo \"{words}\" >> {file}", "ls {dir} > /dev/null 2>&1", "ps aux | grep {word}", "kill {n}",
+    "rm {file}", "rm -rf {dir}/build", "mv {file} {dir}", "sudo systemctl restart {word}",
+    "chmod +x {file}", "tar -xzf {word}.tar.gz", "ssh {word}@{word}.local", "du -sh {dir}",
+    "echo \"$(date) {words}\"", "history | tail -n {n}", "df -h", "top", "htop", "clear",
+]
+
+def word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+def line(rng):
+    slots = {
+        "dir": "/".join(word(rng) for _ in range(rng.randint(1, 3))),
+        "file": f"{word(rng)}.{rng.choice(['py', 'txt', 'md', 'json', 'sh'])}",
+        "ext": rng.choice(["py", "log", "tmp"]),
+        "word": word(rng),
+        "words": " ".join(word(rng) for _ in range(rng.randint(2, 6))),
+        "n": rng.randint(1, 5000),
+    }
+    return rng.choice(TEMPLATES).format(**slots)
+
+def corpus(args):
+    rng = random.Random(args.seed)
+    if args.history:
+        with open(os.path.expanduser(args.history), errors="replace") as f:
+            lines = [l.rstrip("\n") for l in f if l.strip() and not l.startswith("#")]
+        return [f"shell {lines[i % len(lines)]}" for i in range(args.lines)]
+    distinct = [line(rng) for _ in range(max(1, args.lines // 4))]
+    return [f"shell {distinct[min(len(distinct), int(rng.paretovariate(0.25))) - 1]}" for _ in range(args.lines)]
+
+HIGH = [r"\brm\s+-rf", r"\breboot\b", r"\bshutdown\b", r"\bformat\b", r"\bmkfs\b", r">\s*/dev/", r"\bdd\b.*of="]
+MEDIUM = [r"\brm\s+", r"\bmv\s+", r"\bsystemctl\s+stop", r"\bkill\s+-9", r"\bapt\s+remove", r"\bpip\s+uninstall", r"\$\(", r"`"]
+
+def legacy(command):
+    """The analyzer before the rules were compiled: one re.search per pattern."""
+    for pattern in HIGH:
+        if re.search(pattern, command, re.IGNORECASE):
+            return "HIGH"
+    for pattern in MEDIUM:
+        if re.search(pattern, command, re.IGNORECASE):
+            return "MEDIUM"
+    return "LOW"
+
+def timed(fn, lines):
+    start = time.perf_counter()
+    levels = [fn(l) for l in lines]
+    return time.perf_counter() - start, levels
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--history", help="Shell history file to use instead of the synthetic corpus")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--show", type=int, default=8, help="Disagreements to print")
+    args = parser.parse_args()
+
+    lines = corpus(args)
+    safety = OmegaSafety()
+    print(f"{len(lines)} lines, {len(set(lines))} distinct")
+
+    old, old_levels = timed(legacy, lines)
+    _classify.cache_clear()
+    cold, _ = timed(lambda l: _classify.__wrapped__(" ".join(l.lower().split())), lines)
+    _classify.cache_clear()
+    memo, new_levels = timed(safety.analyze_risk, lines)
+    for label, seconds in (("per-pattern", old), ("compiled", cold), ("compiled+memo", memo)):
+        print(f"{label:>14}: {len(lines) / seconds:>12,.0f} lines/s  ({seconds * 1e6 / len(lines):.2f} us/line)")
+    print(f"{'':>14}  memo {OmegaSafety.stats()}")
+
+    print(f"levels old {dict(Counter(old_levels))}  new {dict(Counter(new_levels))}")
+    changed = [(l, a, b) for l, a, b in zip(lines, old_levels, new_levels) if a != b]
+    for l, a, b in list(dict.fromkeys(changed))[:args.show]:
+        print(f"  {a:>6} -> {b:<6} {l[6:]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Hit rate and lookup latency of SemanticCache for growing cache sizes:
+the exact md5 table lookup alone (the old behaviour), with the in-process
+LRU in front of it, and with the hashed n-gram vector tier behind both.
+
+Cached requests are synthetic ("search the price of <w1> <w2>", "list files
+in <dir>", "open <app>", ...). Queries are a mix of:
+  repeat     - the cached text, re-cased / re-spaced (exact tier territory)
+  paraphrase - fillers added or dropped, words reordered, punctuation
+  novel      - same templates with words never cached (must miss)
+A "wrong" hit is a returned command that differs from the query's own.
+Cached requests are picked Zipf-like (a few are asked for often), as real
+repeat traffic is.
+
+    python benchmarks/bench_semantic_cache.py --sizes 1000 10000 100000
+"""
+import os
+import sys
+import time
+import random
+import string
+import asyncio
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.cache import SemanticCache
+from core.omega_memory import OmegaMemory
+
+TEMPLATES = [
+    ("net", "search the price of {a} {b}", "price of {a} {b}"),
+    ("net", "what is the weather in {a}", "weather in {a}"),
+    ("ls", "list files in {a}/{b}", "{a}/{b}"),
+    ("shell", "run make {a} in {b}", "make {a}"),
+    ("stats", "how much {a} is {b} using", ""),
+]
+FILLERS = ["please", "now", "quickly", "can you", "tell me", "right now"]
+
+def word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 8)))
+
+def entry(rng):
+    tool, request, command = rng.choice(TEMPLATES)
+    slots = {"a": word(rng), "b": word(rng)}
+    return tool, request.format(**slots), command.format(**slots)
+
+def paraphrase(rng, request):
+    words = request.split()
+    if rng.random() < 0.5:
+        words = [w for w in words if w not in ("the", "is", "what")]
+    if rng.random() < 0.5:
+        words.append(rng.choice(FILLERS))
+    else:
+        words.insert(0, rng.choice(FILLERS))
+    text = " ".join(words)
+    return text.capitalize() + rng.choice(["?", "", ".", "!"])
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+class TableCache(SemanticCache):
+    """Original behaviour: one md5 lookup in the table per request."""
+    def __init__(self, memory):
+        super().__init__(memory=memory, max_entries=0)
+        self.embedder = None
+
+class ExactCache(SemanticCache):
+    """LRU + table, no vector tier."""
+    def __init__(self, memory):
+        super().__init__(memory=memory)
+        self.embedder = None
+
+async def populate(path, entries):
+    memory = OmegaMemory(db_path=path)
+    cache = SemanticCache(memory=memory)
+    for tool, request, command in entries:
+        await memory.set_cache(cache._hash(request), tool, command, request=request)
+    await memory.flush()
+    start = time.perf_counter()
+    await cache._load_index()
+    build = time.perf_counter() - start
+    await cache.close()
+    await memory.close()
+    return build
+
+async def measure(path, cache_cls, queries):
+    memory = OmegaMemory(db_path=path)
+    cache = cache_cls(memory=memory)
+    if cache.embedder:
+        start = time.perf_counter()
+        await cache._load_index()
+        load = time.perf_counter() - start
+    else:
+        load = 0.0
+    results = {kind: {"hit": 0, "wrong": 0, "n": 0} for kind in ("repeat", "paraphrase", "novel")}
+    latencies = {kind: [] for kind in results}
+    for kind, query, expected in queries:
+        start = time.perf_counter()
+        hit = await cache.get(query)
+        latencies[kind].append(time.perf_counter() - start)
+        bucket = results[kind]
+        bucket["n"] += 1
+        if hit:
+            if expected and (hit["tool"], hit["command"]) == expected:
+                bucket["hit"] += 1
+            else:
+                bucket["wrong"] += 1
+    await cache.close()
+    await memory.close()
+    return results, latencies, load
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        entries = [entry(rng) for _ in range(size)]
+        queries = []
+        for _ in range(args.queries):
+            kind = rng.choice(["repeat", "paraphrase", "novel"])
+            if kind == "novel":
+                tool, request, command = entry(rng)
+                queries.append((kind, request, None))
+                continue
+            tool, request, command = entries[min(size, int(rng.paretovariate(1.1))) - 1]
+            text = f"  {request.upper()} " if kind == "repeat" else paraphrase(rng, request)
+            queries.append((kind, text, (tool, command)))
+
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        build = await populate(path, entries)
+        print(f"\n=== {size} cached requests (index build {build:.2f}s) ===")
+        for label, cls in (("table", TableCache), ("lru+table", ExactCache), ("+vector", SemanticCache)):
+            results, latencies, load = await measure(path, cls, queries)
+            rates = "  ".join(
+                f"{kind} {r['hit'] / r['n']:.0%} hit/{r['wrong'] / r['n']:.1%} wrong" for kind, r in results.items() if r["n"]
+            )
+            print(f"{label:>13}: {rates}")
+            timings = "  ".join(
+                f"{kind} p50 {percentile(lat, 50) * 1000:.3f}ms/p99 {percentile(lat, 99) * 1000:.3f}ms"
+                for kind, lat in latencies.items() if lat
+            )
+            print(f"{'':>13}  {timings}" + (f"  index load {load * 1000:.0f}ms" if load else ""))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Serial vs parallel pre-inference sensing.
+
+Runs the four pre-cache steps of execute() (see_active, stop_speaking,
+SemanticCache.get, add_task) the old way (one after another) and through
+core.sense.fan_out, against a throwaway database.
+
+Usage: python benchmarks/bench_sense.py [--runs 200] [--window-latency 0.0]
+--window-latency adds an artificial delay to see_active, to emulate the two
+xprop round trips on machines without an X server.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from config import settings
+from core.tools import OperatorInterface
+from core.omega_memory import OmegaMemory
+from core.cache import SemanticCache
+from core.sense import fan_out, REQUIRED
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{label:<10} median {statistics.median(samples) * 1000:7.2f} ms | p95 {p95 * 1000:7.2f} ms")
+
+async def bench(runs, window_latency):
+    hands = OperatorInterface()
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = OmegaMemory(db_path=os.path.join(tmp, "bench.db"))
+        await memory.ensure_db()
+        cache = SemanticCache(memory=memory)
+
+        async def see_active():
+            if window_latency:
+                await asyncio.sleep(window_latency)
+            return await hands.read_active_window_async()
+
+        async def stop_speaking():
+            return await asyncio.to_thread(hands.stop_speaking)
+
+        serial = []
+        for i in range(runs):
+            start = time.perf_counter()
+            await see_active()
+            await stop_speaking()
+            await cache.get(f"request {i}")
+            await memory.add_task(f"request {i}")
+            serial.append(time.perf_counter() - start)
+
+        parallel = []
+        for i in range(runs):
+            start = time.perf_counter()
+            await fan_out({
+                "see_active": (see_active(), "UNKNOWN"),
+                "stop_speaking": (stop_speaking(), None),
+                "cache": (cache.get(f"request {i}"), None),
+                "add_task": (memory.add_task(f"request {i}"), REQUIRED),
+            }, settings.SENSE_DEADLINE)
+            parallel.append(time.perf_counter() - start)
+
+        await memory.close()
+
+    report("serial", serial)
+    report("fan-out", parallel)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--window-latency", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(bench(args.runs, args.window_latency))
@@ -0,0 +1,68 @@
+"""
+Per-command latency of a shell action: subprocess.run(shell=True) in a
+thread (the old path), a fresh asyncio process per command
+(ProcessEngine), and the warm bash pool, both unkeyed (each command in a
+subshell) and keyed (a plan's steps sharing one session). Commands range
+from a builtin to short external programs.
+
+    python benchmarks/bench_shell_pool.py --runs 300
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.process_engine import ProcessEngine
+from core.shell_pool import ShellPool
+
+COMMANDS = ["true", "echo hello", "date +%s", "ls /", "cd /tmp && pwd"]
+
+def legacy_shell(command):
+    """LinuxHands.execute_shell before the process engine."""
+    result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=60)
+    return {"exit_code": result.returncode, "output": result.stdout if result.returncode == 0 else result.stderr}
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def measure(run, command, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = await run(command)
+        latencies.append(time.perf_counter() - start)
+        assert result["exit_code"] == 0, result
+    return latencies
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=300)
+    args = parser.parse_args()
+
+    engine = ProcessEngine()
+    pool = ShellPool()
+    await pool.fill()
+    runners = [
+        ("to_thread+run", lambda c: asyncio.to_thread(legacy_shell, c)),
+        ("ProcessEngine", engine.run),
+        ("pool", pool.run),
+        ("pool, keyed", lambda c: pool.run(c, key="plan")),
+    ]
+    print(f"{'':>16}" + "".join(f"{label:>18}" for label, _ in runners) + "   (p50 / p99 ms)")
+    for command in COMMANDS:
+        cells = []
+        for _, run in runners:
+            latencies = await measure(run, command, args.runs)
+            cells.append(f"{percentile(latencies, 50) * 1000:7.2f} /{percentile(latencies, 99) * 1000:7.2f}")
+        print(f"{command:>16}" + "".join(f"{cell:>18}" for cell in cells))
+    print(f"pool: {pool.stats()}")
+    await pool.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
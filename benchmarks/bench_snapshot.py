@@ -0,0 +1,109 @@
+"""
+Cost of the snapshot taken before a risky action on a project tree: the
+old shutil.copytree copy against the content-addressed SnapshotStore
+(first snapshot, unchanged re-snapshot, one file edited), the disk each
+uses, restore time, and the longest event-loop stall while a snapshot
+runs inline versus through OmegaSafety.snapshot_async.
+
+The tree is synthetic: --files files of random size around --kb KiB, a
+quarter of them duplicates (vendored copies, build outputs).
+
+    python benchmarks/bench_snapshot.py --files 2000 --kb 64
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.snapshot_store import SnapshotStore
+from core.omega_safety import OmegaSafety
+
+def build_tree(path, files, kb, rng):
+    blobs = []
+    for i in range(files):
+        if blobs and rng.random() < 0.25:
+            data = rng.choice(blobs)
+        else:
+            data = rng.randbytes(max(1, int(rng.expovariate(1 / (kb * 1024)))))
+            blobs.append(data)
+        target = os.path.join(path, f"pkg{i % 40}", f"mod{i % 7}", f"file{i}.dat")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+
+def du(path):
+    return sum(os.path.getsize(os.path.join(folder, name)) for folder, _, names in os.walk(path) for name in names)
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+async def loop_stall(snapshot):
+    """Longest gap between 1 ms ticks of the event loop while snapshot() runs."""
+    worst, done = 0.0, asyncio.Event()
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            worst, last = max(worst, now - last), now
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    await snapshot()
+    done.set()
+    await tick
+    return worst
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--kb", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    project = os.path.join(tmp, "project")
+    build_tree(project, args.files, args.kb, random.Random(args.seed))
+    size = du(project)
+    print(f"tree: {args.files} files, {size / 2**20:.1f} MiB")
+
+    copy_time, _ = timed(shutil.copytree, project, os.path.join(tmp, "copytree"))
+    print(f"{'copytree':>22}: {copy_time * 1000:8.0f} ms  +{du(os.path.join(tmp, 'copytree')) / 2**20:.1f} MiB")
+
+    store = SnapshotStore(os.path.join(tmp, "store"))
+    first, manifest = timed(store.snapshot, project)
+    print(f"{'store, first':>22}: {first * 1000:8.0f} ms  +{store.disk_usage() / 2**20:.1f} MiB (reflink: {store.reflink})")
+    again, _ = timed(store.snapshot, project)
+    print(f"{'store, unchanged':>22}: {again * 1000:8.0f} ms  +0.0 MiB")
+    edited = os.path.join(project, "pkg0", "mod0", "file0.dat")
+    with open(edited, "ab") as f:
+        f.write(b"edit")
+    before = store.disk_usage()
+    one, _ = timed(store.snapshot, project)
+    print(f"{'store, one file edited':>22}: {one * 1000:8.0f} ms  +{(store.disk_usage() - before) / 2**20:.1f} MiB")
+
+    shutil.rmtree(project)
+    restore, _ = timed(store.restore, manifest["id"])
+    print(f"{'restore (deleted tree)':>22}: {restore * 1000:8.0f} ms")
+
+    safety = OmegaSafety(os.path.join(tmp, "stall"))
+    async def inline():
+        safety.snapshot(project)
+    inline_stall = asyncio.run(loop_stall(inline))
+    shutil.rmtree(os.path.join(tmp, "stall"))
+    safety = OmegaSafety(os.path.join(tmp, "stall"))
+    thread_stall = asyncio.run(loop_stall(lambda: safety.snapshot_async(project)))
+    print(f"{'event loop stall':>22}: inline {inline_stall * 1000:.0f} ms, snapshot_async {thread_stall * 1000:.1f} ms")
+    shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    main()
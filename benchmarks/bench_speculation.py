@@ -0,0 +1,78 @@
+"""
+End-to-end latency of the brain path with and without speculative dispatch.
+A scripted soul stream emits THINK tokens, then ACT lines, then keeps
+generating (as small models do before the parser closes the block); tools
+take a fixed latency. With speculation the tool calls overlap the tail of
+generation instead of starting after it.
+
+    python benchmarks/bench_speculation.py --token-ms 20 --tail-tokens 15 --tool-ms 300
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.executor import ActionExecutor, SpeculativeDispatch
+from core.omega_safety import OmegaSafety
+
+class NullMemory:
+    async def update_task_checkpoint(self, task_id, status, checkpoint_data, durable=None):
+        pass
+
+async def soul_stream(actions, think_tokens, tail_tokens, token_s):
+    for _ in range(think_tokens):
+        await asyncio.sleep(token_s)
+        yield {"type": "reasoning", "content": "x"}
+    for action in actions:
+        await asyncio.sleep(token_s)
+        yield {"type": "early_action", "action": action}
+    for _ in range(tail_tokens):
+        await asyncio.sleep(token_s)
+    yield {"type": "action", "actions": actions}
+
+async def one_request(actions, args, speculative):
+    async def dispatch(tool, cmd):
+        await asyncio.sleep(args.tool_ms / 1000)
+        return f"{tool} ok"
+
+    safety = OmegaSafety()
+    executor = ActionExecutor(dispatch, safety, NullMemory())
+    spec = SpeculativeDispatch(dispatch, safety) if speculative else None
+    start = time.perf_counter()
+    final = []
+    async for event in soul_stream(actions, args.think_tokens, args.tail_tokens, args.token_ms / 1000):
+        if event["type"] == "early_action" and spec:
+            spec.offer(event["action"])
+        elif event["type"] == "action":
+            final = event["actions"]
+    await executor.run(final, task_id=0, speculation=spec)
+    if spec:
+        await spec.discard()
+    return time.perf_counter() - start
+
+async def main(args):
+    workloads = {
+        "stats": [{"tool": "stats", "cmd": ""}],
+        "ls": [{"tool": "ls", "cmd": "core"}],
+        "net": [{"tool": "net", "cmd": "weather in paris"}],
+        "stats+ls": [{"tool": "stats", "cmd": ""}, {"tool": "ls", "cmd": "."}],
+        "shell (never speculated)": [{"tool": "shell", "cmd": "date"}],
+    }
+    print(f"{'workload':<26} {'sequential':>11} {'speculative':>12}")
+    for name, actions in workloads.items():
+        base = sum([await one_request(actions, args, False) for _ in range(args.repeat)]) / args.repeat
+        spec = sum([await one_request(actions, args, True) for _ in range(args.repeat)]) / args.repeat
+        print(f"{name:<26} {base * 1e3:9.1f}ms {spec * 1e3:10.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--think-tokens", type=int, default=30)
+    parser.add_argument("--tail-tokens", type=int, default=15)
+    parser.add_argument("--tool-ms", type=float, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,123 @@
+"""
+Replays Ollama token streams through the legacy THINK/SAY/ACT loop (buffer
+append + splitlines + rfind per chunk) and the incremental
+ThoughtStreamParser.
+
+Streams come from a JSONL file (one JSON list of response chunks per line).
+Record real ones from a running Ollama with:
+    python benchmarks/bench_stream_parser.py --record streams.jsonl --request "check ram and list files"
+then replay them with:
+    python benchmarks/bench_stream_parser.py --streams streams.jsonl
+Without --streams, streams are synthesised in Ollama's chunking style
+(1-4 characters per chunk, tags split across chunks).
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.stream_parser import ThoughtStreamParser
+
+def legacy_parse(chunks):
+    """The pre-parser loop from MonolithSoul.execute_task_stream, minus the yields."""
+    full_response = ""
+    last_emitted_pos = 0
+    current_type = None
+    events = 0
+    for chunk in chunks:
+        full_response += chunk
+        lines = full_response.splitlines()
+        if not lines: continue
+        last_line = lines[-1].strip()
+        if last_line.startswith("THINK:") and current_type != "reasoning":
+            current_type = "reasoning"
+            last_emitted_pos = full_response.rfind("THINK:") + 6
+        elif last_line.startswith("SAY:") and current_type != "talk":
+            current_type = "talk"
+            last_emitted_pos = full_response.rfind("SAY:") + 4
+        elif last_line.startswith("ACT:") and current_type != "action":
+            current_type = "action"
+            break
+        if current_type in ["talk", "reasoning"]:
+            content_chunk = full_response[last_emitted_pos:]
+            if not any(f"\n{p}:" in content_chunk for p in ["SAY", "ACT", "THINK"]):
+                if content_chunk:
+                    events += 1
+                    last_emitted_pos = len(full_response)
+    return events
+
+def incremental_parse(chunks):
+    parser = ThoughtStreamParser()
+    events = 0
+    for chunk in chunks:
+        events += len(parser.feed(chunk))
+        if parser.closed:
+            break
+    return events + len(parser.finish())
+
+def synthesize(n_streams, tokens, rng):
+    words = ("the user wants to know the current system load so I should check ram cpu and "
+             "then list the files in the project directory before answering").split()
+    streams = []
+    for _ in range(n_streams):
+        body = []
+        for i in range(tokens):
+            body.append(rng.choice(words))
+            if i % 40 == 39:
+                body.append("\nTHINK:")
+        text = "THINK: " + " ".join(body) + "\nACT: stats,\nACT: ls,core\nSAY: done"
+        chunks, i = [], 0
+        while i < len(text):
+            step = rng.randint(1, 4)
+            chunks.append(text[i:i + step])
+            i += step
+        streams.append(chunks)
+    return streams
+
+async def record(path, request, count):
+    from core.brain_v2 import MonolithSoul
+    soul = MonolithSoul()
+    with open(path, "a") as f:
+        for _ in range(count):
+            chunks = [c async for c in soul.monolith.think_stream(
+                f"Input: {request}\nFormat:\nTHINK: [Logic]\nACT: tool,query", temperature=0.1, max_tokens=600)]
+            f.write(json.dumps(chunks) + "\n")
+    await soul.close()
+    print(f"Recorded {count} stream(s) to {path}")
+
+def bench(streams, repeat):
+    for label, fn in (("legacy loop", legacy_parse), ("ThoughtStreamParser", incremental_parse)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for chunks in streams:
+                fn(chunks)
+        per_stream = (time.perf_counter() - start) / (repeat * len(streams))
+        print(f"{label:<22} {per_stream * 1e3:8.3f} ms/stream")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--streams", help="JSONL file of recorded chunk lists")
+    parser.add_argument("--record", help="Append live Ollama streams to this JSONL file")
+    parser.add_argument("--request", default="check ram and list the files in core")
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--tokens", type=int, default=600, help="Words per synthesised stream")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(args.record, args.request, args.count))
+        sys.exit(0)
+
+    if args.streams:
+        with open(args.streams) as f:
+            streams = [json.loads(line) for line in f if line.strip()]
+    else:
+        streams = synthesize(10, args.tokens, random.Random(11))
+    print(f"{len(streams)} stream(s), {sum(len(s) for s in streams) // len(streams)} chunks on average")
+    bench(streams, args.repeat)
@@ -0,0 +1,93 @@
+"""
+The stats and proc_list tools before and after the telemetry sampler. The
+old tools called psutil inline: a CPU percentage covering whatever time had
+passed since the previous call (noise when two requests come close
+together), and a full process walk per proc_list. The sampler's tools read pre-computed samples. Also
+reports what the sampler itself costs: thread CPU per sample and its share
+of one core at the configured cadence, with a busy thread loading one core
+so the CPU readings have something to show. The first line times a
+one-shot run's first read, which never waits for the sampler.
+
+    python benchmarks/bench_telemetry.py --reads 200 --seconds 10
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import statistics
+
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from config import settings
+from core.telemetry import TelemetrySampler
+
+def legacy_system_stats():
+    """LinuxHands.get_system_stats before the sampler."""
+    return {
+        "cpu_total": psutil.cpu_percent(),
+        "cpu_cores": psutil.cpu_percent(percpu=True),
+        "ram": psutil.virtual_memory().percent,
+        "disk": psutil.disk_usage(ROOT).percent,
+        "io": psutil.net_io_counters()._asdict()
+    }
+
+def legacy_process_list():
+    """LinuxHands.get_process_list before the sampler."""
+    procs = []
+    for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'status']):
+        procs.append(proc.info)
+    return sorted(procs, key=lambda x: x['cpu_percent'], reverse=True)[:15]
+
+def report(label, fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<24} median {statistics.median(samples) * 1e6:9.1f} us | p99 {p99 * 1e6:9.1f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long to run the sampler for its overhead")
+    args = parser.parse_args()
+
+    stop = threading.Event()
+    def spin():
+        while not stop.is_set():
+            pass
+    threading.Thread(target=spin, daemon=True).start()
+    time.sleep(0.5)
+
+    start = time.perf_counter()
+    TelemetrySampler(ROOT).system_stats()  # One-shot CLI runs: no sampler, one direct read
+    print(f"one-shot first stats read (sampler not started): {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    legacy_system_stats()
+    back_to_back = legacy_system_stats()["cpu_total"]  # Two requests in a row: the second spans microseconds
+    telemetry = TelemetrySampler(ROOT).start()
+    print(f"CPU with one of {psutil.cpu_count()} cores busy, read right after a previous read: "
+          f"legacy {back_to_back}%  sampler {telemetry.system_stats()['cpu_total']}%")
+
+    report("legacy stats", legacy_system_stats, args.reads)
+    report("sampler stats", telemetry.system_stats, args.reads)
+    report("legacy proc_list", legacy_process_list, max(1, args.reads // 10))
+    report("sampler proc_list", telemetry.process_list, args.reads)
+
+    time.sleep(args.seconds)
+    stats = telemetry.stats()
+    print(f"sampler over {args.seconds:.0f}s at {settings.TELEMETRY_INTERVAL}s cadence "
+          f"(processes every {settings.TELEMETRY_PROCESS_INTERVAL}s): {stats['samples']} samples, "
+          f"{stats['ms_per_sample']} ms CPU per sample, {stats['overhead_pct']}% of one core")
+    print(f"cpu over the run: {telemetry.aggregate('cpu', args.seconds + 5)['total']}")
+    stop.set()
+    telemetry.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Tracing overhead: cost of one span inside a trace, one span outside a trace,
+and of writing a finished trace to disk.
+
+Usage: python benchmarks/bench_tracing.py [--spans 100000]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.tracing import Tracer
+
+def bench(n):
+    with tempfile.TemporaryDirectory() as tmp:
+        tracer = Tracer(path=os.path.join(tmp, "traces.jsonl"), enabled=True, sample_rate=1.0)
+
+        start = time.perf_counter()
+        for _ in range(n):
+            with tracer.span("idle"):
+                pass
+        untraced = (time.perf_counter() - start) / n
+
+        handle = tracer.start_trace("bench")
+        start = time.perf_counter()
+        for _ in range(n):
+            with tracer.span("stage"):
+                pass
+        traced = (time.perf_counter() - start) / n
+
+        start = time.perf_counter()
+        tracer.end_trace(handle, 0.0)
+        write_per_span = (time.perf_counter() - start) / (n + 1)
+
+    # A brain-path request records roughly 30 spans
+    print(f"span outside a trace   {untraced * 1e6:7.2f} us")
+    print(f"span inside a trace    {traced * 1e6:7.2f} us")
+    print(f"write per span         {write_per_span * 1e6:7.2f} us")
+    print(f"~30-span request total {(traced + write_per_span) * 30 * 1e3:7.3f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spans", type=int, default=100000)
+    bench(parser.parse_args().spans)
@@ -0,0 +1,131 @@
+"""
+Time-to-first-audio and synthesiser CPU per spoken second for voice mode:
+  legacy    - one `echo | piper | sink` shell pipeline per streamed token chunk
+              (the voice model is reloaded for every chunk)
+  pipeline  - SentenceBuffer units fed to one persistent SpeechPipeline
+
+A scripted answer streams at --token-ms per token. The sink is a stand-in
+for paplay that consumes PCM in real time and stamps its first byte, so
+both modes are timed the same way. Without Piper installed (or without
+--real) a fake synthesiser burns CPU for --load-ms at start-up and for
+--rtf x the audio length per line, which is how Piper behaves.
+
+    python benchmarks/bench_tts.py
+    python benchmarks/bench_tts.py --real        # needs piper and a voice in models/voice
+"""
+import os
+import sys
+import time
+import shlex
+import asyncio
+import argparse
+import resource
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from config import settings
+from core.voice import SentenceBuffer, SpeechPipeline
+
+RATE = 22050
+ANSWER = ("Your system looks healthy. CPU load is at twelve percent across eight cores, "
+          "memory use is four point two gigabytes, and the disk has plenty of space left. "
+          "Nothing needs your attention right now.")
+
+FAKE_SYNTH = r"""
+import sys, time
+def burn(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+load, rtf = float(sys.argv[1]), float(sys.argv[2])
+burn(load)
+for line in sys.stdin:
+    audio = 0.35 * len(line.split())
+    burn(audio * rtf)
+    sys.stdout.buffer.write(b"\0" * int(audio * %d) * 2)
+    sys.stdout.buffer.flush()
+""" % RATE
+
+SINK = r"""
+import sys, time
+stamp, rate = sys.argv[1], int(sys.argv[2])
+first = True
+while chunk := sys.stdin.buffer.read1(65536):
+    if first:
+        with open(stamp, "a") as f:
+            f.write(f"{time.time()}\n")
+        first = False
+    time.sleep(len(chunk) / (rate * 2))
+"""
+
+def tokens():
+    words = ANSWER.split(" ")
+    return [words[0]] + [" " + w for w in words[1:]]
+
+def synth_cmd(args):
+    if args.real:
+        return SpeechPipeline._piper_cmd(settings.PIPER_MODEL_PATH)
+    return [sys.executable, "-c", FAKE_SYNTH, str(args.load_ms / 1000), str(args.rtf)]
+
+def sink_cmd(stamp):
+    return [sys.executable, "-c", SINK, stamp, str(RATE)]
+
+def first_stamp(stamp):
+    with open(stamp) as f:
+        return min(float(line) for line in f if line.strip())
+
+def run_legacy(args, stamp):
+    """One shell pipeline per token chunk, played back one after another (the old _voice_worker)."""
+    start = time.time()
+    for token in tokens():
+        time.sleep(args.token_ms / 1000)
+        text = token.strip().replace("'", "")
+        cmd = f"echo '{text}' | {shlex.join(synth_cmd(args))} | {shlex.join(sink_cmd(stamp))}"
+        subprocess.run(cmd, shell=True, stderr=subprocess.DEVNULL)
+    return start
+
+def run_pipeline(args, stamp):
+    pipeline = SpeechPipeline(model_path="unused", sample_rate=RATE, synth_cmd=synth_cmd(args), sink_cmd=sink_cmd(stamp))
+    if args.warm:
+        pipeline.start()  # Voice mode says "System online" first, so the model is loaded already
+        time.sleep(args.load_ms / 1000 + 0.5)
+    buffer = SentenceBuffer()
+    start = time.time()
+    for token in tokens():
+        time.sleep(args.token_ms / 1000)
+        for unit in buffer.feed(token):
+            pipeline.say(unit)
+    for unit in buffer.flush():
+        pipeline.say(unit)
+    while pipeline.speaking:
+        time.sleep(0.05)
+    pipeline.close()
+    return start
+
+def measure(label, fn, args):
+    stamp = tempfile.NamedTemporaryFile(delete=False).name
+    cpu_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = fn(args, stamp)
+    cpu_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    ttfa = first_stamp(stamp) - start
+    os.remove(stamp)
+    cpu = (cpu_after.ru_utime - cpu_before.ru_utime) + (cpu_after.ru_stime - cpu_before.ru_stime)
+    spoken = 0.35 * len(ANSWER.split())
+    print(f"{label:<20} time-to-first-audio {ttfa * 1e3:8.1f} ms   CPU {cpu / spoken:6.3f} s per spoken second")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--real", action="store_true", help="Use piper and the configured voice model")
+    parser.add_argument("--token-ms", type=float, default=30)
+    parser.add_argument("--load-ms", type=float, default=400, help="Fake synthesiser model load time")
+    parser.add_argument("--rtf", type=float, default=0.1, help="Fake synthesiser real-time factor")
+    parser.add_argument("--warm", action="store_true", help="Start the pipeline before the answer streams")
+    args = parser.parse_args()
+    if args.real and not SpeechPipeline.available():
+        sys.exit("piper, a voice model and paplay/aplay are required for --real")
+
+    measure("legacy per-chunk", run_legacy, args)
+    measure("persistent pipeline", run_pipeline, args)
@@ -0,0 +1,106 @@
+"""
+Active-window reads: the old read_active_window (two xprop runs through
+shell=True per call) against the WindowTracker (persistent xprop -spy,
+title kept in memory), plus how long a focus change takes to reach a
+subscriber. Runs against a stand-in `xprop` script put first on PATH,
+so no X server is needed; the real xprop is a small C binary, so its
+spawn cost is of the same order.
+
+    python benchmarks/bench_window_tracker.py --reads 500 --changes 50
+"""
+import os
+import sys
+import time
+import stat
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from core.window_tracker import WindowTracker
+
+FAKE_XPROP = """#!/bin/sh
+case "$*" in
+  *-root*-spy*) exec cat "$UMBRASOL_BENCH_FIFO" ;;
+  *-spy*) echo "_NET_WM_NAME(UTF8_STRING) = \\"Window $2\\""; exec sleep 3600 ;;
+  *-root*) echo "_NET_ACTIVE_WINDOW(WINDOW): window id # 0x1a00007" ;;
+  *) echo "WM_NAME(STRING) = \\"Window $2\\"" ;;
+esac
+"""
+
+def legacy_read_active_window():
+    """LinuxHands.read_active_window before the tracker."""
+    try:
+        res = subprocess.run("xprop -root _NET_ACTIVE_WINDOW", shell=True, capture_output=True, text=True)
+        win_id = res.stdout.split()[-1]
+        res = subprocess.run(f"xprop -id {win_id} WM_NAME", shell=True, capture_output=True, text=True)
+        return res.stdout.split(" = ")[-1].strip('"')
+    except: return "UNKNOWN"
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{label:<28} median {statistics.median(samples) * 1e6:9.1f} us | p99 {p99 * 1e6:9.1f} us")
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+async def timed_async(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--changes", type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    xprop = os.path.join(tmp, "xprop")
+    with open(xprop, "w") as f:
+        f.write(FAKE_XPROP)
+    os.chmod(xprop, os.stat(xprop).st_mode | stat.S_IEXEC)
+    fifo = os.path.join(tmp, "root")
+    os.mkfifo(fifo)
+    os.environ["PATH"] = f"{tmp}{os.pathsep}{os.environ['PATH']}"
+    os.environ["UMBRASOL_BENCH_FIFO"] = fifo
+
+    tracker = WindowTracker().start(wait=0)
+    seen = threading.Event()
+    tracker.subscribe(lambda window_id, title: seen.set())
+    with open(fifo, "w") as writer:
+        # Focus-change latency: root spy line -> title spy spawned -> subscriber called
+        latencies = []
+        for i in range(args.changes + 1):
+            seen.clear()
+            start = time.perf_counter()
+            writer.write(f"_NET_ACTIVE_WINDOW(WINDOW): window id # {hex(0x1000 + i)}\n")
+            writer.flush()
+            if not seen.wait(5):
+                raise SystemExit("no change event within 5s")
+            latencies.append(time.perf_counter() - start)
+        assert tracker.title == f"Window {hex(0x1000 + args.changes)}", tracker.title
+
+        print(f"{args.reads} reads, {args.changes} focus changes")
+        report("legacy (2x xprop, sh)", timed(legacy_read_active_window, args.reads))
+        report("tracker read", timed(lambda: tracker.title, args.reads))
+        report("tracker, to_thread", asyncio.run(timed_async(lambda: asyncio.to_thread(lambda: tracker.title), args.reads)))
+        report("focus change -> subscriber", latencies[1:])
+        tracker.close()
+
+if __name__ == "__main__":
+    main()
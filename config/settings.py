@@ -16,6 +16,10 @@ HABIT_MEMORY_PATH = os.path.join(BASE_DIR, "config", "habit_memory.json")
 # AI Settings
 DEFAULT_MODEL = "qwen2.5:3b"
 OLLAMA_BASE_URL = "http://localhost:11434"
+BRAIN_CONNECT_TIMEOUT = 5.0  # Seconds to open a connection to Ollama
+BRAIN_READ_TIMEOUT = 60.0  # Seconds between streamed chunks before giving up
+BRAIN_MAX_CONNECTIONS = 4  # Pooled keep-alive connections (concurrent daemon requests)
+BRAIN_KEEPALIVE_EXPIRY = 300.0  # Seconds an idle pooled connection stays open
 
 # Voice Settings (Dynamic Selection)
 PIPER_MODEL_DIR = os.path.join(MODELS_DIR, "voice")
@@ -40,6 +44,9 @@ except FileNotFoundError as e:
     PIPER_VOICE = None
     PIPER_MODEL_PATH = None
 
+TTS_SAMPLE_RATE = 22050  # Fallback when the voice has no <model>.onnx.json
+TTS_LENGTH_SCALE = 0.85  # Piper speaking rate (<1 is faster)
+
 # Execution Settings
 MAX_RETRIES = 2
 EXECUTION_TIMEOUT = 60
@@ -50,26 +57,141 @@ MAX_TASK_RESUME = 10  # Max tasks to resume after crash
 HEURISTIC_WORD_THRESHOLD = 5  # Only use heuristics for short commands (< 5 words)
 SENTENCE_BUFFER_WORDS = 8  # Speak after accumulating 8 words in streaming
 HEALTH_CHECK_INTERVAL = 30  # Seconds between health monitor checks
+SENSE_DEADLINE = 0.15  # Seconds the parallel sense stage waits before defaulting late probes
+
+# Latency Tracing (python -m core.tracing for p50/p95/p99 per stage)
+TRACE_ENABLED = True
+TRACE_SAMPLE_RATE = 1.0  # Fraction of requests traced
+TRACE_LOG_PATH = os.path.join(LOG_DIR, "traces.jsonl")
+TRACE_MAX_BYTES = 20 * 1024 * 1024  # Rotate to traces.jsonl.1 beyond this size
+
+# Memory Write-Behind (OmegaMemory group commits)
+MEMORY_COMMIT_INTERVAL = 0.05  # Seconds a write may wait for others to share its commit
+MEMORY_COMMIT_BATCH = 64  # Uncommitted writes that force a commit right away
+
+# SQLite Storage Profile (OmegaMemory)
+MEMORY_JOURNAL_MODE = "WAL"  # Readers never block the writer (and vice versa)
+MEMORY_SYNCHRONOUS = "NORMAL"  # WAL + NORMAL: commits survive a process crash, syncs happen at checkpoints
+MEMORY_MMAP_BYTES = 256 * 1024 * 1024  # Memory-mapped I/O window
+MEMORY_CACHE_KB = 16 * 1024  # Page cache per connection
+MEMORY_READERS = 2  # Read-only connections (each on its own aiosqlite thread)
+
+# Semantic Cache (exact md5 tier, then a hashed n-gram vector tier)
+CACHE_SEMANTIC_ENABLED = True  # Needs numpy; exact matches only without it
+CACHE_EMBED_DIM = 256  # Hashed feature buckets per request vector (4 bytes each per entry)
+CACHE_SIMILARITY_THRESHOLD = 0.85  # Cosine similarity a paraphrase needs to reuse a cached command
+CACHE_THREAD_ROWS = 20000  # Index size beyond which lookups leave the event loop
+CACHE_LRU_SIZE = 512  # Entries kept in process in front of the table (0 disables)
+CACHE_TTL = 30 * 24 * 3600  # Seconds an entry may go unused before it expires
+CACHE_MAX_ROWS = 50000  # Table rows kept by a prune (most recently used win)
+CACHE_PRUNE_INTERVAL = 256  # New entries between table prunes
+# Context-bound entries: a command cached under these dimensions ("app", "cwd", "slot") is only reused when they match
+CACHE_CONTEXT_TOOLS = {
+    "ls": ("cwd",), "shell": ("cwd",),  # Relative paths
+    "gui_click": ("app",), "gui_type": ("app",), "gui_scroll": ("app",),
+}
+CACHE_CONTEXT_WORDS = {  # Words that point at the surroundings rather than the request itself
+    "this": ("app", "cwd"), "that": ("app",), "these": ("app", "cwd"), "here": ("cwd",),
+    "current": ("app", "cwd"), "tonight": ("slot",),
+}
+
+# Negative Cache (failed brain plans per request)
+NEGATIVE_CACHE_ENABLED = True
+NEGATIVE_CACHE_TTL = {  # Seconds a failure is remembered, per error class
+    "unknown_tool": 24 * 3600, "blocked": 3600, "unavailable": 3600,
+    "transient": 60, "error": 300,
+}
+NEGATIVE_CACHE_ANSWER_AFTER = 2  # Deterministic failures of a request before it is answered without the brain
+
+# Habits & Speculative Prefetch
+HABIT_HALF_LIFE_DAYS = 7.0  # A habit's weight halves every week it isn't repeated
+HABIT_MIN_SCORE = 3.0  # Decayed score a prediction needs before anything is prefetched
+PREFETCH_ENABLED = True  # Resident modes only (daemon, voice)
+PREFETCH_POLL_INTERVAL = 1.0  # Seconds between active-window checks
+PREFETCH_TTL = 10.0  # Seconds a prefetched result may stand in for a fresh call
+PREFETCH_WARM_MODEL = True  # No read-only prediction: load the model into Ollama instead
+
+# Telemetry (one background sampler feeds stats/proc_list; tool calls read the newest sample)
+TELEMETRY_INTERVAL = 1.0  # Seconds between samples
+TELEMETRY_HISTORY = 600  # Seconds of samples kept per series (windowed averages look back at most this far)
+TELEMETRY_PROCESS_INTERVAL = 5.0  # Seconds between per-process CPU samples (a full process walk)
+TELEMETRY_WARMUP = 0.25  # Seconds the first sample's CPU deltas span
+TELEMETRY_TOP_PROCESSES = 15  # Processes kept, busiest first
+
+# Window Tracker (Linux/X11): follows focus with persistent `xprop -spy`s instead of two xprop calls per request
+WINDOW_TRACKER_ENABLED = True
+WINDOW_TRACKER_FIRST_WAIT = 0.25  # Seconds the first read waits for the tracker's first title
+WINDOW_TRACKER_RESTART_DELAY = 2.0  # Seconds before an exited root spy (X restarted) is respawned
 
-# Safety Patterns (Regex-based for robust detection)
-SENSITIVE_PATTERNS = [
-    r"\brm\s+",           # rm with any whitespace
-    r"\bmv\s+",           # mv with any whitespace  
-    r">+",                # output redirection
-    r"\bchmod\b",         # chmod (any usage)
-    r"\bchown\b",         # chown (any usage)
-    r"\bsudo\b",          # sudo (any usage)
-    r"\bapt\s+",          # apt package manager
-    r"\bpip\s+install",   # pip install
-    r"\bwget\b",          # wget downloads
-    r"\bcurl\b.*-o",      # curl with output
-    r"\bkill\s+",         # kill process
-    r"\$\(",              # command substitution $(...)
-    r"`",                 # backtick command substitution
-    r"\bdd\b",            # dangerous disk operations
-    r"\bmkfs\b",          # filesystem creation
-    r">\s*/dev/",         # writing to device files
+# Resident Daemon (main.py --serve)
+DAEMON_SOCKET_PATH = os.path.join(LOG_DIR, "umbrasol.sock")
+DAEMON_CONNECT_TIMEOUT = 0.5  # Seconds before the client falls back to in-process mode
+DAEMON_MAX_MESSAGE_BYTES = 4 * 1024 * 1024  # Largest single event line on the socket
+
+# Safety Patterns: the one rule set OmegaSafety compiles into a single automaton.
+# Matched against the command's words as the shell runs them (quotes removed, comments dropped);
+# quoted echo/printf operands and -m/--message values are data and left out unless they hold $(...) or backticks.
+RISK_PATTERNS = {
+    "HIGH": [
+        r"\brm(?=(?:\s+-\S+)*\s+(?:-[a-z]*r|--recursive\b))(?=(?:\s+-\S+)*\s+(?:-[a-z]*f|--force\b))",  # rm -rf / -r -f / --recursive --force
+        r"\breboot\b",                      # reboot
+        r"\bshutdown\b",                    # shutdown
+        r"\bformat\b",                      # format
+        r"\bmkfs\b",                        # make filesystem
+        r">\s*/dev/(?!null\b|stdout\b|stderr\b)",  # write to a device
+        r"\bdd\b.*\bof=",                   # dd with output file
+        r"\bshutil\.rmtree\s*\(",           # Python recursive delete
+    ],
+    "MEDIUM": [
+        r"\brm\s+",                         # any rm command
+        r"\bmv\s+",                         # any mv command
+        r"\bsystemctl\s+(?:stop|disable|mask)",  # stopping services
+        r"\bkill(?:all)?\s+",               # killing processes
+        r"\bsudo\b",                        # privilege escalation
+        r"\bchmod\b",                       # permission changes
+        r"\bchown\b",                       # ownership changes
+        r"\bos\.(?:remove|unlink|rmdir|removedirs)\s*\(",  # Python file deletes
+        r"\bapt(?:-get)?\s+(?:install|remove|purge|autoremove)",  # package changes
+        r"\bpip3?\s+(?:install|uninstall)", # pip package changes
+        r"\bwget\b",                        # downloads
+        r"\bcurl\b.*\s-(?:o|O|-output)\b",  # curl writing a file
+        r"\bdd\b",                          # raw disk copy
+        r"(?<![<>&])>>?(?!&)\s*(?!/dev/(?:null|stdout|stderr)\b)[^\s&|;]",  # redirect into a file
+        r"\$\(",                             # command substitution
+        r"`",                                # backtick substitution
+    ],
+}
+# Commands that run their quoted argument as code: their data arguments (echo "..." | sh) are judged too
+RISK_EXECUTES_QUOTED = [
+    r"\b(?:sh|bash|zsh|dash|ksh)\s+(?:-\S+\s+)*-[a-z]*c\b",  # sh -c '...'
+    r"\bsu\b[^|;&\n]*\s-[a-z]*c\b",                        # su -c '...'
+    r"\b(?:python[\d.]*|perl|ruby|node|php)\s+(?:-\S+\s+)*-[a-z]*[ce]\b",  # interpreter -c / -e code
+    r"\beval\b",                                            # eval '...'
+    r"\bssh\b",                                             # ssh host '...'
+    r"\|\s*(?:sudo\s+)?(?:sh|bash|zsh|dash|ksh)\b",          # ... | sh
+    r"\bxargs\b",                                           # arguments become a command
 ]
+SAFETY_MEMO_SIZE = 4096  # Normalised commands whose risk level is memoised
+
+# Snapshots taken before MEDIUM/HIGH actions (content-addressed, deduplicated)
+SNAPSHOT_DIR = ".umbrasol/backups"
+SNAPSHOT_CHUNK_SIZE = 1024 * 1024  # Bytes per content-addressed chunk
+SNAPSHOT_KEEP = 50  # Newest snapshots kept by GC
+SNAPSHOT_MAX_AGE = 7 * 24 * 3600  # Seconds before a snapshot is dropped
+SNAPSHOT_MAX_SOURCE_BYTES = 1024 * 1024 * 1024  # Larger targets are not snapshotted (e.g. rm -rf /)
+
+# Shell tool (asyncio process engine)
+SHELL_TIMEOUT = 60  # Seconds before a command's process group is terminated
+SHELL_OUTPUT_LIMIT = 1024 * 1024  # Bytes kept (and streamed) per stream; the middle is dropped past this
+SHELL_OUTPUT_TAIL = 64 * 1024  # Of which the last bytes of the stream
+SHELL_KILL_GRACE = 2.0  # Seconds between SIGTERM and SIGKILL
+SHELL_READ_CHUNK = 64 * 1024  # Bytes per pipe read (one streamed output event at most)
+SHELL_POOL_ENABLED = True  # Run shell actions in warm bash sessions (cd/export persist within a request)
+SHELL_POOL_SIZE = 2  # Idle bash sessions kept ready
+SHELL_POOL_MAX_USES = 200  # Commands before a session is replaced
+SHELL_POOL_MAX_AGE = 1800  # Seconds before a session is replaced
+SHELL_POOL_PING_AFTER = 60  # Idle seconds after which a session is pinged before reuse
+SHELL_POOL_PING_TIMEOUT = 1.0  # Seconds a ping may take
 
 # Heuristic Mapping (0.00ms Instant Commands)
 INSTANT_MAP = {
@@ -80,6 +202,47 @@ INSTANT_MAP = {
     "processes": ("proc_list", ""),
 }
 
+# Reflex Engine (compiled once from INSTANT_MAP at startup)
+# Extra phrasings per INSTANT_MAP key; matched on word boundaries only
+REFLEX_SYNONYMS = {
+    "battery": ["charge", "battery level", "battery status"],
+    "ram": ["memory usage", "ram usage"],
+    "cpu": ["cpu usage", "cpu load", "processor"],
+    "stats": ["vitals", "system stats", "system status"],
+    "list files": ["show files", "list the files", "what files"],
+    "processes": ["running processes", "process list", "top processes"],
+    "uptime": ["how long have you been running"],
+}
+# Higher wins when two phrases overlap (default 0), before phrase length
+REFLEX_PRIORITY = {
+    "active window": 10,
+    "list files": 5,
+}
+# Words that may surround reflex phrases without needing the LLM
+REFLEX_FILLER_WORDS = {
+    "a", "also", "am", "and", "any", "are", "check", "current", "currently", "display",
+    "do", "get", "give", "how", "i", "is", "me", "my", "now", "of", "on", "please",
+    "plus", "quick", "quickly", "right", "show", "status", "tell", "the", "then",
+    "what", "what's", "whats", "with", "you", "your",
+}
+
+# Reflex Promotion: requests the brain keeps resolving to one action become learned reflexes
+REFLEX_PROMOTION = True
+REFLEX_PROMOTE_MIN_SUPPORT = 3  # Successful outcomes before a request is promoted
+REFLEX_PROMOTE_MIN_CONFIDENCE = 0.9  # Share of the request's outcomes its action must account for (also the demotion line)
+REFLEX_LEARNED_PRIORITY = 20  # Learned phrases are whole requests: they win overlaps with built-in ones
+REFLEX_COMPILE_INTERVAL = 600.0  # Seconds between background compiles while resident
+
+# Read-only tools the executor may run concurrently within one plan stage
+PARALLEL_SAFE_TOOLS = {
+    "physical", "existence", "stats", "see_active", "see_tree",
+    "see_raw", "proc_list", "net", "ls", "gpu"
+}
+
+# Speculative dispatch: complete ACT lines for these tools start while the model is still streaming
+SPECULATIVE_DISPATCH = True
+SPECULATIVE_TOOLS = {"physical", "existence", "stats", "see_active", "proc_list", "net", "ls"}
+
 # Tool Whitelist
 SAFE_TOOLS = {
     "physical", "existence", "stats", "see_active", "see_tree", 
@@ -2,19 +2,56 @@ import httpx
 import json
 import os
 import re
+import time
 import logging
+from contextlib import aclosing
+from core.tracing import tracer
+from core.stream_parser import ThoughtStreamParser
+from core.intent import extractor
 from core.profiler import HardwareProfiler
 from core.experience import ExperienceManager
 from config import settings
 
+INLINE_ACT_PATTERN = re.compile(r"\bACT:\s*([^\n]*)")
+
 class Brain:
     def __init__(self, model_name="qwen2.5:3b", base_url="http://localhost:11434"):
         self.model_name = model_name
         self.base_url = f"{base_url}/api/generate"
         self.logger = logging.getLogger("Umbrasol.Brain")
+        self._client = None
+        self.last_stats = None  # Latency/throughput of the most recent call
+
+    def _get_client(self):
+        """One long-lived pooled client: calls reuse the keep-alive connection to Ollama."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.BRAIN_READ_TIMEOUT, connect=settings.BRAIN_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=settings.BRAIN_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.BRAIN_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.BRAIN_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def warm(self):
+        """Loads the model into Ollama (an empty prompt generates nothing) so the next call skips the load."""
+        try:
+            response = await self._get_client().post(self.base_url, json={"model": self.model_name, "prompt": "", "stream": False})
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Warm-up failed: {e}")
+            return False
 
     async def think_stream(self, prompt, system_prompt="", temperature=0.7, max_tokens=300, format=None):
-        """Async streaming inference using httpx."""
+        """Async streaming inference over the pooled httpx client."""
         payload = {
             "model": self.model_name,
             "prompt": f"{system_prompt}\n{prompt}",
@@ -29,19 +66,47 @@ class Brain:
         if format:
             payload["format"] = format
 
+        start = time.perf_counter()
+        ttft = None
+        tokens = 0
+        final = {}
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                async with client.stream("POST", self.base_url, json=payload) as response:
-                    response.raise_for_status()
-                    async for line in response.aiter_lines():
-                        if line:
-                            chunk = json.loads(line)
-                            if chunk.get("done", False):
-                                break
-                            yield chunk.get("response", "")
+            async with self._get_client().stream("POST", self.base_url, json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        chunk = json.loads(line)
+                        if chunk.get("done", False):
+                            # Read to the end of the body so the connection goes back to the pool
+                            final = chunk
+                            continue
+                        if ttft is None:
+                            ttft = time.perf_counter() - start
+                        tokens += 1
+                        yield chunk.get("response", "")
         except Exception as e:
             self.logger.error(f"Brain Error: {e}")
             yield f"ERROR: {str(e)}"
+        finally:
+            self._record_stats(start, ttft, tokens, final)
+
+    def _record_stats(self, start, ttft, tokens, final):
+        """Time-to-first-token and tokens/sec for one call (Ollama's own eval timing when present)."""
+        total = time.perf_counter() - start
+        if final.get("eval_count") and final.get("eval_duration"):
+            tokens = final["eval_count"]
+            tps = tokens / (final["eval_duration"] / 1e9)
+        else:
+            generating = total - (ttft or 0.0)
+            tps = tokens / generating if tokens and generating > 0 else 0.0
+        self.last_stats = {
+            "model": self.model_name, "ttft": ttft, "total": total,
+            "tokens": tokens, "tokens_per_sec": round(tps, 2),
+        }
+        if ttft is not None:
+            tracer.record("llm.ttft", ttft, model=self.model_name)
+        tracer.record("llm.generate", total, model=self.model_name, tokens=tokens, tokens_per_sec=round(tps, 2))
+        self.logger.debug(f"LLM Stats: {self.last_stats}")
 
 class MonolithSoul:
     def __init__(self, override_model=None):
@@ -53,6 +118,12 @@ class MonolithSoul:
         self.safe_tools = settings.SAFE_TOOLS
         self.logger = logging.getLogger("Umbrasol.Soul")
 
+    async def close(self):
+        await self.monolith.close()
+
+    async def warm(self):
+        return await self.monolith.warm()
+
     async def execute_task_stream(self, user_request, context=""):
         """Stream decision using THINK/SAY/ACT (Ultra-Resilient Protocol)."""
         system_name = getattr(settings, "SYSTEM_NAME", "Umbrasol")
@@ -66,124 +137,52 @@ class MonolithSoul:
             "Format:\nTHINK: [Logic]\nACT: tool,query"
         )
 
-        full_response = ""
-        last_emitted_pos = 0
-        current_type = None
-
-        async for chunk in self.monolith.think_stream(prompt, system_prompt=identity, temperature=0.1, max_tokens=600):
-            full_response += chunk
-            
-            lines = full_response.splitlines()
-            if not lines: continue
-            last_line = lines[-1].strip()
-            
-            if last_line.startswith("THINK:") and current_type != "reasoning":
-                current_type = "reasoning"
-                last_emitted_pos = full_response.rfind("THINK:") + 6
-            elif last_line.startswith("SAY:") and current_type != "talk":
-                current_type = "talk"
-                last_emitted_pos = full_response.rfind("SAY:") + 4
-            elif last_line.startswith("ACT:") and current_type != "action":
-                current_type = "action"
-                last_emitted_pos = full_response.rfind("ACT:")
-                break
-
-            if current_type in ["talk", "reasoning"]:
-                content_chunk = full_response[last_emitted_pos:]
-                if not any(f"\n{p}:" in content_chunk for p in ["SAY", "ACT", "THINK"]):
-                    if content_chunk:
-                        yield {"type": current_type, "content": content_chunk}
-                        last_emitted_pos = len(full_response)
+        parser = ThoughtStreamParser()
+        act_lines = []
+        actions = []
+
+        # aclosing: stopping after the ACT block returns the pooled connection immediately
+        async with aclosing(self.monolith.think_stream(prompt, system_prompt=identity, temperature=0.1, max_tokens=600)) as stream:
+            async for chunk in stream:
+                for event in parser.feed(chunk):
+                    if event["type"] != "act":
+                        yield event
+                        continue
+                    # Each complete ACT line is parsed at once so the core can start it early
+                    act_lines.append(event["raw"])
+                    action = self._parse_act_line(event["raw"])
+                    if action:
+                        actions.append(action)
+                        yield {"type": "early_action", "action": action}
+                if parser.closed:
+                    break
+        for event in parser.finish():
+            if event["type"] == "act":
+                act_lines.append(event["raw"])
+                action = self._parse_act_line(event["raw"])
+                if action:
+                    actions.append(action)
+            else:
+                yield event
+        full_response = parser.text
 
         # ROBUST ACT PARSING
-        import re
-        # Look for ACT: or holistic scan for keywords if ACT: is missing
-        ACT_PATTERN = re.compile(r"ACT:?\s*(.*)", re.IGNORECASE)
-        actions = []
-        
-        TOOL_MAP = {
-            "net": ["net", "search", "web", "internet", "google", "ddg", "search for", "online", "price of"],
-            "stats": ["stats", "load", "ram", "cpu", "system", "vitals", "memory"],
-            "ls": ["ls", "list", "files", "dir"],
-            "shell": ["shell", "terminal", "bash", "cmd"],
-            "see_active": ["active", "window"]
-        }
+        # Inline "ACT:" (not at a line start) is still honoured if no ACT line was found
+        if not act_lines:
+            act_lines = [m.group(1) for m in INLINE_ACT_PATTERN.finditer(full_response)]
+            actions = [a for a in map(self._parse_act_line, act_lines) if a]
 
-        # First pass: Look for explicit ACT: tags
-        found_explicit = False
-        for match in ACT_PATTERN.finditer(full_response):
-            raw = match.group(1).strip().split("SAY:")[0].split("\n")[0]
-            if not raw or len(raw) < 2: continue # Ignore noise
-            found_explicit = True
-            self._add_action(actions, raw, TOOL_MAP)
-
-        # Second pass: If NO explicit actions found, scan the REASONING chunks for intent
-        if not found_explicit:
-            detected_intents = []
-            for tool_name, kws in TOOL_MAP.items():
-                if any(kw in full_response.lower() for kw in kws):
-                    detected_intents.append(tool_name)
-            
-            for tool_name in detected_intents:
-                # Use the user request as base
-                query = user_request
-                
-                # CROSS-TOOL STRIPPING: Remove mentions of OTHER tools to focus this query
-                for other_tool, other_kws in TOOL_MAP.items():
-                    if other_tool == tool_name: continue
-                    for okw in other_kws:
-                        # Remove "and check RAM", "list files in core", etc.
-                        query = re.sub(rf"(?:and|also|then|finally|,)?\s*(?:check|run|use|list|search|tell me)?\s*\b{re.escape(okw)}\b.*?(?:and|also|then|finally|,|$)", "", query, flags=re.IGNORECASE).strip()
-                
-                # TOOL-SPECIFIC HARDENING
-                if tool_name == "ls":
-                    # If looking for a directory, try to isolate it
-                    match = re.search(r"(?:in|of)\s+['\"]?([\w/.-]+)['\"]?", query)
-                    if match: query = match.group(1)
-                elif tool_name == "net":
-                    # Strip common net prefixes
-                    query = re.sub(r"^(search|check|find|tell me|what is|how is)\s+(?:for|about|the)?\s*", "", query, flags=re.IGNORECASE)
-                
-                actions.append({"tool": tool_name, "cmd": query})
+        # If NO explicit ACT line, scan the response for tool intent
+        if not act_lines:
+            actions = extractor.from_request(user_request, full_response)
 
         if actions:
             yield {"type": "action", "actions": actions}
 
-    def _add_action(self, actions, raw, tool_map):
-        import re
-        found_t = None
-        for tool_name, kws in tool_map.items():
-            if any(k in raw.lower() for k in kws):
-                found_t = tool_name
-                break
-        
-        if not found_t: found_t = "stats"
-        
-        if "," in raw:
-            query = raw.split(",", 1)[1].strip()
-        else:
-            query = raw
-            search_space = tool_map.get(found_t, []) + [found_t]
-            for kw in sorted(search_space, key=len, reverse=True):
-                if kw.lower() in query.lower():
-                    query = re.sub(rf".*?\b{re.escape(kw)}\b[:\s]*", "", query, count=1, flags=re.IGNORECASE)
-                    break
-        
-        # ADVANCED QUERY STRIPPING
-        query = query.strip().strip('"').strip("'").strip("()").strip("[]")
-        # Strip prepositional phrases and filler
-        fillers = [
-            r"^(in|for|using|searching|querying|about|the|a)\s+",
-            r"^the\s+files?\s+in\s+the\s+",
-            r"^the\s+directory\s+",
-            r"\s+directory\.?$",
-            r"\s+folder\.?$"
-        ]
-        for f in fillers:
-            query = re.sub(f, "", query, flags=re.IGNORECASE).strip()
-            
-        if query:
-            actions.append({"tool": found_t, "cmd": query})
+    def _parse_act_line(self, raw):
+        raw = raw.strip().split("SAY:")[0]
+        if not raw or len(raw) < 2: return None # Ignore noise
+        return extractor.parse_act(raw)
 
     async def synthesis_stream(self, user_request, tool_results):
         """Pure conversational synthesis."""
@@ -191,8 +190,15 @@ class MonolithSoul:
         identity = f"Identity: {system_name}, Synthesizer."
         prompt = f"User: {user_request}\nResults: {tool_results}\n\nSAY: [Your summary]"
 
+        started = False
         async for chunk in self.monolith.think_stream(prompt, system_prompt=identity, temperature=0.3, max_tokens=500):
-            yield {"type": "talk", "content": chunk.replace("SAY:", "").strip()}
+            # Keep the spaces between tokens; only the leading tag and whitespace go
+            content = chunk.replace("SAY:", "")
+            if not started:
+                content = content.lstrip()
+                started = bool(content)
+            if content:
+                yield {"type": "talk", "content": content}
 
     async def execute_task(self, user_request, context=""):
         """Non-streaming wrapper."""
@@ -1,19 +1,270 @@
+import os
+import re
+import json
+import time
+import asyncio
 import hashlib
+import logging
+from collections import OrderedDict
+from config import settings
+from core.intent import ARGUMENT_TOOLS
 from core.omega_memory import OmegaMemory
+from core.semantic_index import HashedNgramEmbedder, VectorIndex, NUMPY_AVAILABLE
+
+def context_dimensions(user_request, tool=None):
+    """Context dimensions ("app", "cwd", "slot") the meaning of (request, tool) depends on."""
+    dims = set(settings.CACHE_CONTEXT_TOOLS.get(tool, ()))
+    for word in re.findall(r"[a-z']+", user_request.lower()):
+        dims.update(settings.CACHE_CONTEXT_WORDS.get(word, ()))
+    return tuple(sorted(dims))
 
 class SemanticCache:
-    def __init__(self, memory=None):
+    """
+    Layer 3: Semantic Cache.
+    Tier 1 is an exact md5 of the normalised request. Tier 2 embeds the
+    request (hashed word + trigram features) and takes the nearest cached
+    request when its cosine similarity reaches CACHE_SIMILARITY_THRESHOLD,
+    so "check the battery" answers "battery status?". A paraphrase only
+    reuses an argument tool's command (net/ls/shell) when every word of
+    that command appears in the new request - "weather in paris" never
+    answers "weather in london".
+
+    In front of both sits a bounded in-process LRU of exact entries, so a
+    repeated request never leaves the event loop. Writes go through to the
+    table. Hits are counted in memory and written back in batches
+    (hits, last_hit). Entries unused for CACHE_TTL expire, and every
+    CACHE_PRUNE_INTERVAL new entries the table is cut back to the
+    CACHE_MAX_ROWS most recently used.
+
+    An entry can be bound to the context it was learned in. The bound
+    dimensions are app, cwd or time slot. They come from the tool
+    (CACHE_CONTEXT_TOOLS: ls/shell take relative paths) and from the
+    request's wording (CACHE_CONTEXT_WORDS, e.g. "close this"). The bound
+    values are part of the entry's hash. A lookup hashes the request with
+    every dimension set an entry could carry, then matches all candidates
+    in one query, most specific first. A request whose context matters is
+    therefore only answered by an entry learned in the same context.
+    """
+    def __init__(self, memory=None, threshold=None, index_path=None, max_entries=None, ttl=None):
         self.memory = memory or OmegaMemory()
+        self.threshold = settings.CACHE_SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.max_entries = settings.CACHE_LRU_SIZE if max_entries is None else max_entries
+        self.ttl = settings.CACHE_TTL if ttl is None else ttl
+        self.logger = logging.getLogger("Umbrasol.Cache")
+        self.embedder = HashedNgramEmbedder() if NUMPY_AVAILABLE and settings.CACHE_SEMANTIC_ENABLED else None
+        self.index_path = index_path or f"{os.path.splitext(self.memory.db_path)[0]}.vectors.npz"
+        self.index = None
+        self._index_lock = asyncio.Lock()
+        self._tool_dims = {()} | {tuple(sorted(dims)) for dims in settings.CACHE_CONTEXT_TOOLS.values()}
+        self._lru = OrderedDict()  # hash -> (entry, last used as wall-clock time)
+        self._touched = {}  # hash -> hits not yet written to the table
+        self._added = 0  # New entries since the last prune
+        self.lru_hits = 0
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.pruned = 0
+
+    def _hash(self, text, bound=None):
+        key = text.lower().strip()
+        if bound:
+            key += "\n" + json.dumps(bound, sort_keys=True)
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def dimensions(self, user_request, tool=None):
+        """Context dimensions an entry for (request, tool) depends on."""
+        return context_dimensions(user_request, tool)
+
+    def stats(self):
+        hits = self.lru_hits + self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "lookups": lookups,
+            "lru_hits": self.lru_hits,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "pruned": self.pruned,
+            "lru_entries": len(self._lru),
+            "entries": len(self.index) if self.index is not None else None,
+        }
+
+    async def get(self, user_request, context=None):
+        """
+        Returns the command if it exists in cache (exactly, or as a close
+        paraphrase) for this `context` ({"app", "cwd", "slot"} values).
+        """
+        keys = self._candidates(user_request, context)
+        for key in keys:
+            hit = self._lru_get(key)
+            if hit:
+                self.lru_hits += 1
+                await self._touch(key)
+                return self._public(hit)
+        found = await self.memory.find_cache(keys, max_age=self.ttl) if keys else {}
+        for key in keys:
+            if key in found:
+                self.exact_hits += 1
+                self._lru_put(key, found[key])
+                await self._touch(key)
+                return self._public(found[key])
+        if self.embedder:
+            hit = await self._nearest(user_request, context)
+            if hit:
+                self.semantic_hits += 1
+                return self._public(hit)
+        self.misses += 1
+        return None
+
+    async def set(self, user_request, tool, command, context=None):
+        """Stores a successful command mapping (write-through), bound to the context it depends on."""
+        bound = self._bind(self.dimensions(user_request, tool), context)
+        if bound is None:
+            self.logger.debug(f"Not caching '{user_request}': its context is unknown")
+            return
+        req_hash = self._hash(user_request, bound)
+        await self.memory.set_cache(req_hash, tool, command, request=user_request, context=bound)
+        self._lru_put(req_hash, {"tool": tool, "command": command, "context": bound or None})
+        if self.embedder:
+            index = await self._load_index()
+            index.add(req_hash, self.embedder.embed(user_request))
+        self._added += 1
+        if self._added >= settings.CACHE_PRUNE_INTERVAL:
+            await self.prune()
+
+    async def prune(self):
+        """Expires idle table rows, cuts the table to CACHE_MAX_ROWS and forgets them in process too."""
+        self._added = 0
+        await self._write_touches()
+        removed = await self.memory.prune_cache(settings.CACHE_MAX_ROWS, self.ttl)
+        for req_hash in removed:
+            self._lru.pop(req_hash, None)
+            if self.index is not None:
+                self.index.remove(req_hash)
+        self.pruned += len(removed)
+        if removed:
+            self.logger.info(f"Pruned {len(removed)} cache entries")
+        return len(removed)
+
+    async def close(self):
+        """Writes back pending hit counts and persists the vector index if it changed."""
+        await self._write_touches()
+        if self.index is not None and self.index.dirty:
+            await asyncio.to_thread(self.index.save)
+
+    # --- context binding ---
+
+    @staticmethod
+    def _bind(dims, context):
+        """{dimension: value} for `dims`, or None when the context lacks one of them."""
+        context = context or {}
+        if any(context.get(dim) is None for dim in dims):
+            return None
+        return {dim: context[dim] for dim in dims}
+
+    def _candidates(self, user_request, context):
+        """Hashes an entry for this request could be stored under in this context, most specific first."""
+        wording = set(self.dimensions(user_request))
+        combos = {tuple(sorted(wording | set(dims))) for dims in self._tool_dims}
+        keys = []
+        for dims in sorted(combos, key=len, reverse=True):
+            bound = self._bind(dims, context)
+            if bound is not None:
+                keys.append(self._hash(user_request, bound))
+        return keys
+
+    def _context_matches(self, user_request, hit, context):
+        """A paraphrase hit must be bound to every dimension the new wording needs, with today's values."""
+        bound = hit.get("context") or {}
+        if not set(self.dimensions(user_request)) <= set(bound):
+            return False
+        return all((context or {}).get(dim) == value for dim, value in bound.items())
+
+    @staticmethod
+    def _public(hit):
+        return {"tool": hit["tool"], "command": hit["command"]}
+
+    # --- in-process tier ---
+
+    def _lru_get(self, req_hash):
+        entry = self._lru.get(req_hash)
+        if entry is None:
+            return None
+        hit, last_used = entry
+        now = time.time()
+        if now - last_used > self.ttl:
+            del self._lru[req_hash]
+            self.expired += 1
+            return None
+        self._lru[req_hash] = (hit, now)
+        self._lru.move_to_end(req_hash)
+        return dict(hit)
+
+    def _lru_put(self, req_hash, hit):
+        if self.max_entries <= 0:
+            return
+        self._lru[req_hash] = (dict(hit), time.time())
+        self._lru.move_to_end(req_hash)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+            self.evictions += 1
+
+    async def _touch(self, req_hash):
+        self._touched[req_hash] = self._touched.get(req_hash, 0) + 1
+        if len(self._touched) >= settings.MEMORY_COMMIT_BATCH:
+            await self._write_touches()
+
+    async def _write_touches(self):
+        if self._touched:
+            touched, self._touched = self._touched, {}
+            await self.memory.touch_cache(touched)
+
+    # --- semantic tier ---
+
+    async def _nearest(self, user_request, context):
+        vec = self.embedder.embed(user_request)
+        index = await self._load_index()
+        if len(index) >= settings.CACHE_THREAD_ROWS:
+            key, similarity = await asyncio.to_thread(index.nearest, vec)
+        else:
+            key, similarity = index.nearest(vec)
+        if key is None or similarity < self.threshold:
+            return None
+        hit = self._lru_get(key) or (await self.memory.find_cache([key], max_age=self.ttl)).get(key)
+        if not hit or not self._arguments_match(hit, user_request) or not self._context_matches(user_request, hit, context):
+            return None
+        await self._touch(key)
+        self.logger.debug(f"Semantic hit {similarity:.2f}: '{user_request}' -> {hit['tool']}({hit['command']})")
+        return hit
 
-    def _hash(self, text):
-        return hashlib.md5(text.lower().strip().encode()).hexdigest()
+    def _arguments_match(self, hit, user_request):
+        if hit["tool"] not in ARGUMENT_TOOLS:
+            return True
+        words = {w for w in self.embedder.tokens(hit["command"] or "") if w.strip("./")}
+        return words <= set(self.embedder.tokens(user_request))
 
-    async def get(self, user_request):
-        """Returns the command if it exists in cache."""
-        req_hash = self._hash(user_request)
-        return await self.memory.get_cache(req_hash)
+    async def _load_index(self):
+        """The persisted index, rebuilt from semantic_cache when missing or out of step with it."""
+        if self.index is not None:
+            return self.index
+        async with self._index_lock:
+            if self.index is None:
+                index = VectorIndex(self.embedder.dim, self.index_path)
+                loaded = await asyncio.to_thread(index.load)
+                if not loaded or len(index) != await self.memory.count_cache_requests():
+                    start = time.perf_counter()
+                    index = await asyncio.to_thread(self._build, await self.memory.get_cache_requests())
+                    self.logger.info(f"Rebuilt vector index: {len(index)} entries in {time.perf_counter() - start:.2f}s")
+                self.index = index
+        return self.index
 
-    async def set(self, user_request, tool, command):
-        """Stores a successful command mapping."""
-        req_hash = self._hash(user_request)
-        await self.memory.set_cache(req_hash, tool, command)
+    def _build(self, rows):
+        index = VectorIndex(self.embedder.dim, self.index_path)
+        for key, request in rows:
+            index.add(key, self.embedder.embed(request))
+        return index
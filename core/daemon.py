@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import asyncio
+import logging
+from config import settings
+
+class RequestLost(Exception):
+    """The daemon took a request and then went away: it may have run part of it, so it must not be retried."""
+
+class UmbrasolDaemon:
+    """
+    Resident Mode: keeps one warm UmbrasolCore alive and serves requests over a
+    Unix domain socket. The wire protocol is newline-delimited JSON: the client
+    sends {"request": "...", "cwd": "..."} and receives the same talk/reasoning/action/result/output
+    events the core produces, terminated by a {"type": "done"} event. The
+    request runs in the client's working directory (ls, shell, snapshots and
+    the cache's cwd dimension), not the daemon's.
+    """
+    def __init__(self, core, socket_path=None):
+        self.core = core
+        self.socket_path = socket_path or settings.DAEMON_SOCKET_PATH
+        self.logger = logging.getLogger("Umbrasol.Daemon")
+        self._server = None
+
+    async def _is_stale(self):
+        """A socket file with nobody listening is a leftover from a crash."""
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_unix_connection(self.socket_path), timeout=settings.DAEMON_CONNECT_TIMEOUT
+            )
+            writer.close()
+            return False
+        except (OSError, asyncio.TimeoutError):
+            return True
+
+    async def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            if not await self._is_stale():
+                raise RuntimeError(f"Daemon already running on {self.socket_path}")
+            os.remove(self.socket_path)
+
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=self.socket_path, limit=settings.DAEMON_MAX_MESSAGE_BYTES
+        )
+        os.chmod(self.socket_path, 0o600)  # Local user only
+        print(f"[DAEMON] Serving on {self.socket_path}")
+        self.logger.info(f"Daemon ONLINE at {self.socket_path}")
+
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    async def _handle_client(self, reader, writer):
+        async def send(event):
+            writer.write((json.dumps(event, default=str) + "\n").encode())
+            await writer.drain()
+
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                await send({"type": "error", "content": "Malformed request"})
+                return
+
+            if message.get("op") == "ping":
+                await send({"type": "pong", "version": settings.VERSION})
+                return
+
+            if message.get("op") == "metrics":
+                await send({"type": "metrics", "prefetch": self.core.prefetch.stats(), "cache": self.core.cache.stats()})
+                return
+
+            request = str(message.get("request", "")).strip()
+            if not request:
+                await send({"type": "error", "content": "Empty request"})
+                return
+
+            cwd = message.get("cwd")
+            if not (isinstance(cwd, str) and os.path.isabs(cwd) and os.path.isdir(cwd)):
+                await send({"type": "error", "content": f"Bad working directory: {cwd!r}"})
+                return
+
+            result = await self.core.execute(request, listener=send, cwd=cwd)
+            await send({"type": "done", "result": result})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.logger.info("Client disconnected mid-request")
+        except Exception as e:
+            self.logger.error(f"Daemon Error: {e}")
+            try:
+                await send({"type": "error", "content": str(e)})
+            except Exception:
+                pass
+        finally:
+            writer.close()
+
+class UmbrasolClient:
+    """Thin client for the resident daemon. Imports nothing heavy on purpose."""
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or settings.DAEMON_SOCKET_PATH
+
+    def is_available(self):
+        return os.path.exists(self.socket_path)
+
+    async def _connect(self):
+        return await asyncio.wait_for(
+            asyncio.open_unix_connection(self.socket_path, limit=settings.DAEMON_MAX_MESSAGE_BYTES),
+            timeout=settings.DAEMON_CONNECT_TIMEOUT
+        )
+
+    async def ping(self):
+        reader, writer = await self._connect()
+        try:
+            writer.write(b'{"op": "ping"}\n')
+            await writer.drain()
+            return json.loads(await reader.readline())
+        finally:
+            writer.close()
+
+    async def metrics(self):
+        reader, writer = await self._connect()
+        try:
+            writer.write(b'{"op": "metrics"}\n')
+            await writer.drain()
+            return json.loads(await reader.readline())
+        finally:
+            writer.close()
+
+    async def stream(self, request, cwd=None):
+        """
+        Yields the core's events for one request (run in `cwd`, ours by
+        default), ending with 'done'. Connecting or sending fails with
+        OSError (nothing ran); losing the daemon after that raises RequestLost.
+        """
+        reader, writer = await self._connect()
+        try:
+            writer.write((json.dumps({"request": request, "cwd": cwd or os.getcwd()}) + "\n").encode())
+            await writer.drain()
+            while True:
+                try:
+                    line = await reader.readline()
+                    if not line:
+                        raise ConnectionError("Daemon closed the connection")
+                    event = json.loads(line)
+                except (OSError, ValueError) as e:  # Reset, EOF, truncated or oversized line
+                    raise RequestLost(f"Lost the daemon mid-request: {e}") from e
+                yield event
+                if event.get("type") in ("done", "error"):
+                    break
+        finally:
+            writer.close()
+
+    async def execute(self, request, cwd=None):
+        """Mirrors the in-process CLI output, returning the final result."""
+        in_thinking = False
+        async for event in self.stream(request, cwd=cwd):
+            etype = event.get("type")
+            if etype == "talk":
+                sys.stdout.write(event["content"])
+                sys.stdout.flush()
+            elif etype == "reasoning":
+                if not in_thinking:
+                    sys.stdout.write("\n[Thinking]: ")
+                    in_thinking = True
+                sys.stdout.write(f"{event['content']} ")
+                sys.stdout.flush()
+            elif etype == "result":
+                print(f"\n[Result]: {event['content'][:200]}")
+            elif etype == "error":
+                return f"ERROR: {event['content']}"
+            elif etype == "done":
+                return event.get("result")
+        return None
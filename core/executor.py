@@ -0,0 +1,184 @@
+import asyncio
+import logging
+from contextlib import nullcontext
+from config import settings
+from core.tracing import tracer
+from core.negative_cache import classify, DETERMINISTIC
+
+class ActionExecutor:
+    """
+    Layer 6: Plan Execution.
+    Turns the brain's flat action list into ordered stages. Consecutive
+    read-only, low-risk actions share a stage and run concurrently; anything
+    that can change the system (shell, risky commands, unknown tools) is a
+    barrier that runs alone, in the order the brain emitted it.
+    """
+    def __init__(self, dispatch, safety, memory, cwd=None):
+        self.dispatch = dispatch  # async (tool, cmd) -> result
+        self.safety = safety
+        self.memory = memory
+        self.cwd = cwd  # async () -> the directory actions run in (None: the process cwd)
+        self.logger = logging.getLogger("Umbrasol.Executor")
+
+    def is_parallel_safe(self, action, risk="LOW"):
+        return action.get("tool") in settings.PARALLEL_SAFE_TOOLS and risk == "LOW"
+
+    def plan(self, actions):
+        """Returns a list of stages; each stage is a list of (action, risk) pairs."""
+        stages = []
+        group = []
+        for action in actions:
+            risk = self.safety.analyze_risk(f"{action.get('tool', 'stats')} {action.get('cmd', '')}")
+            if self.is_parallel_safe(action, risk):
+                group.append((action, risk))
+                continue
+            if group:
+                stages.append(group)
+                group = []
+            stages.append([(action, risk)])
+        if group:
+            stages.append(group)
+        return stages
+
+    async def run(self, actions, task_id, on_result=None, speculation=None, known_failures=None):
+        """
+        Executes the plan. Stops at the first failed stage, since later stages
+        may depend on it. Returns (success, results) where results holds one
+        {"tool", "cmd", "result", "success"} dict per executed action, in
+        plan order. With a SpeculativeDispatch, actions it already started
+        while the model was streaming reuse that call instead of dispatching
+        again. `known_failures` ({(tool, cmd): entry} from the NegativeCache)
+        fails known-deterministic actions without dispatching them and
+        gives other known-bad ones a single attempt.
+        """
+        stages = self.plan(actions)
+        if len(actions) > 1:
+            print(f"[PLAN] {len(actions)} actions in {len(stages)} stage(s)")
+
+        results = []
+        for stage in stages:
+            if len(stage) == 1:
+                outcomes = [await self._run_action(*stage[0], task_id, on_result, speculation, known_failures)]
+            else:
+                outcomes = await asyncio.gather(
+                    *(self._run_action(action, risk, task_id, on_result, speculation, known_failures)
+                      for action, risk in stage)
+                )
+            results.extend(outcomes)
+            if not all(o["success"] for o in outcomes):
+                return False, results
+        return True, results
+
+    async def _run_action(self, action, risk, task_id, on_result, speculation=None, known_failures=None):
+        tool = action.get("tool", "stats")
+        cmd = action.get("cmd", "")
+        known = (known_failures or {}).get((tool, str(cmd)))
+        if known and known["error_class"] in DETERMINISTIC:
+            # Not taken: a speculative call for it is cancelled with the rest by discard()
+            print(f"[Result]: {known['message'][:200]} (known failure)")
+            if on_result:
+                await on_result(tool, cmd, known["message"])
+            return {"tool": tool, "cmd": cmd, "result": known["message"], "success": False}
+        early = speculation.take(action) if speculation else None
+
+        # Safety Guards
+        if risk != "LOW":
+            print(f"[SAFETY] {risk} Risk Detected!")
+            if risk in ["MEDIUM", "HIGH"]:
+                await self.safety.snapshot_async(cmd, cwd=await self.cwd() if self.cwd else None)
+
+        # Self-Correction Loop
+        result = None
+        retries = 0 if known else settings.MAX_RETRIES  # It failed recently: one try is enough
+        for attempt in range(retries + 1):
+            if attempt > 0:
+                print(f"[AUTO-FIX] Retrying {tool}...")
+            # Retries get their own span (backoff included) so their cost is visible
+            with tracer.span("retry", tool=tool, attempt=attempt) if attempt > 0 else nullcontext():
+                if attempt > 0:
+                    await asyncio.sleep(1)  # Simple backoff
+                # A barrier action may change the system: its checkpoint must survive a crash mid-command
+                await self.memory.update_task_checkpoint(task_id, "running", {"stage": "executing", "tool": tool, "cmd": cmd},
+                                                         durable=not self.is_parallel_safe(action, risk))
+
+                if early is not None and attempt == 0:
+                    result = await early  # Started while the model was still streaming
+                else:
+                    result = await self.dispatch(tool, cmd)
+                res_str = str(result)
+                print(f"[Result]: {res_str[:200]}")
+                if on_result:
+                    await on_result(tool, cmd, res_str)
+
+            error_class = classify(res_str)
+            if error_class is None:
+                return {"tool": tool, "cmd": cmd, "result": result, "success": True}
+            if error_class in DETERMINISTIC:
+                break  # Retrying an unknown tool or a blocked command cannot help
+
+        return {"tool": tool, "cmd": cmd, "result": result, "success": False}
+
+    @staticmethod
+    def format_results(results):
+        """Flattens every action result into the text handed to synthesis."""
+        if len(results) == 1:
+            return results[0]["result"]
+        return "\n".join(f"[{(r['tool'] + ' ' + str(r['cmd'])).strip()}]: {r['result']}" for r in results)
+
+class SpeculativeDispatch:
+    """
+    Layer 6a: Speculative Dispatch.
+    Starts complete ACT lines while the model is still generating. Only
+    read-only tools (SPECULATIVE_TOOLS) that OmegaSafety rates LOW qualify,
+    and only until the first action that does not: anything after a barrier
+    may depend on it, so it waits for the executor. take() hands a started
+    call to the executor; discard() cancels whatever the final plan did not
+    claim (the stream contradicted it or the plan stopped early).
+    """
+    def __init__(self, dispatch, safety, tools=None):
+        self.dispatch = dispatch  # async (tool, cmd) -> result
+        self.safety = safety
+        self.tools = settings.SPECULATIVE_TOOLS if tools is None else tools
+        self.logger = logging.getLogger("Umbrasol.Speculation")
+        self._pending = {}
+        self._blocked = False
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+
+    @staticmethod
+    def _key(action):
+        return (action.get("tool", "stats"), action.get("cmd", ""))
+
+    def offer(self, action):
+        """Starts `action` now if it is safe to run ahead of the plan. Returns True if it did."""
+        if self._blocked:
+            return False
+        tool, cmd = self._key(action)
+        if tool not in self.tools or self.safety.analyze_risk(f"{tool} {cmd}") != "LOW":
+            self._blocked = True
+            return False
+        if (tool, cmd) in self._pending:
+            return False
+        self._pending[(tool, cmd)] = asyncio.create_task(self.dispatch(tool, cmd))
+        self.started += 1
+        self.logger.debug(f"Speculative start: {tool}({cmd})")
+        return True
+
+    def take(self, action):
+        """The started call for `action` (an awaitable task), or None."""
+        task = self._pending.pop(self._key(action), None)
+        if task is not None:
+            self.used += 1
+        return task
+
+    async def discard(self):
+        """Cancels every call the final plan did not take; returns how many there were."""
+        pending, self._pending = list(self._pending.values()), {}
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.discarded += len(pending)
+            self.logger.info(f"Discarded {len(pending)} speculative call(s)")
+        return len(pending)
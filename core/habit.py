@@ -1,15 +1,20 @@
 import os
 import time
 from datetime import datetime
+from config import settings
 from core.omega_memory import OmegaMemory
 
 class HabitManager:
     """
     Layer 4: Habit Modeling (Subconscious Loop).
-    Learns user patterns based on Time of Day + Active Context.
+    Learns user patterns based on Time of Day + Active Context. Scores decay
+    exponentially (HABIT_HALF_LIFE_DAYS), so last month's routine fades in
+    favour of this week's. On top of the per-slot frequencies, a first-order
+    Markov chain per app remembers which command tends to follow which.
     """
     def __init__(self, memory=None):
         self.memory = memory or OmegaMemory()
+        self._last_command = {}  # app -> most recent learned command (Markov state)
 
     def _get_time_slot(self):
         """Returns: Morning, Afternoon, Evening, Night"""
@@ -19,37 +24,46 @@ class HabitManager:
         elif 17 <= h < 22: return "Evening"
         else: return "Night"
 
-    async def learn(self, active_window, command):
-        """Records a habit: When [Time] in [App] -> User did [Command]."""
-        slot = self._get_time_slot()
-        app_name = "Unknown"
-        if active_window:
-             parts = active_window.split("-")
-             app_name = parts[-1].strip() if len(parts) > 1 else str(active_window)[:20]
-        
-        context_key = f"{slot}|{app_name}"
-        habits = await self.memory.get_habit(context_key)
-        
-        cmd_key = str(command)
-        habits[cmd_key] = habits.get(cmd_key, 0) + 1
-        await self.memory.save_habit(context_key, habits)
-
-    async def predict(self, active_window, threshold=3):
-        """Returns a likely command if confidence > threshold."""
-        slot = self._get_time_slot()
+    def _get_app(self, active_window):
         app_name = "Unknown"
         if active_window:
              parts = active_window.split("-")
              app_name = parts[-1].strip() if len(parts) > 1 else str(active_window)[:20]
+        return app_name
+
+    def context(self, active_window):
+        """The (time slot, app) a request happens in, as cache context dimensions."""
+        return {"slot": self._get_time_slot(), "app": self._get_app(active_window)}
+
+    async def learn(self, active_window, command, now=None):
+        """Records a habit: When [Time] in [App] -> User did [Command] (after [Previous])."""
+        app_name = self._get_app(active_window)
+        context_key = f"{self._get_time_slot()}|{app_name}"
+        command = str(command)
+        await self.memory.increment_habit(context_key, command, now=now)
+
+        previous = self._last_command.get(app_name)
+        if previous is not None:
+            await self.memory.record_transition(app_name, previous, command, now=now)
+        self._last_command[app_name] = command
+
+    async def predict(self, active_window, threshold=None, now=None):
+        """
+        Returns (command, decayed score) when the score reaches `threshold`,
+        else (None, 0). What usually follows the last command in this app
+        wins over the plain time-slot favourite.
+        """
+        threshold = settings.HABIT_MIN_SCORE if threshold is None else threshold
+        app_name = self._get_app(active_window)
+
+        previous = self._last_command.get(app_name)
+        if previous is not None:
+            nxt = await self.memory.top_transition(app_name, previous, now=now)
+            if nxt and nxt[1] >= threshold:
+                return nxt
+
+        top = await self.memory.top_habit(f"{self._get_time_slot()}|{app_name}", now=now)
+        if top and top[1] >= threshold:
+            return top
 
-        context_key = f"{slot}|{app_name}"
-        habits = await self.memory.get_habit(context_key)
-        
-        if habits:
-            best_cmd = max(habits, key=habits.get)
-            count = habits[best_cmd]
-            
-            if count >= threshold:
-                return best_cmd, count
-        
         return None, 0
@@ -0,0 +1,144 @@
+import re
+
+# Tool -> words that signal it (longest phrases are tried first)
+TOOL_KEYWORDS = {
+    "net": ["net", "search", "web", "internet", "google", "ddg", "search for", "online", "price of"],
+    "stats": ["stats", "load", "ram", "cpu", "system", "vitals", "memory"],
+    "ls": ["ls", "list", "files", "dir"],
+    "shell": ["shell", "terminal", "bash", "cmd"],
+    "see_active": ["active", "window"],
+}
+
+# Tools whose command is a real argument; the rest ignore it
+ARGUMENT_TOOLS = {"net", "ls", "shell"}
+
+def _alternation(words):
+    return "|".join(re.escape(w) for w in sorted(set(words), key=len, reverse=True))
+
+# --- Compiled once at import ---
+
+# One scan finds every tool mention; the named group tells which tool
+_TOOL_SCAN = re.compile(
+    "|".join(rf"(?P<{tool}>\b(?:{_alternation(kws + [tool])})\b)" for tool, kws in TOOL_KEYWORDS.items()),
+    re.IGNORECASE,
+)
+# Clauses that mention another tool ("and check RAM", "list files in core, ")
+_CLAUSE = r"(?:and|also|then|finally|,)?\s*(?:check|run|use|list|search|tell me)?\s*\b(?:{kws})\b.*?(?:and|also|then|finally|,|$)"
+_OTHER_TOOL_CLAUSES = {
+    tool: re.compile(
+        _CLAUSE.format(kws=_alternation([kw for other, kws in TOOL_KEYWORDS.items() if other != tool for kw in kws])),
+        re.IGNORECASE,
+    )
+    for tool in TOOL_KEYWORDS
+}
+# "<anything> <keyword>[:]" prefix of an ACT line without a comma, per tool
+_KEYWORD_PREFIX = {
+    tool: re.compile(rf"^.*?\b(?:{_alternation(kws + [tool])})\b[:\s]*", re.IGNORECASE)
+    for tool, kws in TOOL_KEYWORDS.items()
+}
+_FILLERS = re.compile(
+    r"^(?:(?:in|for|using|searching|querying|about|the|a)\s+|the\s+files?\s+in\s+the\s+|the\s+directory\s+)+"
+    r"|\s+(?:directory|folder)\.?$",
+    re.IGNORECASE,
+)
+_LS_PATH = re.compile(r"(?:\bin|\bof|\bunder|\binside)\s+(?:the\s+)?['\"]?([~\w/.-]+)['\"]?", re.IGNORECASE)
+_LS_NOISE = {"the", "my", "this", "current", "here", "directory", "folder", "dir", "files"}
+_NET_PREFIX = re.compile(
+    r"^(?:please\s+)?(?:search|check|find|look\s+up|google|tell\s+me|what\s+is|what's|how\s+is)\s+(?:for\s+|about\s+|the\s+)?",
+    re.IGNORECASE,
+)
+_NET_SUFFIX = re.compile(r"\s+(?:online|on\s+the\s+(?:web|internet)|on\s+google)\s*$", re.IGNORECASE)
+_SHELL_QUOTED = re.compile(r"`([^`]+)`")
+_SHELL_COMMAND = re.compile(r"\b(?:run|execute)\s+['\"]?([^'\"]+?)['\"]?\s*$", re.IGNORECASE)
+_WRAPPERS = "\"'()[]` "
+
+class IntentExtractor:
+    """
+    Layer 5b: Intent Extraction.
+    Turns ACT lines (and, when the model gave none, its reasoning text) into
+    {"tool", "cmd"} actions with precompiled patterns and deterministic slot
+    filling: ls gets a path (default "."), net gets a bare query, argument-free
+    tools get "".
+    """
+
+    def tools_in(self, text):
+        """Tools mentioned in `text`, in TOOL_KEYWORDS order, from one regex scan."""
+        found = {m.lastgroup for m in _TOOL_SCAN.finditer(text)}
+        return [tool for tool in TOOL_KEYWORDS if tool in found]
+
+    def parse_act(self, raw):
+        """One ACT line ("tool,query" or free text) -> action dict, or None."""
+        raw = raw.strip()
+        if "," in raw:
+            head, query = raw.split(",", 1)
+            tool = self._tool_named(head) or self._first_tool(raw) or "stats"
+        else:
+            tool = self._first_tool(raw) or "stats"
+            query = _KEYWORD_PREFIX[tool].sub("", raw, count=1)
+        query = self._clean(query)
+        if tool == "ls":
+            query = self._ls_path(query)
+        elif tool == "net":
+            query = self._net_query(query)
+        return self._action(tool, query)
+
+    def from_request(self, user_request, response_text):
+        """Fallback when no ACT line exists: tools mentioned in the response, slots from the request."""
+        actions = []
+        for tool in self.tools_in(response_text):
+            query = _OTHER_TOOL_CLAUSES[tool].sub("", user_request).strip()
+            if tool == "ls":
+                query = self._ls_path(query)
+            elif tool == "net":
+                query = self._net_query(query)
+            elif tool == "shell":
+                # A backticked command beats a trailing "run <cmd>"
+                match = _SHELL_QUOTED.search(query) or _SHELL_COMMAND.search(query)
+                query = match.group(1).strip() if match else ""
+            action = self._action(tool, query)
+            if action:
+                actions.append(action)
+        return actions
+
+    # --- slots ---
+
+    def _tool_named(self, head):
+        head = head.strip().strip(_WRAPPERS).lower()
+        if head in TOOL_KEYWORDS:
+            return head
+        tools = self.tools_in(head)
+        return tools[0] if tools else None
+
+    def _first_tool(self, text):
+        tools = self.tools_in(text)
+        return tools[0] if tools else None
+
+    def _clean(self, query):
+        query = query.strip().strip(_WRAPPERS)
+        return _FILLERS.sub("", query).strip()
+
+    def _ls_path(self, text):
+        """Directory slot: 'in/of/under X' wins, a bare single token is taken as is, else '.'."""
+        match = _LS_PATH.search(text)
+        if match and match.group(1).lower() not in _LS_NOISE:
+            return match.group(1).rstrip(".") or "."
+        text = text.strip()
+        if text and " " not in text and text.lower() not in _LS_NOISE:
+            return text
+        return "."
+
+    def _net_query(self, text):
+        text = _NET_PREFIX.sub("", text.strip())
+        return _NET_SUFFIX.sub("", text).strip(" ?.")
+
+    def _action(self, tool, query):
+        if tool not in ARGUMENT_TOOLS:
+            return {"tool": tool, "cmd": ""}
+        if tool == "ls":
+            return {"tool": tool, "cmd": query or "."}
+        if not query:
+            return None
+        return {"tool": tool, "cmd": query}
+
+# Shared, stateless extractor
+extractor = IntentExtractor()
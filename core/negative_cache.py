@@ -0,0 +1,83 @@
+import time
+import hashlib
+import logging
+from config import settings
+from core.omega_memory import OmegaMemory
+
+# Failures that come back the same however often the action is retried
+DETERMINISTIC = {"unknown_tool", "blocked", "unavailable"}
+
+def classify(result):
+    """Error class of a tool result, or None when it succeeded."""
+    text = str(result)
+    if "BLOCKED" in text:
+        return "unknown_tool" if text.startswith("BLOCKED: Tool") else "blocked"
+    if "ERROR" not in text:
+        return None
+    lowered = text.lower()
+    if any(word in lowered for word in ("offline", "timed out", "timeout", "temporarily")):
+        return "transient"
+    if any(word in lowered for word in ("missing", "not installed", "unsupported", "not found", "restricted", "denied")):
+        return "unavailable"
+    return "error"
+
+class NegativeCache:
+    """
+    Layer 3b: Failure Cache.
+    Remembers brain plans that failed for a request: (tool, cmd), the
+    error class and message, and how often, each for the class's
+    NEGATIVE_CACHE_TTL. On the next identical request the executor
+    answers a known deterministic failure (unknown tool, blocked,
+    unavailable) at once instead of dispatching and retrying it, the brain
+    is told which plans to avoid, and once a request has failed
+    deterministically NEGATIVE_CACHE_ANSWER_AFTER times it is answered
+    without inference. A later success clears the request's entries.
+    """
+    def __init__(self, memory=None):
+        self.memory = memory or OmegaMemory()
+        self.logger = logging.getLogger("Umbrasol.NegativeCache")
+        self.hits = 0
+
+    def _hash(self, text):
+        return hashlib.md5(text.lower().strip().encode()).hexdigest()
+
+    async def get(self, user_request, now=None):
+        """{(tool, cmd): {"error_class", "message", "failures"}} of unexpired failures for this request."""
+        if not settings.NEGATIVE_CACHE_ENABLED:
+            return {}
+        rows = await self.memory.get_failures(self._hash(user_request), time.time() if now is None else now)
+        if rows:
+            self.hits += 1
+        return {(row["tool"], row["cmd"]): row for row in rows}
+
+    async def record(self, user_request, results, now=None):
+        """Remembers every failed result of a plan."""
+        if not settings.NEGATIVE_CACHE_ENABLED:
+            return
+        now = time.time() if now is None else now
+        req_hash = self._hash(user_request)
+        for r in results:
+            error_class = classify(r["result"])
+            if r.get("success") or error_class is None:
+                continue
+            ttl = settings.NEGATIVE_CACHE_TTL.get(error_class, settings.NEGATIVE_CACHE_TTL["error"])
+            await self.memory.record_failure(req_hash, r["tool"], str(r["cmd"]), error_class,
+                                             str(r["result"])[:500], now + ttl, now)
+
+    async def clear(self, user_request):
+        await self.memory.clear_failures(self._hash(user_request))
+
+    def verdict(self, failures):
+        """The answer for a request that keeps failing deterministically, or None to let the brain try."""
+        for (tool, cmd), entry in failures.items():
+            if entry["error_class"] in DETERMINISTIC and entry["failures"] >= settings.NEGATIVE_CACHE_ANSWER_AFTER:
+                return f"{entry['message']} (known failure of {tool}, not retried)"
+        return None
+
+    @staticmethod
+    def hint(failures):
+        """Context line telling the brain which plans already failed."""
+        if not failures:
+            return ""
+        plans = "; ".join(f"{tool}({cmd}) -> {entry['error_class']}" for (tool, cmd), entry in failures.items())
+        return f"[Known failures, choose another tool: {plans}]"
@@ -1,22 +1,118 @@
 import aiosqlite
 import os
 import json
+import math
+import time
+import asyncio
 import logging
 from datetime import datetime
+from config import settings
+from core.tracing import tracer
+
+# Task states that must survive a crash as soon as they are written (resume skips them)
+DURABLE_STATUSES = {"completed", "failed"}
+
+# Decayed habit scores are stored as rank = log2(score) + t / half_life. The score
+# at any later time is 2 ** (rank - now / half_life), so ordering by rank is
+# ordering by current score, and an index on rank stays valid as time passes.
+HABITS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS habits (
+        context_key TEXT NOT NULL, -- slot|app
+        command TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0, -- lifetime count
+        rank REAL NOT NULL DEFAULT 0, -- decayed score, see above
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (context_key, command)
+    )
+"""
+
+def _half_lives(now=None):
+    """Time in half-lives (the unit of rank)."""
+    return (time.time() if now is None else now) / (settings.HABIT_HALF_LIFE_DAYS * 86400)
+
+def habit_bump(rank, now_h):
+    """rank after adding 1 to the score decayed up to now_h (SQL function habit_bump)."""
+    return math.log2(2.0 ** min(rank - now_h, 64.0) + 1.0) + now_h
+
+def habit_score(rank, now=None):
+    return 2.0 ** min(rank - _half_lives(now), 64.0)
 
 class OmegaMemory:
+    """
+    Layer 2: Persistent Memory (SQLite).
+    Writes are write-behind: each statement runs at once on the single
+    connection (so reads through it see it immediately), but the commit -
+    and its fsyncs - is shared. Uncommitted writes are committed together
+    after MEMORY_COMMIT_INTERVAL, as soon as MEMORY_COMMIT_BATCH of them
+    pile up, or when a durable write (a terminal task status, or an
+    explicit durable=True) calls flush(). Concurrent flushes coalesce into
+    one commit.
+    Reads that may go stale by one commit window (cache, preferences,
+    experience) use a small pool of read-only WAL connections, so they
+    don't queue behind writes and fsyncs on the writer's thread; reads that
+    must see pending writes (fresh=True) stay on the writer.
+    """
     def __init__(self, db_path="memory/umbrasol.db"):
         self.db_path = db_path
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         self.logger = logging.getLogger("Umbrasol.Memory")
         self._conn = None
+        self._readers = []
+        self._idle_readers = None
+        self._init_lock = asyncio.Lock()
+        self._dirty = 0  # Writes executed since the last commit
+        self._commit_lock = asyncio.Lock()
+        self._flush_task = None
+        self.writes = 0
+        self.commits = 0
 
     async def ensure_db(self):
         """Initializes the database schema if it doesn't exist."""
-        if self._conn is None:
-            self._conn = await aiosqlite.connect(self.db_path)
-            self._conn.row_factory = aiosqlite.Row
-            await self._init_db()
+        if self._conn is not None:
+            return
+        async with self._init_lock:
+            if self._conn is None:
+                conn = await aiosqlite.connect(self.db_path)
+                conn.row_factory = aiosqlite.Row
+                await conn.create_function("habit_bump", 2, habit_bump, deterministic=True)
+                await self._tune(conn)
+                self._conn = conn
+                await self._init_db()
+                await self._open_readers()
+
+    async def _tune(self, conn, readonly=False):
+        """Storage profile: WAL journal, sync level, mmap and page cache sizes."""
+        if not readonly:
+            await conn.execute(f"PRAGMA journal_mode={settings.MEMORY_JOURNAL_MODE}")
+        await conn.execute(f"PRAGMA synchronous={settings.MEMORY_SYNCHRONOUS}")
+        await conn.execute(f"PRAGMA mmap_size={int(settings.MEMORY_MMAP_BYTES)}")
+        await conn.execute(f"PRAGMA cache_size=-{int(settings.MEMORY_CACHE_KB)}")
+        await conn.execute("PRAGMA temp_store=MEMORY")
+        await conn.execute("PRAGMA busy_timeout=5000")
+
+    async def _open_readers(self):
+        if settings.MEMORY_JOURNAL_MODE.upper() != "WAL":
+            return  # Without WAL a reader would block (and be blocked by) the writer
+        self._idle_readers = asyncio.Queue()
+        for _ in range(settings.MEMORY_READERS):
+            reader = await aiosqlite.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+            reader.row_factory = aiosqlite.Row
+            await self._tune(reader, readonly=True)
+            self._readers.append(reader)
+            self._idle_readers.put_nowait(reader)
+
+    async def _read(self, sql, params=(), fresh=False, one=False):
+        """SELECT through an idle read-only connection, or the writer when `fresh` (sees pending writes)."""
+        await self.ensure_db()
+        if fresh or not self._readers:
+            async with self._conn.execute(sql, params) as cursor:
+                return await (cursor.fetchone() if one else cursor.fetchall())
+        reader = await self._idle_readers.get()
+        try:
+            async with reader.execute(sql, params) as cursor:
+                return await (cursor.fetchone() if one else cursor.fetchall())
+        finally:
+            self._idle_readers.put_nowait(reader)
 
     async def _init_db(self):
         """Initialize the database schema."""
@@ -50,23 +146,43 @@ class OmegaMemory:
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        # 4. SEMANTIC CACHE: Request hash -> command mapping
+        # 4. SEMANTIC CACHE: Request hash -> command mapping (request text feeds the vector index)
         await self._conn.execute("""
             CREATE TABLE IF NOT EXISTS semantic_cache (
                 hash TEXT PRIMARY KEY,
                 tool TEXT NOT NULL,
                 command TEXT,
+                request TEXT,
+                context TEXT, -- JSON {dimension: value} the entry is bound to (NULL: any context)
+                hits INTEGER NOT NULL DEFAULT 0,
+                last_hit TIMESTAMP,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
-        # 5. HABITS: (TimeSlot, Context) -> frequency
+        await self._migrate_cache_columns()
+        await self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_recency ON semantic_cache(coalesce(last_hit, created_at))"
+        )
+        # 5. HABITS: (TimeSlot|Context, command) -> decayed frequency, one row per pair
+        await self._migrate_habit_blobs()
+        await self._conn.execute(HABITS_SCHEMA)
+        await self._migrate_habit_ranks()
+        await self._conn.execute("CREATE INDEX IF NOT EXISTS idx_habits_rank ON habits(context_key, rank DESC)")
+        # 5b. HABIT TRANSITIONS: first-order Markov chain of consecutive commands per app
         await self._conn.execute("""
-            CREATE TABLE IF NOT EXISTS habits (
-                context_key TEXT PRIMARY KEY, -- slot|app
-                counts TEXT NOT NULL, -- JSON blob of command frequencies
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            CREATE TABLE IF NOT EXISTS habit_transitions (
+                context_key TEXT NOT NULL, -- app
+                prev_command TEXT NOT NULL,
+                command TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                rank REAL NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (context_key, prev_command, command)
             )
         """)
+        await self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_transitions_rank ON habit_transitions(context_key, prev_command, rank DESC)"
+        )
         # 6. EXPERIENCE: task -> lesson mapping
         await self._conn.execute("""
             CREATE TABLE IF NOT EXISTS experience (
@@ -75,99 +191,368 @@ class OmegaMemory:
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        # 7. LEARNED REFLEXES: request phrase -> action evidence mined from finished tasks
+        await self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS reflex_rules (
+                phrase TEXT NOT NULL, -- normalised request
+                tool TEXT NOT NULL,
+                cmd TEXT NOT NULL DEFAULT '',
+                successes INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'candidate', -- candidate, active, demoted
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (phrase, tool, cmd)
+            )
+        """)
+        await self._conn.execute("CREATE INDEX IF NOT EXISTS idx_reflex_active ON reflex_rules(status) WHERE status = 'active'")
+        # 8. NEGATIVE CACHE: plans that failed for a request, until their error class's TTL runs out
+        await self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS negative_cache (
+                req_hash TEXT NOT NULL,
+                tool TEXT NOT NULL,
+                cmd TEXT NOT NULL DEFAULT '',
+                error_class TEXT NOT NULL, -- unknown_tool, blocked, unavailable, transient, error
+                message TEXT,
+                failures INTEGER NOT NULL DEFAULT 1,
+                expires_at REAL NOT NULL, -- Unix time
+                PRIMARY KEY (req_hash, tool, cmd)
+            )
+        """)
+        await self._conn.execute("CREATE INDEX IF NOT EXISTS idx_negative_expiry ON negative_cache(expires_at)")
+        # Indexes: resume scans only the (few) open tasks; the audit trail is read by time
+        await self._conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_tasks_open ON tasks(status)
+            WHERE status NOT IN ('completed', 'failed')
+        """)
+        await self._conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_trail(timestamp)")
         await self._conn.commit()
 
-    async def add_task(self, request):
+    async def _migrate_cache_columns(self):
+        """Older databases predate semantic_cache.request (their rows stay exact-match only), context and hit tracking."""
+        async with self._conn.execute("PRAGMA table_info(semantic_cache)") as cursor:
+            columns = {row[1] for row in await cursor.fetchall()}
+        added = (("request", "TEXT"), ("context", "TEXT"), ("hits", "INTEGER NOT NULL DEFAULT 0"), ("last_hit", "TIMESTAMP"))
+        for column, decl in added:
+            if column not in columns:
+                await self._conn.execute(f"ALTER TABLE semantic_cache ADD COLUMN {column} {decl}")
+
+    async def _migrate_habit_blobs(self):
+        """One-time move from the old habits table (one JSON blob of counts per context) to rows."""
+        async with self._conn.execute("PRAGMA table_info(habits)") as cursor:
+            columns = {row[1] for row in await cursor.fetchall()}
+        if "counts" not in columns:
+            return
+        await self._conn.execute("ALTER TABLE habits RENAME TO habits_blob")
+        await self._conn.execute(HABITS_SCHEMA)
+        cursor = await self._conn.execute("""
+            INSERT INTO habits (context_key, command, count, updated_at)
+            SELECT b.context_key, j.key, CAST(j.value AS INTEGER), b.updated_at
+            FROM habits_blob b, json_each(b.counts) j
+            WHERE json_valid(b.counts)
+        """)
+        await self._conn.execute("DROP TABLE habits_blob")
+        await self._seed_habit_ranks()
+        self.logger.info(f"Migrated {cursor.rowcount} habit counts from JSON blobs to rows")
+
+    async def _migrate_habit_ranks(self):
+        """Row tables from before decay have counts only: add the rank column and swap the index."""
+        async with self._conn.execute("PRAGMA table_info(habits)") as cursor:
+            columns = {row[1] for row in await cursor.fetchall()}
+        if "rank" in columns:
+            return
+        await self._conn.execute("ALTER TABLE habits ADD COLUMN rank REAL NOT NULL DEFAULT 0")
+        await self._conn.execute("DROP INDEX IF EXISTS idx_habits_top")
+        await self._seed_habit_ranks()
+
+    async def _seed_habit_ranks(self):
+        """Lifetime counts become scores as of their last update, then decay from there."""
+        async with self._conn.execute("SELECT rowid, count, CAST(strftime('%s', updated_at) AS REAL) FROM habits") as cursor:
+            rows = await cursor.fetchall()
+        await self._conn.executemany(
+            "UPDATE habits SET rank = ? WHERE rowid = ?",
+            [(math.log2(max(count, 1)) + _half_lives(updated or None), rowid) for rowid, count, updated in rows],
+        )
+
+    # --- WRITE-BEHIND ---
+
+    async def _write(self, sql, params, durable=False):
+        """Runs one write now; its commit is shared with whatever else is pending."""
         await self.ensure_db()
-        cursor = await self._conn.execute("INSERT INTO tasks (request) VALUES (?)", (request,))
-        await self._conn.commit()
+        cursor = await self._conn.execute(sql, params)
+        self._dirty += 1
+        self.writes += 1
+        if durable or self._dirty >= settings.MEMORY_COMMIT_BATCH:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return cursor
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(settings.MEMORY_COMMIT_INTERVAL)
+            self._flush_task = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.logger.error(f"Group commit failed: {e}")
+
+    @tracer.traced("sqlite.commit")
+    async def flush(self):
+        """Commits every pending write. Callers that arrive while a commit runs share the next one."""
+        if self._conn is None:
+            return
+        async with self._commit_lock:
+            if not self._dirty:
+                return  # An earlier flush already covered these writes
+            self._dirty = 0
+            await self._conn.commit()
+            self.commits += 1
+
+    @tracer.traced("sqlite.add_task")
+    async def add_task(self, request):
+        cursor = await self._write("INSERT INTO tasks (request) VALUES (?)", (request,))
         return cursor.lastrowid
 
-    async def update_task_checkpoint(self, task_id, status, checkpoint_data):
-        await self.ensure_db()
-        await self._conn.execute("""
+    @tracer.traced("sqlite.update_task_checkpoint")
+    async def update_task_checkpoint(self, task_id, status, checkpoint_data, durable=None):
+        """Terminal statuses are durable by default; pass durable=True for other recovery points."""
+        if durable is None:
+            durable = status in DURABLE_STATUSES
+        await self._write("""
             UPDATE tasks 
             SET status = ?, checkpoint = ?, updated_at = CURRENT_TIMESTAMP 
             WHERE id = ?
-        """, (status, json.dumps(checkpoint_data), task_id))
-        await self._conn.commit()
+        """, (status, json.dumps(checkpoint_data), task_id), durable=durable)
 
-    async def get_pending_tasks(self):
-        await self.ensure_db()
-        async with self._conn.execute("SELECT * FROM tasks WHERE status != 'completed' AND status != 'failed'") as cursor:
-            return [dict(row) for row in await cursor.fetchall()]
+    async def get_pending_tasks(self, limit=-1):
+        # Matches idx_tasks_open's WHERE clause, so only open tasks are visited
+        # ("+id" keeps the planner from walking the whole table in rowid order instead)
+        rows = await self._read(
+            "SELECT * FROM tasks WHERE status NOT IN ('completed', 'failed') ORDER BY +id LIMIT ?", (limit,), fresh=True
+        )
+        return [dict(row) for row in rows]
 
+    async def get_finished_tasks(self, after_id=0, limit=-1):
+        """Completed/failed tasks with id > after_id, oldest first (a rowid range scan)."""
+        rows = await self._read("""
+            SELECT id, request, status, checkpoint FROM tasks
+            WHERE id > ? AND status IN ('completed', 'failed') ORDER BY id LIMIT ?
+        """, (after_id, limit), fresh=True)
+        return [dict(row) for row in rows]
+
+    async def get_task_stages(self, last=1000):
+        """{checkpoint stage: count} over the `last` finished tasks (how requests were resolved)."""
+        rows = await self._read("""
+            SELECT json_extract(checkpoint, '$.stage'), COUNT(*) FROM (
+                SELECT checkpoint FROM tasks WHERE status IN ('completed', 'failed') ORDER BY id DESC LIMIT ?
+            ) GROUP BY 1
+        """, (last,))
+        return {row[0]: row[1] for row in rows}
+
+    @tracer.traced("sqlite.log_action")
     async def log_action(self, command, result, risk_level="low"):
-        await self.ensure_db()
-        await self._conn.execute("""
+        await self._write("""
             INSERT INTO audit_trail (command, result, risk_level) 
             VALUES (?, ?, ?)
         """, (command, str(result), risk_level))
-        await self._conn.commit()
 
+    @tracer.traced("sqlite.save_preference")
     async def save_preference(self, key, value, category="general"):
-        await self.ensure_db()
-        await self._conn.execute("""
+        await self._write("""
             INSERT INTO knowledge (key, value, category) 
             VALUES (?, ?, ?) 
             ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=CURRENT_TIMESTAMP
         """, (key, value, category))
-        await self._conn.commit()
 
     async def get_preference(self, key):
-        await self.ensure_db()
-        async with self._conn.execute("SELECT value FROM knowledge WHERE key = ?", (key,)) as cursor:
-            res = await cursor.fetchone()
-            return res[0] if res else None
+        res = await self._read("SELECT value FROM knowledge WHERE key = ?", (key,), one=True)
+        return res[0] if res else None
 
     # --- UNIFIED MEMORY EXTENSIONS ---
     
-    async def get_cache(self, req_hash):
-        await self.ensure_db()
-        async with self._conn.execute("SELECT tool, command FROM semantic_cache WHERE hash = ?", (req_hash,)) as cursor:
-            row = await cursor.fetchone()
-            return dict(row) if row else None
+    async def get_cache(self, req_hash, max_age=None):
+        """The cached {tool, command}, or None; `max_age` (seconds) skips entries idle for longer."""
+        if max_age is None:
+            row = await self._read("SELECT tool, command FROM semantic_cache WHERE hash = ?", (req_hash,), one=True)
+        else:
+            row = await self._read("""
+                SELECT tool, command FROM semantic_cache
+                WHERE hash = ? AND coalesce(last_hit, created_at) >= datetime('now', ?)
+            """, (req_hash, f"-{int(max_age)} seconds"), one=True)
+        return dict(row) if row else None
 
-    async def set_cache(self, req_hash, tool, command):
-        await self.ensure_db()
-        await self._conn.execute("""
-            INSERT INTO semantic_cache (hash, tool, command) 
-            VALUES (?, ?, ?) 
-            ON CONFLICT(hash) DO UPDATE SET tool=excluded.tool, command=excluded.command
-        """, (req_hash, tool, command))
-        await self._conn.commit()
+    async def find_cache(self, hashes, max_age=None):
+        """{hash: {tool, command, context}} for whichever of `hashes` are cached, in one query."""
+        sql = f"SELECT hash, tool, command, context FROM semantic_cache WHERE hash IN ({','.join('?' * len(hashes))})"
+        params = list(hashes)
+        if max_age is not None:
+            sql += " AND coalesce(last_hit, created_at) >= datetime('now', ?)"
+            params.append(f"-{int(max_age)} seconds")
+        rows = await self._read(sql, params)
+        return {
+            row[0]: {"tool": row[1], "command": row[2], "context": json.loads(row[3]) if row[3] else None}
+            for row in rows
+        }
 
-    async def get_habit(self, context_key):
-        await self.ensure_db()
-        async with self._conn.execute("SELECT counts FROM habits WHERE context_key = ?", (context_key,)) as cursor:
-            res = await cursor.fetchone()
-            return json.loads(res[0]) if res else {}
+    async def touch_cache(self, hits):
+        """Adds {hash: hit count} to the hit tracking and stamps last_hit (one shared commit)."""
+        for req_hash, count in hits.items():
+            await self._write(
+                "UPDATE semantic_cache SET hits = hits + ?, last_hit = CURRENT_TIMESTAMP WHERE hash = ?",
+                (count, req_hash),
+            )
 
-    async def save_habit(self, context_key, counts):
-        await self.ensure_db()
-        await self._conn.execute("""
-            INSERT INTO habits (context_key, counts) 
-            VALUES (?, ?) 
-            ON CONFLICT(context_key) DO UPDATE SET counts=excluded.counts, updated_at=CURRENT_TIMESTAMP
-        """, (context_key, json.dumps(counts)))
-        await self._conn.commit()
+    @tracer.traced("sqlite.prune_cache")
+    async def prune_cache(self, max_rows, max_age):
+        """Deletes entries idle for over `max_age` seconds and all but the `max_rows` most recently used; returns their hashes."""
+        cursor = await self._write("""
+            DELETE FROM semantic_cache
+            WHERE coalesce(last_hit, created_at) < datetime('now', ?)
+               OR hash NOT IN (
+                   SELECT hash FROM semantic_cache ORDER BY coalesce(last_hit, created_at) DESC LIMIT ?
+               )
+            RETURNING hash
+        """, (f"-{int(max_age)} seconds", int(max_rows)))
+        return [row[0] for row in await cursor.fetchall()]
+
+    async def count_cache_requests(self):
+        row = await self._read("SELECT COUNT(*) FROM semantic_cache WHERE request IS NOT NULL", fresh=True, one=True)
+        return row[0]
+
+    async def get_cache_requests(self):
+        """Every (hash, request) pair the vector index is built from."""
+        rows = await self._read("SELECT hash, request FROM semantic_cache WHERE request IS NOT NULL", fresh=True)
+        return [(row[0], row[1]) for row in rows]
+
+    @tracer.traced("sqlite.set_cache")
+    async def set_cache(self, req_hash, tool, command, request=None, context=None):
+        await self._write("""
+            INSERT INTO semantic_cache (hash, tool, command, request, context) 
+            VALUES (?, ?, ?, ?, ?) 
+            ON CONFLICT(hash) DO UPDATE SET tool=excluded.tool, command=excluded.command,
+                request=coalesce(excluded.request, request), context=excluded.context, created_at=CURRENT_TIMESTAMP
+        """, (req_hash, tool, command, request, json.dumps(context, sort_keys=True) if context else None))
+
+    async def get_habit(self, context_key, now=None):
+        """Every command seen in a context with its current decayed score, as {command: score}."""
+        rows = await self._read("SELECT command, rank FROM habits WHERE context_key = ?", (context_key,))
+        return {row[0]: habit_score(row[1], now) for row in rows}
+
+    async def top_habit(self, context_key, now=None):
+        """The highest-scoring (command, decayed score) in a context, or None (one idx_habits_rank probe)."""
+        row = await self._read(
+            "SELECT command, rank FROM habits WHERE context_key = ? ORDER BY rank DESC LIMIT 1", (context_key,), one=True
+        )
+        return (row[0], habit_score(row[1], now)) if row else None
+
+    @tracer.traced("sqlite.increment_habit")
+    async def increment_habit(self, context_key, command, now=None):
+        """Atomic upsert (decay + 1 in SQL): no read, so concurrent learns never lose an increment."""
+        now_h = _half_lives(now)
+        await self._write("""
+            INSERT INTO habits (context_key, command, count, rank) 
+            VALUES (?, ?, 1, ?) 
+            ON CONFLICT(context_key, command) DO UPDATE SET
+                count = count + 1, rank = habit_bump(rank, ?), updated_at=CURRENT_TIMESTAMP
+        """, (context_key, command, now_h, now_h))
+
+    async def top_transition(self, context_key, prev_command, now=None):
+        """The likeliest (command, decayed score) to follow `prev_command` in a context, or None."""
+        row = await self._read("""
+            SELECT command, rank FROM habit_transitions
+            WHERE context_key = ? AND prev_command = ? ORDER BY rank DESC LIMIT 1
+        """, (context_key, prev_command), one=True)
+        return (row[0], habit_score(row[1], now)) if row else None
+
+    @tracer.traced("sqlite.record_transition")
+    async def record_transition(self, context_key, prev_command, command, now=None):
+        now_h = _half_lives(now)
+        await self._write("""
+            INSERT INTO habit_transitions (context_key, prev_command, command, count, rank) 
+            VALUES (?, ?, ?, 1, ?) 
+            ON CONFLICT(context_key, prev_command, command) DO UPDATE SET
+                count = count + 1, rank = habit_bump(rank, ?), updated_at=CURRENT_TIMESTAMP
+        """, (context_key, prev_command, command, now_h, now_h))
+
+    @tracer.traced("sqlite.record_reflex_outcome")
+    async def record_reflex_outcome(self, phrase, tool, cmd, success, create=True):
+        """Counts one outcome of resolving `phrase` to (tool, cmd); create=False only updates known rules."""
+        column = "successes" if success else "failures"
+        if create:
+            await self._write(f"""
+                INSERT INTO reflex_rules (phrase, tool, cmd, {column}) VALUES (?, ?, ?, 1)
+                ON CONFLICT(phrase, tool, cmd) DO UPDATE SET {column} = {column} + 1, updated_at=CURRENT_TIMESTAMP
+            """, (phrase, tool, cmd))
+        else:
+            await self._write(f"""
+                UPDATE reflex_rules SET {column} = {column} + 1, updated_at=CURRENT_TIMESTAMP
+                WHERE phrase = ? AND tool = ? AND cmd = ?
+            """, (phrase, tool, cmd))
+
+    async def get_reflex_rules(self, phrase=None, status=None):
+        """Evidence rows, for one phrase and/or one status."""
+        clauses, params = [], []
+        if phrase is not None:
+            clauses.append("phrase = ?")
+            params.append(phrase)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = await self._read(f"SELECT * FROM reflex_rules {where} ORDER BY phrase, successes DESC", params, fresh=True)
+        return [dict(row) for row in rows]
+
+    async def set_reflex_status(self, phrase, status, tool=None, cmd=None):
+        """Sets the status of one rule, or of every rule for `phrase` when tool is None."""
+        if tool is None:
+            await self._write("UPDATE reflex_rules SET status = ?, updated_at=CURRENT_TIMESTAMP WHERE phrase = ?",
+                              (status, phrase))
+        else:
+            await self._write("""
+                UPDATE reflex_rules SET status = ?, updated_at=CURRENT_TIMESTAMP WHERE phrase = ? AND tool = ? AND cmd = ?
+            """, (status, phrase, tool, cmd))
+
+    async def get_failures(self, req_hash, now):
+        rows = await self._read("""
+            SELECT tool, cmd, error_class, message, failures FROM negative_cache WHERE req_hash = ? AND expires_at > ?
+        """, (req_hash, now), fresh=True)  # A failure recorded a moment ago must already count
+        return [dict(row) for row in rows]
+
+    @tracer.traced("sqlite.record_failure")
+    async def record_failure(self, req_hash, tool, cmd, error_class, message, expires_at, now):
+        """Upserts one failed plan (failures counts repeats) and drops expired rows in the same commit."""
+        await self._write("DELETE FROM negative_cache WHERE expires_at <= ?", (now,))
+        await self._write("""
+            INSERT INTO negative_cache (req_hash, tool, cmd, error_class, message, expires_at) 
+            VALUES (?, ?, ?, ?, ?, ?) 
+            ON CONFLICT(req_hash, tool, cmd) DO UPDATE SET failures = failures + 1,
+                error_class=excluded.error_class, message=excluded.message, expires_at=excluded.expires_at
+        """, (req_hash, tool, cmd, error_class, message, expires_at))
+
+    async def clear_failures(self, req_hash):
+        await self._write("DELETE FROM negative_cache WHERE req_hash = ?", (req_hash,))
 
     async def get_experience(self, task_key):
-        await self.ensure_db()
-        async with self._conn.execute("SELECT lesson FROM experience WHERE task_key = ?", (task_key,)) as cursor:
-            res = await cursor.fetchone()
-            return json.loads(res[0]) if res else None
+        res = await self._read("SELECT lesson FROM experience WHERE task_key = ?", (task_key,), one=True)
+        return json.loads(res[0]) if res else None
 
+    @tracer.traced("sqlite.save_experience")
     async def save_experience(self, task_key, lesson):
-        await self.ensure_db()
-        await self._conn.execute("""
+        await self._write("""
             INSERT INTO experience (task_key, lesson) 
             VALUES (?, ?) 
             ON CONFLICT(task_key) DO UPDATE SET lesson=excluded.lesson, updated_at=CURRENT_TIMESTAMP
         """, (task_key, json.dumps(lesson)))
-        await self._conn.commit()
 
     async def close(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        for reader in self._readers:
+            await reader.close()
+        self._readers = []
         if self._conn:
+            await self.flush()
             await self._conn.close()
             self._conn = None
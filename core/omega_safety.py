@@ -1,66 +1,204 @@
 import os
-import shutil
-import logging
-import subprocess
 import re
+import shlex
+import asyncio
+import logging
+import functools
+from config import settings
+from core.snapshot_store import SnapshotStore
+
+LEVELS = ("HIGH", "MEDIUM")  # Most severe first: it wins when several rules start at one position
+_LEAD = re.compile(r"(?:\\b|\(\?<!?[^)]*\))*(\\\W|[\w>`])")  # First character a rule can match
+
+def _gate(patterns):
+    """A character class of every rule's first character, or "" if one rule starts with anything else."""
+    first = set()
+    for pattern in patterns:
+        lead = _LEAD.match(pattern)
+        if not lead:
+            return ""
+        char = lead.group(1)[-1]
+        first.update({char.lower(), char.upper()})
+    return "(?=[" + "".join(re.escape(c) for c in sorted(first)) + "])"
+
+def _compile(patterns):
+    """
+    All rules as one alternation of zero-width lookaheads, so every start
+    position is tried once and a rule can't hide another inside its match;
+    the first-character gate skips positions where no rule can start.
+    """
+    ordered = [(level, pattern) for level in LEVELS for pattern in patterns.get(level, [])]
+    rules = "|".join(f"(?=(?P<{level}_{i}>{pattern}))" for i, (level, pattern) in enumerate(ordered))
+    return re.compile(f"{_gate(p for _, p in ordered)}(?:{rules})", re.IGNORECASE)
+
+_AUTOMATON = _compile(settings.RISK_PATTERNS)
+_EXECUTES_QUOTED = re.compile("|".join(settings.RISK_EXECUTES_QUOTED))
+_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+_BLANKS = re.compile(r"[ \t]+")  # Newlines separate commands (and end comments), so they are kept
+_QUOTING = re.compile(r"""['"#\\]""")
+_QUOTES = re.compile(r"""['"\\]""")
+_SUBSTITUTION = re.compile(r"\$\(|`")
+_ASSIGNMENT = re.compile(r"[a-z_]\w*=", re.IGNORECASE)
+_OPERATORS = "();<>|&\n"
+_REDIRECTS = set("<>&")
+_WRAPPERS = {"sudo", "doas", "env", "nohup", "nice", "time", "command", "builtin", "exec", "stdbuf"}
+_DATA_COMMANDS = {"echo", "printf"}  # Every quoted operand is printed, not run
+_DATA_OPTIONS = {"-m", "--message"}  # The quoted value after them is a message
+
+def _tokens(command):
+    """
+    (word, source) per shell token, from shlex with punctuation_chars:
+    the word as the shell sees it (quotes removed) and the source text it
+    came from, blanks around it included. Newlines come back as operators.
+    """
+    lexer = shlex.shlex(command, posix=True, punctuation_chars=_OPERATORS)
+    lexer.whitespace_split = True
+    lexer.whitespace = " \t\r"
+    lexer.commenters = ""  # Only an unquoted '#' starts a comment, which the source tells apart
+    start = 0
+    while (word := lexer.get_token()) is not None:
+        end = lexer.instream.tell() - len(lexer._pushback_chars)
+        yield word, command[start:end]
+        start = end
+
+def _judge(command):
+    """
+    (judged, spoken): the command's words as the shell runs them, comments
+    dropped, without and with the quoted data arguments.
+    """
+    if not _QUOTING.search(command):
+        return command, command
+    try:
+        tokens = list(_tokens(command))
+    except ValueError:  # Unbalanced quotes: judged as written
+        written = _QUOTES.sub("", command)
+        return written, written
+    judged, spoken = [], []
+    name, previous, redirect, comment = None, None, False, False
+    for word, source in tokens:
+        text = source.strip(" \t\r")
+        lead, trail = source[:source.index(text)], source[source.index(text) + len(text):]
+        operator = text[0] in _OPERATORS
+        if comment and not (operator and "\n" in text):
+            continue
+        comment = False
+        quoted = bool(_QUOTES.search(text))
+        if operator:
+            redirect = set(text) <= _REDIRECTS and text not in ("&", "&&")
+            if not redirect:
+                name = None  # A new simple command
+            judged.append(source)
+            spoken.append(source)
+            previous = None
+            continue
+        if text[0] == "#":
+            comment = True
+            judged.append(lead)
+            spoken.append(lead)
+            continue
+        data = False
+        if redirect:
+            pass  # A redirection target is never data
+        elif name is None:
+            if not (_ASSIGNMENT.match(word) or word in _WRAPPERS or word.startswith("-")):
+                name = word
+        elif quoted and not _SUBSTITUTION.search(word):
+            data = name in _DATA_COMMANDS or previous in _DATA_OPTIONS
+        judged.append(lead + trail if data else lead + word + trail)
+        spoken.append(lead + word + trail)
+        previous, redirect = word, False
+    return "".join(judged), "".join(spoken)
+
+def judged_text(command):
+    """
+    What the rules see of a command: the words the shell runs, with quotes
+    removed (so `"rm" -rf /` is rm -rf /) and without comments. A quoted
+    argument that is plainly data, i.e. an echo/printf operand or a
+    -m/--message value, is left out unless it holds $(...) or backticks.
+    Unbalanced quotes are judged as written.
+    """
+    return _judge(command)[0]
+
+def _scan(text):
+    level = "LOW"
+    for match in _AUTOMATON.finditer(text):
+        found = match.lastgroup.split("_", 1)[0]
+        if found == "HIGH":
+            return "HIGH"
+        level = found
+    return level
+
+@functools.lru_cache(maxsize=settings.SAFETY_MEMO_SIZE)
+def _classify(normalized):
+    """
+    Judges "<tool> <command>" on the command's judged text. When the command
+    runs quoted text as code (sh -c, eval, ssh, python -c, ... | sh), the
+    data arguments count too, and the higher of the two levels wins.
+    """
+    tool, _, command = normalized.partition(" ")
+    judged, spoken = _judge(command)
+    level = _scan(f"{tool} {judged}")
+    if level != "HIGH" and judged != spoken and _EXECUTES_QUOTED.search(spoken):
+        level = max(level, _scan(f"{tool} {spoken}"), key=_RANK.get)
+    return level
+
+def snapshot_targets(command, cwd=None):
+    """
+    Existing paths a command names (itself, if it is one): what a snapshot
+    before it must cover. Relative paths are resolved against `cwd` (the
+    directory the command will run in; the process cwd by default).
+    """
+    def resolve(path):
+        path = os.path.expanduser(path)
+        return os.path.join(cwd, path) if cwd else path
+    if os.path.lexists(resolve(command)):
+        return [resolve(command)]
+    try:
+        words = shlex.split(command, comments=True)
+    except ValueError:
+        words = command.split()
+    targets = []
+    for word in words:
+        path = resolve(word)
+        if not word.startswith("-") and path not in targets and os.path.lexists(path):
+            targets.append(path)
+    return targets
 
 class OmegaSafety:
-    def __init__(self, backup_dir=".umbrasol/backups"):
-        self.backup_dir = backup_dir
-        os.makedirs(self.backup_dir, exist_ok=True)
+    def __init__(self, backup_dir=None):
+        self.backup_dir = backup_dir or settings.SNAPSHOT_DIR
+        self.store = SnapshotStore(self.backup_dir)
         self.logger = logging.getLogger("Umbrasol.Safety")
 
     def analyze_risk(self, command):
-        """Assigns a risk level to a command using regex patterns."""
-        high_risk = [
-            r"\brm\s+-rf",        # rm -rf specifically
-            r"\breboot\b",        # reboot
-            r"\bshutdown\b",      # shutdown
-            r"\bformat\b",        # format
-            r"\bmkfs\b",          # make filesystem
-            r">\s*/dev/",         # write to device
-            r"\bdd\b.*of=",       # dd with output file
-        ]
-        med_risk = [
-            r"\brm\s+",           # any rm command
-            r"\bmv\s+",           # any mv command
-            r"\bsystemctl\s+stop", # stopping services
-            r"\bkill\s+-9",       # force kill
-            r"\bapt\s+remove",    # package removal
-            r"\bpip\s+uninstall", # pip uninstall
-            r"\$\(",              # command substitution
-            r"`",                 # backtick substitution
-        ]
-        
-        # Check against patterns
-        for pattern in high_risk:
-            if re.search(pattern, command, re.IGNORECASE):
-                return "HIGH"
-        for pattern in med_risk:
-            if re.search(pattern, command, re.IGNORECASE):
-                return "MEDIUM"
-        return "LOW"
-
-    def snapshot(self, path):
-        """Creates a timestamped backup before modification."""
-        if not os.path.exists(path):
-            return None
-        
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        name = os.path.basename(path)
-        backup_path = os.path.join(self.backup_dir, f"{name}_{timestamp}")
-        
-        try:
-            if os.path.isdir(path):
-                shutil.copytree(path, backup_path)
-            else:
-                shutil.copy2(path, backup_path)
-            self.logger.info(f"SAFETY: Snapshot created for {path} at {backup_path}")
-            return backup_path
-        except Exception as e:
-            self.logger.error(f"SAFETY ERROR: Failed to snapshot {path}: {e}")
-            return None
+        """
+        HIGH / MEDIUM / LOW for a command: one pass of the compiled
+        RISK_PATTERNS automaton over its judged text, memoised on the
+        whitespace-normalised command (shared by every instance).
+        """
+        return _classify(_BLANKS.sub(" ", str(command).lower()).strip())
+
+    @staticmethod
+    def stats():
+        info = _classify.cache_info()
+        return {"memo_hits": info.hits, "memo_misses": info.misses, "memo_size": info.currsize}
+
+    def snapshot(self, command, cwd=None):
+        """Snapshots every path the command names before it runs (relative to `cwd`); returns the snapshot ids."""
+        taken = []
+        for path in snapshot_targets(str(command), cwd):
+            try:
+                manifest = self.store.snapshot(path)
+            except Exception as e:
+                self.logger.error(f"SAFETY ERROR: Failed to snapshot {path}: {e}")
+                continue
+            if manifest:
+                taken.append(manifest["id"])
+        return taken
+
+    async def snapshot_async(self, command, cwd=None):
+        """snapshot() in a worker thread: hashing a large tree must not stall the event loop."""
+        return await asyncio.to_thread(self.snapshot, command, cwd)
 
     def simulate(self, command, brain):
         """Asks the AI Brain to predict the impact of a command."""
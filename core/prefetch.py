@@ -0,0 +1,128 @@
+import os
+import time
+import asyncio
+import logging
+from config import settings
+
+class HabitPrefetcher:
+    """
+    Layer 4b: Speculative Prefetch.
+    When the active window changes, asks HabitManager what the user usually
+    runs next there. A read-only, LOW-risk prediction is run right away and
+    its result is parked for PREFETCH_TTL seconds; a request that resolves
+    to the same (tool, cmd) takes it instead of dispatching; for a tool whose
+    result depends on the cwd (CACHE_CONTEXT_TOOLS, e.g. ls), only from the
+    directory the prefetch ran in (the process cwd). Any other
+    prediction (or none) pre-warms the model instead.
+
+    Metrics: hit rate = hits / prefetches, wasted-work ratio = prefetches
+    that expired or were replaced unused / prefetches (with the tool time
+    they burned).
+    """
+    def __init__(self, habit, dispatch, safety, warm=None, tools=None, ttl=None):
+        self.habit = habit
+        self.dispatch = dispatch  # async (tool, cmd) -> result
+        self.safety = safety
+        self.warm = warm  # async () -> None, loads the model
+        self.tools = (settings.SPECULATIVE_TOOLS - {"see_active"}) if tools is None else tools
+        self.ttl = settings.PREFETCH_TTL if ttl is None else ttl
+        self.logger = logging.getLogger("Umbrasol.Prefetch")
+        self._parked = {}  # (tool, cmd, cwd or None) -> (task, started_at)
+        self._window = None
+        self.prefetches = 0
+        self.hits = 0
+        self.wasted = 0
+        self.wasted_seconds = 0.0
+        self.warms = 0
+
+    def stats(self):
+        return {
+            "prefetches": self.prefetches,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "hit_rate": round(self.hits / self.prefetches, 3) if self.prefetches else 0.0,
+            "wasted_ratio": round(self.wasted / self.prefetches, 3) if self.prefetches else 0.0,
+            "wasted_seconds": round(self.wasted_seconds, 3),
+            "model_warms": self.warms,
+        }
+
+    async def watch(self, read_window, interval=None):
+        """Polls the active window and reacts to every change (runs until cancelled)."""
+        interval = settings.PREFETCH_POLL_INTERVAL if interval is None else interval
+        while True:
+            try:
+                window = await read_window()
+                if window and window != self._window:
+                    await self.on_window_change(window)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.debug(f"Window poll failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def follow(self, windows):
+        """Reacts to the windows an async iterator pushes (WindowTracker.changes()) instead of polling."""
+        async for window in windows:
+            if not window or window == self._window:
+                continue
+            try:
+                await self.on_window_change(window)
+            except Exception as e:
+                self.logger.debug(f"Window change failed: {e}")
+
+    async def on_window_change(self, window, now=None):
+        self._window = window
+        self._discard_all()
+        command, score = await self.habit.predict(window, now=now)
+        tool, _, cmd = (command or "").partition(":")
+        if command and tool in self.tools and self.safety.analyze_risk(f"{tool} {cmd}") == "LOW":
+            self.logger.info(f"Prefetching {tool}({cmd}) for '{window}' (score {score:.1f})")
+            self._parked[self._key(tool, cmd)] = (asyncio.create_task(self._timed(tool, cmd)), time.monotonic())
+            self.prefetches += 1
+        elif self.warm and settings.PREFETCH_WARM_MODEL:
+            self.warms += 1
+            await self.warm()
+
+    def take(self, tool, cmd, cwd=None):
+        """The parked call for (tool, cmd) run in `cwd` (default: the process cwd) if it is still fresh, else None."""
+        entry = self._parked.pop(self._key(tool, cmd, cwd), None)
+        if entry is None:
+            return None
+        task, started = entry
+        if time.monotonic() - started > self.ttl:
+            self._waste(task)
+            return None
+        self.hits += 1
+        return self._result(task)
+
+    def close(self):
+        self._discard_all()
+
+    # --- internals ---
+
+    @staticmethod
+    def _key(tool, cmd, cwd=None):
+        bound = "cwd" in settings.CACHE_CONTEXT_TOOLS.get(tool, ())
+        return (tool, cmd, (cwd or os.getcwd()) if bound else None)
+
+    async def _timed(self, tool, cmd):
+        start = time.perf_counter()
+        result = await self.dispatch(tool, cmd)
+        return result, time.perf_counter() - start
+
+    @staticmethod
+    async def _result(task):
+        result, _ = await task
+        return result
+
+    def _waste(self, task):
+        self.wasted += 1
+        if task.done() and not task.cancelled() and task.exception() is None:
+            self.wasted_seconds += task.result()[1]
+        else:
+            task.cancel()
+
+    def _discard_all(self):
+        for task, _ in self._parked.values():
+            self._waste(task)
+        self._parked.clear()
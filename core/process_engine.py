@@ -0,0 +1,200 @@
+import os
+import sys
+import codecs
+import signal
+import asyncio
+import logging
+import subprocess
+from config import settings
+
+def _pidfds_usable():
+    if sys.version_info >= (3, 12) or not hasattr(os, "pidfd_open"):
+        return False  # 3.12+ picks pidfds itself
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+        return True
+    except OSError:
+        return False  # Kernel without pidfds: keep the threaded watcher
+
+_PIDFDS = _pidfds_usable()
+
+def _watch_children_with_pidfds():
+    """
+    Before 3.12 asyncio waits for every child on a thread of its own, so a
+    hundred running commands hold a hundred threads. A pidfd (Linux 5.3+)
+    lets the running event loop watch them instead.
+    """
+    if not _PIDFDS:
+        return
+    watcher = asyncio.get_child_watcher()
+    if not isinstance(watcher, asyncio.PidfdChildWatcher):
+        watcher = asyncio.PidfdChildWatcher()
+        asyncio.set_child_watcher(watcher)
+    if not watcher.is_active():
+        watcher.attach_loop(asyncio.get_running_loop())
+
+async def terminate_group(proc, grace):
+    """Terminates a process and its whole process group: SIGTERM, then SIGKILL after `grace` seconds."""
+    if os.name != "posix":
+        killer = await asyncio.create_subprocess_exec("taskkill", "/F", "/T", "/PID", str(proc.pid),
+                                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        await killer.wait()
+        await proc.wait()
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    try:
+        await asyncio.wait_for(proc.wait(), grace)
+    except asyncio.TimeoutError:
+        pass
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)  # Whatever ignored SIGTERM or outlived the leader
+    except ProcessLookupError:
+        pass
+    await proc.wait()
+
+class OutputCapture:
+    """
+    One stream's output: what is kept for the result (the first bytes and a
+    rolling tail, the middle dropped past the limit) and what is streamed to
+    on_output(stream, text) (the first `limit` bytes, decoded as they come).
+    """
+    def __init__(self, name, limit, tail, on_output=None):
+        self.name, self.limit, self.on_output = name, limit, on_output
+        self.head, self.tail = bytearray(), bytearray()
+        self.tail_limit = min(tail, limit)
+        self.head_limit = limit - self.tail_limit
+        self.dropped = 0
+        self.streamed = 0
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    async def feed(self, data):
+        self._keep(data)
+        if self.on_output is None or self.streamed >= self.limit:
+            return
+        data = data[:self.limit - self.streamed]
+        self.streamed += len(data)
+        text = self.decoder.decode(data)
+        if self.streamed >= self.limit:
+            text += self.decoder.decode(b"", final=True) + "\n[... output truncated ...]\n"
+        await self._deliver(text)
+
+    async def finish(self):
+        if self.on_output is not None and self.streamed < self.limit:
+            await self._deliver(self.decoder.decode(b"", final=True))
+
+    def text(self):
+        if not self.dropped:
+            return (self.head + self.tail).decode(errors="replace")
+        marker = f"\n[... {self.dropped} bytes truncated ...]\n"
+        return self.head.decode(errors="replace") + marker + self.tail.decode(errors="replace")
+
+    def _keep(self, data):
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if data:
+            self.tail += data
+            excess = len(self.tail) - self.tail_limit
+            if excess > 0:
+                del self.tail[:excess]
+                self.dropped += excess
+
+    async def _deliver(self, text):
+        if not text:
+            return
+        try:
+            await self.on_output(self.name, text)
+        except Exception as e:
+            logging.getLogger("Umbrasol.ProcessEngine").warning(f"Output listener error: {e}")
+
+class ProcessEngine:
+    """
+    Layer 6c: Process Engine.
+    Runs shell commands as asyncio subprocesses instead of holding a
+    thread each for subprocess.run. stdout and stderr are read as they
+    arrive and handed to on_output(stream, text) for streaming; what is
+    kept for the result is capped at SHELL_OUTPUT_LIMIT bytes per stream
+    (head plus SHELL_OUTPUT_TAIL bytes of tail, with a truncation marker).
+    Every command gets its own process group, so a timeout or a cancelled
+    request terminates the command and everything it spawned (SIGTERM,
+    then SIGKILL after SHELL_KILL_GRACE). Results keep the execute_shell
+    contract: {"exit_code", "output"}, output being stdout on success and
+    stderr otherwise.
+    """
+    def __init__(self, timeout=None, output_limit=None, tail=None, kill_grace=None):
+        self.timeout = settings.SHELL_TIMEOUT if timeout is None else timeout
+        self.output_limit = output_limit or settings.SHELL_OUTPUT_LIMIT
+        self.tail = settings.SHELL_OUTPUT_TAIL if tail is None else tail
+        self.kill_grace = settings.SHELL_KILL_GRACE if kill_grace is None else kill_grace
+        self.logger = logging.getLogger("Umbrasol.ProcessEngine")
+        self.counters = {"started": 0, "running": 0, "timeouts": 0, "cancelled": 0, "truncated": 0}
+
+    async def run(self, command, cwd=None, timeout=None, on_output=None):
+        """Runs a shell command line (str) or an argv (list); returns {"exit_code", "output"}."""
+        timeout = self.timeout if timeout is None else timeout
+        options = {"stdin": subprocess.DEVNULL, "stdout": subprocess.PIPE, "stderr": subprocess.PIPE, "cwd": cwd}
+        if os.name == "posix":
+            options["start_new_session"] = True
+        else:
+            options["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        _watch_children_with_pidfds()
+        try:
+            if isinstance(command, str):
+                proc = await asyncio.create_subprocess_shell(command, **options)
+            else:
+                proc = await asyncio.create_subprocess_exec(*command, **options)
+        except OSError as e:
+            return {"exit_code": -1, "output": str(e)}
+
+        self.counters["started"] += 1
+        self.counters["running"] += 1
+        stdout = OutputCapture("stdout", self.output_limit, self.tail, on_output)
+        stderr = OutputCapture("stderr", self.output_limit, self.tail, on_output)
+        waiters = [
+            asyncio.ensure_future(self._pump(proc.stdout, stdout)),
+            asyncio.ensure_future(self._pump(proc.stderr, stderr)),
+            asyncio.ensure_future(proc.wait()),
+        ]
+        try:
+            _, pending = await asyncio.wait(waiters, timeout=timeout)
+            if pending:
+                self.counters["timeouts"] += 1
+                await self._kill(proc, waiters)
+                return {"exit_code": -1, "output": f"Command '{command}' timed out after {timeout} seconds"}
+        except asyncio.CancelledError:
+            self.counters["cancelled"] += 1
+            await asyncio.shield(self._kill(proc, waiters))
+            raise
+        finally:
+            self.counters["running"] -= 1
+
+        if stdout.dropped or stderr.dropped:
+            self.counters["truncated"] += 1
+        output = stdout if proc.returncode == 0 else stderr
+        return {"exit_code": proc.returncode, "output": output.text()}
+
+    def stats(self):
+        return dict(self.counters)
+
+    @staticmethod
+    async def _pump(stream, capture):
+        """Reads one pipe to EOF."""
+        while True:
+            data = await stream.read(settings.SHELL_READ_CHUNK)
+            if not data:
+                break
+            await capture.feed(data)
+        await capture.finish()
+
+    async def _kill(self, proc, waiters):
+        """Stops a command that timed out or was cancelled, and its pipe readers."""
+        try:
+            await terminate_group(proc, self.kill_grace)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
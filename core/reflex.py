@@ -0,0 +1,163 @@
+import re
+import logging
+from collections import deque
+from config import settings
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+class ReflexMatch:
+    __slots__ = ("key", "phrase", "tool", "cmd", "start", "end", "priority")
+
+    def __init__(self, key, phrase, tool, cmd, start, end, priority):
+        self.key = key
+        self.phrase = phrase
+        self.tool = tool
+        self.cmd = cmd
+        self.start = start
+        self.end = end
+        self.priority = priority
+
+    def __repr__(self):
+        return f"ReflexMatch({self.phrase!r} -> {self.tool}:{self.cmd} @{self.start})"
+
+class ReflexEngine:
+    """
+    Layer 4: Compiled Reflexes.
+    An Aho-Corasick automaton over every INSTANT_MAP key and its synonyms,
+    built once at startup. One pass over the request finds every phrase that
+    sits on word boundaries; overlaps are resolved by priority, then length,
+    then position.
+    """
+    def __init__(self, instant_map, synonyms=None, priorities=None, filler_words=None, learned=None):
+        self.logger = logging.getLogger("Umbrasol.Reflex")
+        self.filler_words = set(filler_words or ())
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self.patterns = []  # (phrase, key, tool, cmd, priority)
+
+        priorities = priorities or {}
+        for key, (tool, cmd) in instant_map.items():
+            phrases = [key] + list((synonyms or {}).get(key, []))
+            for phrase in phrases:
+                self.add(phrase, key, tool, cmd, priorities.get(key, 0))
+        # Promoted from repeated brain resolutions (see core.reflex_compiler)
+        for phrase, tool, cmd in learned or ():
+            self.add(phrase, phrase, tool, cmd, settings.REFLEX_LEARNED_PRIORITY)
+        self._compile()
+
+    @classmethod
+    def from_settings(cls, learned=None):
+        return cls(
+            getattr(settings, "INSTANT_MAP", {}),
+            synonyms=getattr(settings, "REFLEX_SYNONYMS", {}),
+            priorities=getattr(settings, "REFLEX_PRIORITY", {}),
+            filler_words=getattr(settings, "REFLEX_FILLER_WORDS", ()),
+            learned=learned,
+        )
+
+    def add(self, phrase, key, tool, cmd, priority=0):
+        """Adds one pattern to the trie. Call _compile() afterwards."""
+        phrase = " ".join(phrase.lower().split())
+        if not phrase:
+            return
+        node = 0
+        for ch in phrase:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self.patterns))
+        self.patterns.append((phrase, key, tool, cmd, priority))
+
+    def _compile(self):
+        """Builds the failure links (breadth-first) and merges output sets."""
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    @staticmethod
+    def _normalize(text):
+        return " ".join(text.lower().split())
+
+    def scan(self, text):
+        """Every boundary-respecting match, overlapping ones included."""
+        text = self._normalize(text)
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        hits = []
+        node = 0
+        length = len(text)
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            for idx in out[node]:
+                phrase, key, tool, cmd, priority = patterns[idx]
+                start = i - len(phrase) + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if i + 1 < length and text[i + 1].isalnum():
+                    continue
+                hits.append(ReflexMatch(key, phrase, tool, cmd, start, i + 1, priority))
+        return text, hits
+
+    def match(self, text):
+        """Non-overlapping matches in textual order."""
+        text, hits = self.scan(text)
+        chosen = []
+        taken = [False] * len(text)
+        for hit in sorted(hits, key=lambda h: (-h.priority, -(h.end - h.start), h.start)):
+            if any(taken[hit.start:hit.end]):
+                continue
+            for i in range(hit.start, hit.end):
+                taken[i] = True
+            chosen.append(hit)
+        return sorted(chosen, key=lambda h: h.start)
+
+    def is_covered(self, text, matches):
+        """True when every word outside the matches is filler ('check', 'and', 'my'...)."""
+        text = self._normalize(text)
+        remainder = list(text)
+        for m in matches:
+            remainder[m.start:m.end] = [" "] * (m.end - m.start)
+        return all(word in self.filler_words for word in _WORD.findall("".join(remainder)))
+
+    def resolve(self, request):
+        """
+        Returns the actions that can skip the LLM, or [].
+        - Every word accounted for by reflexes + filler: all intents, deduplicated.
+        - Otherwise short requests (under HEURISTIC_WORD_THRESHOLD words) keep the
+          classic behaviour and fire their single best intent.
+        """
+        matches = self.match(request)
+        if not matches:
+            return []
+
+        if self.is_covered(request, matches):
+            actions, seen = [], set()
+            for m in matches:
+                if (m.tool, m.cmd) not in seen:
+                    seen.add((m.tool, m.cmd))
+                    actions.append({"tool": m.tool, "cmd": m.cmd})
+            return actions
+
+        if len(request.split()) < settings.HEURISTIC_WORD_THRESHOLD:
+            best = min(matches, key=lambda m: (-m.priority, -(m.end - m.start), m.start))
+            return [{"tool": best.tool, "cmd": best.cmd}]
+        return []
@@ -0,0 +1,171 @@
+import sys
+import json
+import asyncio
+import logging
+import argparse
+from config import settings
+from core.cache import context_dimensions
+from core.reflex import _WORD
+from core.omega_memory import OmegaMemory
+from core.omega_safety import OmegaSafety
+
+MARK_KEY = "reflex_compiler.last_task_id"
+OTHER = "*"  # Evidence row for "the brain did something else" (no action, or several)
+
+def normalize(request):
+    """The phrase a request is learned (and matched) as: lowercase words, punctuation dropped."""
+    return " ".join(_WORD.findall(request.lower()))
+
+class ReflexCompiler:
+    """
+    Layer 4c: Reflex Promotion.
+    Mines finished tasks (incrementally, from a high-water mark) for
+    requests the brain keeps resolving to the same single (tool, cmd), and
+    promotes them into reflex_rules once the action has
+    REFLEX_PROMOTE_MIN_SUPPORT successes and REFLEX_PROMOTE_MIN_CONFIDENCE
+    of the request's outcomes. Active rules are loaded into the
+    ReflexEngine next to INSTANT_MAP. Outcomes of the learned reflex keep
+    counting: a rule whose confidence drops below the line goes back to
+    candidate, and demote() retires one for good. Only LOW-risk, whitelisted
+    actions whose meaning does not depend on context (cwd, window) qualify.
+
+        python -m core.reflex_compiler             # compile now, list rules
+        python -m core.reflex_compiler --demote "open the notes"
+    """
+    def __init__(self, memory=None, safety=None):
+        self.memory = memory or OmegaMemory()
+        self.safety = safety or OmegaSafety()
+        self.logger = logging.getLogger("Umbrasol.ReflexCompiler")
+
+    async def active_rules(self):
+        """[(phrase, tool, cmd)] for ReflexEngine.from_settings(learned=...)."""
+        rows = await self.memory.get_reflex_rules(status="active")
+        return [(row["phrase"], row["tool"], row["cmd"]) for row in rows]
+
+    async def compile(self):
+        """Mines tasks finished since the last run; returns {"tasks", "promoted", "retired"}."""
+        last = int(await self.memory.get_preference(MARK_KEY) or 0)
+        tasks = await self.memory.get_finished_tasks(after_id=last)
+        learned = {phrase for phrase, _, _ in await self.active_rules()}
+        touched = set()
+        for task in tasks:
+            phrase = await self._observe(task, learned)
+            if phrase:
+                touched.add(phrase)
+            last = task["id"]
+        promoted, retired = [], []
+        for phrase in sorted(touched):
+            change = await self._review(phrase)
+            if change == "active":
+                promoted.append(phrase)
+            elif change == "candidate":
+                retired.append(phrase)
+        if tasks:
+            await self.memory.save_preference(MARK_KEY, str(last), category="system")
+        await self.memory.flush()
+        if promoted or retired:
+            self.logger.info(f"Reflexes promoted: {promoted}, retired: {retired}")
+        return {"tasks": len(tasks), "promoted": promoted, "retired": retired}
+
+    async def demote(self, request):
+        """Retires every rule for this request for good (it goes back to the brain)."""
+        phrase = normalize(request)
+        await self.memory.set_reflex_status(phrase, "demoted")
+        await self.memory.flush()
+        return phrase
+
+    async def inference_share(self, last=1000):
+        """Share of the last `last` finished requests that needed the brain."""
+        stages = await self.memory.get_task_stages(last)
+        total = sum(stages.values())
+        return stages.get("finished", 0) / total if total else 0.0
+
+    # --- internals ---
+
+    async def _observe(self, task, learned):
+        """Records one finished task as evidence; returns its phrase when it counted."""
+        try:
+            checkpoint = json.loads(task["checkpoint"] or "{}")
+        except (TypeError, json.JSONDecodeError):
+            return None
+        actions = checkpoint.get("actions") if isinstance(checkpoint, dict) else None
+        phrase = normalize(task["request"] or "")
+        if actions is None or not phrase:
+            return None  # Older checkpoints don't record their plan
+        success = task["status"] == "completed" and checkpoint.get("success", True)
+        if len(actions) == 1:
+            tool, cmd = actions[0].get("tool", ""), str(actions[0].get("cmd", ""))
+        else:
+            tool, cmd = OTHER, ""
+
+        if checkpoint.get("stage") == "finished":  # Resolved by the brain
+            await self.memory.record_reflex_outcome(phrase, tool, cmd, success)
+            return phrase
+        if checkpoint.get("stage") == "heuristic" and phrase in learned:  # Served by a learned reflex
+            await self.memory.record_reflex_outcome(phrase, tool, cmd, success, create=False)
+            return phrase
+        return None
+
+    async def _review(self, phrase):
+        """Promotes or retires the rules for one phrase; returns the new status if it changed."""
+        rows = await self.memory.get_reflex_rules(phrase=phrase)
+        if any(row["status"] == "demoted" for row in rows):
+            return None
+        total = sum(row["successes"] + row["failures"] for row in rows)
+        best = max(rows, key=lambda row: row["successes"])
+        confidence = best["successes"] / total if total else 0.0
+        qualifies = (
+            best["successes"] >= settings.REFLEX_PROMOTE_MIN_SUPPORT
+            and confidence >= settings.REFLEX_PROMOTE_MIN_CONFIDENCE
+            and self._eligible(phrase, best["tool"], best["cmd"])
+        )
+        change = None
+        for row in rows:
+            wanted = "active" if qualifies and row is best else "candidate"
+            if row["status"] != wanted:
+                await self.memory.set_reflex_status(phrase, wanted, tool=row["tool"], cmd=row["cmd"])
+                if wanted == "active":
+                    change = "active"
+                elif row["status"] == "active":
+                    change = change or "candidate"
+        return change
+
+    def _eligible(self, phrase, tool, cmd):
+        return (
+            tool != OTHER
+            and tool in settings.SAFE_TOOLS
+            and not context_dimensions(phrase, tool)
+            and self.safety.analyze_risk(f"{tool} {cmd}") == "LOW"
+        )
+
+async def _main(argv):
+    parser = argparse.ArgumentParser(description="Promote repeated brain resolutions into reflexes.")
+    parser.add_argument("--demote", metavar="REQUEST", help="Retire the learned reflex for this request")
+    parser.add_argument("--last", type=int, default=1000, help="Requests the inference share is measured over")
+    args = parser.parse_args(argv)
+
+    memory = OmegaMemory()
+    compiler = ReflexCompiler(memory)
+    try:
+        if args.demote:
+            print(f"Demoted '{await compiler.demote(args.demote)}'")
+            return 0
+        summary = await compiler.compile()
+        print(f"Mined {summary['tasks']} new tasks: {len(summary['promoted'])} promoted, {len(summary['retired'])} retired")
+        rules = await memory.get_reflex_rules()
+        print(f"{'phrase':<40}{'action':<28}{'ok':>5}{'fail':>6}  status")
+        for row in rules:
+            if row["tool"] == OTHER:
+                continue
+            action = f"{row['tool']}({row['cmd']})"
+            print(f"{row['phrase'][:39]:<40}{action[:27]:<28}{row['successes']:>5}{row['failures']:>6}  {row['status']}")
+        print(f"Inference share (last {args.last} requests): {await compiler.inference_share(args.last):.1%}")
+        return 0
+    finally:
+        await memory.close()
+
+def main(argv=None):
+    return asyncio.run(_main(argv))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import os
+import re
+import zlib
+import logging
+from config import settings
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+TOKEN = re.compile(r"[a-z0-9_./~-]+")
+INDEX_VERSION = 1
+
+class HashedNgramEmbedder:
+    """
+    CPU-only text embedding: content words and their character trigrams,
+    hashed (signed) into `dim` buckets and L2-normalised. Filler words
+    ("check", "the", "status", ...) are dropped first, so "check the
+    battery" and "battery status?" land on the same vector.
+    """
+    def __init__(self, dim=None, stop_words=None, trigram_weight=0.5):
+        self.dim = dim or settings.CACHE_EMBED_DIM
+        self.stop_words = settings.REFLEX_FILLER_WORDS if stop_words is None else stop_words
+        self.trigram_weight = trigram_weight
+
+    def tokens(self, text):
+        """Content words of `text` (lowercased, fillers removed)."""
+        return [t for t in TOKEN.findall(text.lower()) if t not in self.stop_words]
+
+    def embed(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for word in self.tokens(text):
+            self._add(vec, "w:" + word, 1.0)
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                self._add(vec, padded[i:i + 3], self.trigram_weight)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _add(self, vec, feature, weight):
+        h = zlib.crc32(feature.encode())
+        vec[h % self.dim] += weight if h & 0x80000000 else -weight
+
+class VectorIndex:
+    """
+    Cosine nearest-neighbour index: one contiguous float32 matrix of unit
+    vectors (capacity doubles as it grows) and the cache key of each row.
+    A lookup is a single matrix-vector product plus an argmax.
+    Persisted as an .npz next to the database; the semantic_cache table
+    stays the source of truth and the index can always be rebuilt from it.
+    """
+    def __init__(self, dim, path=None):
+        self.dim = dim
+        self.path = path
+        self.logger = logging.getLogger("Umbrasol.VectorIndex")
+        self.keys = []
+        self._rows = {}  # key -> row
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self.dirty = 0  # Rows added since the last save
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, vec):
+        """Adds (or replaces) the vector for `key`."""
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            if row == len(self._matrix):
+                grown = np.zeros((max(64, 2 * len(self._matrix)), self.dim), dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+            self.keys.append(key)
+            self._rows[key] = row
+        self._matrix[row] = vec
+        self.dirty += 1
+
+    def remove(self, key):
+        """Drops `key` by moving the last row into its place."""
+        row = self._rows.pop(key, None)
+        if row is None:
+            return
+        last = len(self.keys) - 1
+        if row != last:
+            moved = self.keys[last]
+            self._matrix[row] = self._matrix[last]
+            self.keys[row] = moved
+            self._rows[moved] = row
+        self.keys.pop()
+        self.dirty += 1
+
+    def nearest(self, vec):
+        """(key, cosine similarity) of the closest row, or (None, 0.0) when empty."""
+        n = len(self.keys)
+        if not n or not vec.any():
+            return None, 0.0
+        scores = self._matrix[:n] @ vec
+        best = int(np.argmax(scores))
+        return self.keys[best], float(scores[best])
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp.npz"
+        np.savez(tmp, version=INDEX_VERSION, matrix=self._matrix[:len(self.keys)], keys=np.array(self.keys))
+        os.replace(tmp, self.path)
+        self.dirty = 0
+
+    def load(self):
+        """Loads the persisted index; False when it is missing, stale-format or a different dim."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as data:
+                if int(data["version"]) != INDEX_VERSION or data["matrix"].shape[1] != self.dim:
+                    return False
+                self._matrix = np.array(data["matrix"], dtype=np.float32)
+                self.keys = [str(k) for k in data["keys"]]
+        except Exception as e:
+            self.logger.warning(f"Vector index unreadable ({e}), rebuilding")
+            return False
+        self._rows = {key: row for row, key in enumerate(self.keys)}
+        self.dirty = 0
+        return True
@@ -0,0 +1,59 @@
+import time
+import asyncio
+import logging
+from core.tracing import tracer
+
+REQUIRED = object()  # Marker: probe has no default and is awaited past the deadline
+
+logger = logging.getLogger("Umbrasol.Sense")
+
+async def fan_out(probes, deadline):
+    """
+    Layer 0: Parallel Sensing.
+    Runs independent probes concurrently under one shared deadline.
+
+    `probes` maps a name to (awaitable, default). Probes still running at the
+    deadline are cancelled and replaced by their default, except REQUIRED
+    probes, which are always awaited. Probes that raise also fall back to
+    their default. Returns (values, timings) where timings holds each probe's
+    latency in seconds, or None if it was cut off.
+    """
+    timings = {}
+
+    async def timed(name, awaitable):
+        start = time.perf_counter()
+        with tracer.span(f"sense.{name}"):
+            result = await awaitable
+        timings[name] = time.perf_counter() - start
+        return result
+
+    tasks = {name: asyncio.ensure_future(timed(name, aw)) for name, (aw, _) in probes.items()}
+    if tasks:
+        await asyncio.wait(tasks.values(), timeout=deadline)
+
+    values = {}
+    for name, task in tasks.items():
+        default = probes[name][1]
+        if not task.done():
+            if default is REQUIRED:
+                values[name] = await task
+                continue
+            task.cancel()
+            timings[name] = None
+            values[name] = default
+            logger.info(f"Probe '{name}' missed the {deadline * 1000:.0f}ms deadline")
+        elif task.exception() is not None:
+            if default is REQUIRED:
+                raise task.exception()
+            logger.warning(f"Probe '{name}' failed: {task.exception()}")
+            values[name] = default
+        else:
+            values[name] = task.result()
+    return values, timings
+
+def format_breakdown(stages):
+    """Renders {stage: seconds | None} as a compact one-line latency breakdown."""
+    parts = []
+    for name, seconds in stages.items():
+        parts.append(f"{name} late" if seconds is None else f"{name} {seconds * 1000:.1f}ms")
+    return " | ".join(parts)
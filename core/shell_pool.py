@@ -0,0 +1,287 @@
+import os
+import time
+import uuid
+import shlex
+import shutil
+import asyncio
+import logging
+import subprocess
+from config import settings
+from core.process_engine import OutputCapture, terminate_group, _watch_children_with_pidfds
+
+class ShellSession:
+    """One long-lived bash coprocess; commands are framed on its pipes by a per-command sentinel."""
+    def __init__(self, proc):
+        self.proc = proc
+        self.uses = 0
+        self.started = self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    @property
+    def alive(self):
+        return self.proc.returncode is None
+
+    async def run(self, command, stdout, stderr, isolated, cwd=None):
+        """
+        Runs one command, feeding its output to the two captures; returns the
+        exit code, or None if bash itself exited (`exit` in a bound session).
+        Isolated commands run in a subshell, so cd/export don't outlive them.
+        A `cwd` is entered first (the command doesn't run if that fails).
+        """
+        sentinel = f"__UMBRASOL_{uuid.uuid4().hex}__"
+        body = f"eval {shlex.quote(command)}"
+        if cwd:
+            body = f"cd -- {shlex.quote(cwd)} && {body}"
+        if isolated:
+            body = f"( {body} )"
+        script = (
+            f"{body} < /dev/null\n"
+            f"__umbrasol_rc=$?; printf '\\n{sentinel}:%d\\n' $__umbrasol_rc; "
+            f"printf '\\n{sentinel}:%d\\n' $__umbrasol_rc >&2\n"
+        )
+        self.last_used = time.monotonic()
+        try:
+            self.proc.stdin.write(script.encode())
+            await self.proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            return None
+        marker = f"\n{sentinel}:".encode()
+        code, _ = await asyncio.gather(self._read(self.proc.stdout, marker, stdout),
+                                       self._read(self.proc.stderr, marker, stderr))
+        self.uses += 1
+        return code
+
+    @staticmethod
+    async def _read(stream, marker, capture):
+        """Feeds one pipe to the capture up to the sentinel line; returns the exit code it carries."""
+        buf = bytearray()
+        while True:
+            at = buf.find(marker)
+            if at >= 0:
+                end = buf.find(b"\n", at + len(marker))
+                if end >= 0:
+                    await capture.feed(bytes(buf[:at]))
+                    await capture.finish()
+                    return int(buf[at + len(marker):end])
+            elif len(buf) >= len(marker):
+                hold = len(marker) - 1  # Could be the start of a sentinel split across reads
+                await capture.feed(bytes(buf[:-hold]))
+                del buf[:-hold]
+            data = await stream.read(settings.SHELL_READ_CHUNK)
+            if not data:
+                await capture.feed(bytes(buf))
+                await capture.finish()
+                return None
+            buf += data
+
+class ShellPool:
+    """
+    Layer 6d: Shell Pool.
+    Keeps SHELL_POOL_SIZE bash coprocesses warm, so a shell action is a
+    write to a pipe instead of a fork/exec of /bin/sh. A command is framed
+    by a random sentinel that carries its exit code back on both pipes.
+    Commands run under a `key` (one per request) share a session bound to
+    that key: cd and exported variables carry over between the plan's
+    steps. The session is recycled when the key is released, because it
+    holds that request's state. If it ends first (exit, timeout, crash),
+    the key's later commands fail rather than run in a fresh session
+    without the cwd and env the plan built up. Unkeyed commands run in a subshell of an
+    idle session and leave nothing behind. Sessions are replaced after
+    SHELL_POOL_MAX_USES commands or SHELL_POOL_MAX_AGE seconds, and after
+    a timeout or cancellation, which kills the session's process group.
+    One idle for longer than SHELL_POOL_PING_AFTER is pinged before reuse.
+    Results keep the {"exit_code", "output"} contract.
+    """
+    def __init__(self, cwd=None, size=None, timeout=None, output_limit=None, tail=None, kill_grace=None):
+        self.cwd = cwd
+        self.size = settings.SHELL_POOL_SIZE if size is None else size
+        self.timeout = settings.SHELL_TIMEOUT if timeout is None else timeout
+        self.output_limit = output_limit or settings.SHELL_OUTPUT_LIMIT
+        self.tail = settings.SHELL_OUTPUT_TAIL if tail is None else tail
+        self.kill_grace = settings.SHELL_KILL_GRACE if kill_grace is None else kill_grace
+        self.bash = shutil.which("bash")
+        self.idle = []
+        self.bound = {}
+        self.lost = set()  # Keys whose session ended before they were released
+        self.spawning = 0
+        self.background = set()
+        self.closed = False
+        self.logger = logging.getLogger("Umbrasol.ShellPool")
+        self.counters = {"warm": 0, "cold": 0, "recycled": 0, "timeouts": 0, "cancelled": 0, "failed_pings": 0}
+
+    @staticmethod
+    def available():
+        return os.name == "posix" and shutil.which("bash") is not None
+
+    async def fill(self):
+        """Starts sessions until SHELL_POOL_SIZE are idle (or starting)."""
+        while not self.closed and len(self.idle) + self.spawning < self.size:
+            self.spawning += 1
+            try:
+                session = await self._spawn()
+            except OSError as e:
+                self.logger.warning(f"Shell session failed to start: {e}")
+                return
+            finally:
+                self.spawning -= 1
+            if self.closed:
+                await terminate_group(session.proc, self.kill_grace)
+                return
+            self.idle.append(session)
+
+    async def run(self, command, key=None, timeout=None, on_output=None, cwd=None):
+        """
+        Runs a command in a pooled bash; returns {"exit_code", "output"}. An
+        unkeyed command runs in `cwd`; a key's session starts there, then
+        keeps whatever its commands cd to.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            session, fresh = await self._acquire(key)
+        except OSError as e:
+            return {"exit_code": -1, "output": str(e)}
+        stdout = OutputCapture("stdout", self.output_limit, self.tail, on_output)
+        stderr = OutputCapture("stderr", self.output_limit, self.tail, on_output)
+        async with session.lock:
+            running = asyncio.ensure_future(session.run(command, stdout, stderr, isolated=key is None,
+                                                     cwd=cwd if key is None or fresh else None))
+            try:
+                done, _ = await asyncio.wait([running], timeout=timeout)
+            except asyncio.CancelledError:
+                self.counters["cancelled"] += 1
+                await asyncio.shield(self._discard(session, key, running))
+                raise
+            if not done:
+                self.counters["timeouts"] += 1
+                await self._discard(session, key, running)
+                return {"exit_code": -1, "output": f"Command '{command}' timed out after {timeout} seconds"}
+            code = running.result()
+
+        if code is None:  # The command ended the shell
+            code = await session.proc.wait()
+            await self._discard(session, key)
+        elif key is None:
+            self._release(session)
+        output = stdout if code == 0 else stderr
+        return {"exit_code": code, "output": output.text()}
+
+    async def pwd(self, key):
+        """The current directory of the session bound to `key`; None if there is none or it doesn't answer."""
+        session = self.bound.get(key)
+        if session is None or not session.alive:
+            return None
+        out = OutputCapture("stdout", 64 * 1024, 0)
+        err = OutputCapture("stderr", 64 * 1024, 0)
+        async with session.lock:
+            try:
+                code = await asyncio.wait_for(session.run("pwd", out, err, isolated=False),
+                                              settings.SHELL_POOL_PING_TIMEOUT)
+            except asyncio.TimeoutError:
+                code = None
+            if code is None:  # Its framing can't be trusted any more
+                await self._discard(session, key)
+                return None
+        return out.text().rstrip("\n") if code == 0 else None
+
+    async def release(self, key):
+        """Ends a key's session (it carries that key's cwd and env); a fresh one takes its place."""
+        self.lost.discard(key)
+        session = self.bound.pop(key, None)
+        if session is not None:
+            self._in_background(self._discard(session))
+
+    async def close(self):
+        self.closed = True
+        await asyncio.gather(*self.background, return_exceptions=True)
+        sessions = self.idle + list(self.bound.values())
+        self.idle, self.bound = [], {}
+        self.lost.clear()
+        await asyncio.gather(*(self._discard(s) for s in sessions), return_exceptions=True)
+
+    def stats(self):
+        return {**self.counters, "idle": len(self.idle), "bound": len(self.bound)}
+
+    # --- internals ---
+
+    async def _spawn(self):
+        if self.bash is None:
+            raise OSError("bash not found")
+        _watch_children_with_pidfds()
+        proc = await asyncio.create_subprocess_exec(
+            self.bash, "--noprofile", "--norc",
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            cwd=self.cwd, start_new_session=True,
+        )
+        return ShellSession(proc)
+
+    async def _acquire(self, key):
+        """(session, fresh): fresh unless it is the session already bound to `key`."""
+        if key is not None:
+            session = self.bound.get(key)
+            if session is not None and not session.alive:
+                await self._discard(session, key)
+            elif session is not None:
+                return session, False
+            if key in self.lost:
+                raise OSError("The shell session of this request ended (exit, timeout or crash); "
+                              "its working directory and environment are gone")
+        session = None
+        while self.idle and session is None:
+            candidate = self.idle.pop()
+            if await self._healthy(candidate):
+                session = candidate
+            else:
+                self._in_background(self._discard(candidate))
+        if session is None:
+            self.counters["cold"] += 1
+            session = await self._spawn()
+        else:
+            self.counters["warm"] += 1
+        if key is not None:
+            self.bound[key] = session
+            self._in_background(self.fill())  # A bound session doesn't come back: start its successor now
+        return session, True
+
+    async def _healthy(self, session):
+        """Alive, not due for recycling, and answering if it has been idle a while."""
+        now = time.monotonic()
+        if not session.alive or session.uses >= settings.SHELL_POOL_MAX_USES \
+                or now - session.started >= settings.SHELL_POOL_MAX_AGE:
+            return False
+        if now - session.last_used < settings.SHELL_POOL_PING_AFTER:
+            return True
+        out = OutputCapture("stdout", 64, 0)
+        err = OutputCapture("stderr", 64, 0)
+        try:
+            code = await asyncio.wait_for(session.run(":", out, err, isolated=False), settings.SHELL_POOL_PING_TIMEOUT)
+        except asyncio.TimeoutError:
+            code = None
+        if code != 0:
+            self.counters["failed_pings"] += 1
+        return code == 0
+
+    def _release(self, session):
+        if session.alive and len(self.idle) < self.size:
+            self.idle.append(session)  # Due for recycling or not, _acquire checks when it is next taken
+        else:
+            self._in_background(self._discard(session, refill=False))
+
+    async def _discard(self, session, key=None, running=None, refill=True):
+        """Kills a session's process group (the command with it), then tops the idle sessions back up."""
+        if key is not None and self.bound.get(key) is session:
+            del self.bound[key]
+            self.lost.add(key)
+        self.counters["recycled"] += 1
+        try:
+            await terminate_group(session.proc, self.kill_grace)
+        finally:
+            if running is not None:
+                running.cancel()
+                await asyncio.gather(running, return_exceptions=True)
+        if refill:
+            self._in_background(self.fill())
+
+    def _in_background(self, coro):
+        task = asyncio.ensure_future(coro)
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
@@ -0,0 +1,296 @@
+import os
+import sys
+import json
+import stat
+import time
+import errno
+import struct
+import hashlib
+import logging
+import argparse
+import threading
+from config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+FICLONE = 0x40049409       # Linux ioctl: reflink a whole file
+FICLONERANGE = 0x4020940D  # Linux ioctl: reflink a byte range
+_NO_REFLINK = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.EPERM, errno.EBADF}
+
+def _at(base, rel):
+    return base if rel == "." else os.path.join(base, rel)
+
+class SnapshotStore:
+    """
+    Layer 2b: Snapshot Store.
+    Content-addressed backups taken before a risky action. Files are cut
+    into SNAPSHOT_CHUNK_SIZE chunks stored once under objects/<sha256>, so
+    a file shared by many snapshots (or many files with the same content)
+    costs its bytes once; new chunks are reflinked from the source where the
+    filesystem supports it (btrfs, XFS) and copied otherwise. Each snapshot
+    is a JSON manifest (paths, modes, mtimes, chunk lists). Files whose
+    size, mtime and inode match the source's previous manifest reuse its
+    chunks without being read. gc() keeps the newest SNAPSHOT_KEEP
+    manifests younger than SNAPSHOT_MAX_AGE and sweeps unreferenced chunks.
+
+        python -m core.snapshot_store                 # list snapshots
+        python -m core.snapshot_store --restore ID [--to DIR]
+    """
+    def __init__(self, root=None, chunk_size=None, keep=None, max_age=None, max_source_bytes=None):
+        self.root = root or settings.SNAPSHOT_DIR
+        self.chunk_size = chunk_size or settings.SNAPSHOT_CHUNK_SIZE
+        self.keep = settings.SNAPSHOT_KEEP if keep is None else keep
+        self.max_age = settings.SNAPSHOT_MAX_AGE if max_age is None else max_age
+        self.max_source_bytes = max_source_bytes or settings.SNAPSHOT_MAX_SOURCE_BYTES
+        self.objects = os.path.join(self.root, "objects")
+        self.manifests = os.path.join(self.root, "manifests")
+        os.makedirs(self.objects, exist_ok=True)
+        os.makedirs(self.manifests, exist_ok=True)
+        self.reflink = fcntl is not None and sys.platform.startswith("linux")
+        self.loaded = {}  # Manifest file -> parsed manifest (they never change once written)
+        self.lock = threading.Lock()  # Snapshots run in worker threads; gc must not sweep a chunk mid-snapshot
+        self.logger = logging.getLogger("Umbrasol.SnapshotStore")
+
+    def snapshot(self, path):
+        """Snapshots a file or directory tree; returns the manifest, or None if it is missing or too large."""
+        source = os.path.abspath(path)
+        if not os.path.lexists(source):
+            return None
+        with self.lock:
+            entries = self._scan(source)
+            if entries is None:
+                self.logger.warning(f"SAFETY: {source} is over {self.max_source_bytes} bytes, not snapshotted")
+                return None
+            previous = {e["path"]: e for e in (self._latest(source) or {}).get("entries", [])}
+            reused = 0
+            for entry in entries:
+                if entry["type"] != "file":
+                    continue
+                old = previous.get(entry["path"])
+                if old and all(old.get(k) == entry[k] for k in ("size", "mtime_ns", "ino")):
+                    entry["chunks"] = old["chunks"]  # Unchanged since the last snapshot: not even read
+                    reused += 1
+                else:
+                    entry["chunks"] = self._ingest(_at(source, entry["path"]))
+            created = time.time()
+            manifest = {
+                "id": time.strftime("%Y%m%d-%H%M%S", time.localtime(created))
+                      + "-" + hashlib.sha256(f"{source}{time.time_ns()}".encode()).hexdigest()[:8],
+                "created": created,
+                "source": source,
+                "entries": entries,
+            }
+            self._write_json(os.path.join(self.manifests, manifest["id"] + ".json"), manifest)
+            self.loaded[manifest["id"] + ".json"] = manifest
+        files = sum(1 for e in entries if e["type"] == "file")
+        self.logger.info(f"SAFETY: Snapshot {manifest['id']} of {source} ({files} files, {reused} unchanged)")
+        self.gc()
+        return manifest
+
+    def restore(self, snapshot_id, dest=None):
+        """
+        Rebuilds a snapshot at dest (default: where it was taken). Files the
+        snapshot does not know are left alone; files still identical to the
+        snapshot (same size and mtime) are skipped. Returns the path.
+        """
+        with self.lock:
+            manifest = self.loaded.get(snapshot_id + ".json") or self._read_json(os.path.join(self.manifests, snapshot_id + ".json"))
+            target = os.path.abspath(dest or manifest["source"])
+            for entry in manifest["entries"]:
+                path = _at(target, entry["path"])
+                if entry["type"] == "dir":
+                    os.makedirs(path, exist_ok=True)
+                elif entry["type"] == "link":
+                    if os.path.lexists(path):
+                        os.remove(path)
+                    os.symlink(entry["target"], path)
+                else:
+                    self._restore_file(entry, path)
+            for entry in reversed(manifest["entries"]):  # Children first: writing into a dir bumps its mtime
+                if entry["type"] == "dir":
+                    path = _at(target, entry["path"])
+                    os.chmod(path, entry["mode"])
+                    os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        self.logger.info(f"SAFETY: Snapshot {snapshot_id} restored to {target}")
+        return target
+
+    def list(self):
+        """Snapshot summaries, newest first."""
+        summaries = []
+        for manifest in self._manifests():
+            files = [e for e in manifest["entries"] if e["type"] == "file"]
+            summaries.append({"id": manifest["id"], "created": manifest["created"], "source": manifest["source"],
+                              "files": len(files), "bytes": sum(e["size"] for e in files)})
+        return sorted(summaries, key=lambda s: s["created"], reverse=True)
+
+    def gc(self, now=None, force=False):
+        """Applies the retention policy, then sweeps chunks no kept manifest references."""
+        now = time.time() if now is None else now
+        removed, freed, swept = 0, 0, 0
+        with self.lock:
+            manifests = sorted(self._manifests(), key=lambda m: m["created"], reverse=True)
+            kept = []
+            for i, manifest in enumerate(manifests):
+                if i < self.keep and now - manifest["created"] <= self.max_age:
+                    kept.append(manifest)
+                else:
+                    os.remove(os.path.join(self.manifests, manifest["id"] + ".json"))
+                    self.loaded.pop(manifest["id"] + ".json", None)
+                    removed += 1
+            if removed or force:
+                live = {chunk for m in kept for e in m["entries"] for chunk in e.get("chunks", ())}
+                for folder, _, names in os.walk(self.objects):
+                    for name in names:
+                        if os.path.basename(folder) + name not in live:
+                            path = os.path.join(folder, name)
+                            freed += os.path.getsize(path)
+                            os.remove(path)
+                            swept += 1
+        if removed or swept:
+            self.logger.info(f"SAFETY: Snapshot GC dropped {removed} snapshots, {swept} chunks ({freed} bytes)")
+        return {"snapshots": removed, "chunks": swept, "bytes": freed}
+
+    def disk_usage(self):
+        """Bytes held by chunk objects."""
+        return sum(os.path.getsize(os.path.join(folder, name))
+                   for folder, _, names in os.walk(self.objects) for name in names)
+
+    # --- internals ---
+
+    def _scan(self, source):
+        """Entries of a file or tree (stat only), or None once their size passes the limit."""
+        store = os.path.abspath(self.root)
+        entries, total = [], 0
+        stack = [(source, ".")]
+        while stack:
+            path, rel = stack.pop()
+            if os.path.commonpath([store, path]) == store:
+                continue  # Never snapshot the store into itself
+            st = os.lstat(path)
+            if stat.S_ISLNK(st.st_mode):
+                entries.append({"path": rel, "type": "link", "target": os.readlink(path)})
+            elif stat.S_ISDIR(st.st_mode):
+                entries.append({"path": rel, "type": "dir", "mode": st.st_mode & 0o7777, "mtime_ns": st.st_mtime_ns})
+                for child in sorted(os.listdir(path), reverse=True):
+                    stack.append((os.path.join(path, child), child if rel == "." else os.path.join(rel, child)))
+            elif stat.S_ISREG(st.st_mode):
+                total += st.st_size
+                if total > self.max_source_bytes:
+                    return None
+                entries.append({"path": rel, "type": "file", "mode": st.st_mode & 0o7777, "size": st.st_size,
+                                "mtime_ns": st.st_mtime_ns, "ino": st.st_ino})
+        return entries
+
+    def _object(self, digest):
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def _ingest(self, path):
+        """Chunks one file into the store; returns its chunk digests."""
+        chunks = []
+        with open(path, "rb") as f:
+            offset = 0
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    break
+                digest = hashlib.sha256(data).hexdigest()
+                obj = self._object(digest)
+                if not os.path.exists(obj):
+                    os.makedirs(os.path.dirname(obj), exist_ok=True)
+                    tmp = f"{obj}.{os.getpid()}.{threading.get_ident()}.tmp"
+                    with open(tmp, "wb") as out:
+                        if not self._clone(f.fileno(), out.fileno(), offset, len(data)):
+                            out.write(data)
+                    os.replace(tmp, obj)
+                chunks.append(digest)
+                offset += len(data)
+        return chunks
+
+    def _clone(self, src_fd, dst_fd, offset=0, length=0):
+        """Reflinks bytes (or, with no length, the whole file) between files; False if unsupported here."""
+        if not self.reflink:
+            return False
+        try:
+            if length:
+                fcntl.ioctl(dst_fd, FICLONERANGE, struct.pack("qQQQ", src_fd, offset, length, 0))
+            else:
+                fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return True
+        except OSError as e:
+            if e.errno in _NO_REFLINK:
+                self.reflink = False  # Same filesystem for every chunk: don't try again
+            return False
+
+    def _restore_file(self, entry, path):
+        try:
+            st = os.lstat(path)
+            if not os.path.islink(path) and st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]:
+                return  # Unchanged since the snapshot
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.umbrasol-restore"
+        with open(tmp, "wb") as out:
+            chunks = entry["chunks"]
+            for digest in chunks:
+                with open(self._object(digest), "rb") as obj:
+                    if len(chunks) > 1 or not self._clone(obj.fileno(), out.fileno()):
+                        out.write(obj.read())
+        os.chmod(tmp, entry["mode"])
+        os.utime(tmp, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        if os.path.isdir(path) and not os.path.islink(path):
+            os.rmdir(path)  # Only an empty directory can be replaced by the file
+        os.replace(tmp, path)
+
+    def _latest(self, source):
+        matching = [m for m in self._manifests() if m["source"] == source]
+        return max(matching, key=lambda m: m["created"]) if matching else None
+
+    def _manifests(self):
+        for name in os.listdir(self.manifests):
+            if not name.endswith(".json"):
+                continue
+            if name not in self.loaded:
+                try:
+                    self.loaded[name] = self._read_json(os.path.join(self.manifests, name))
+                except (OSError, ValueError):
+                    self.logger.warning(f"SAFETY: Unreadable snapshot manifest {name}")
+                    continue
+            yield self.loaded[name]
+
+    @staticmethod
+    def _read_json(path):
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List and restore safety snapshots.")
+    parser.add_argument("--restore", metavar="ID", help="Snapshot to restore")
+    parser.add_argument("--to", metavar="DIR", help="Restore here instead of the original location")
+    parser.add_argument("--gc", action="store_true", help="Apply the retention policy now")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore()
+    if args.restore:
+        print(f"Restored to {store.restore(args.restore, args.to)}")
+        return 0
+    if args.gc:
+        print(store.gc(force=True))
+    print(f"{'id':<26}{'taken':<21}{'files':>7}{'bytes':>12}  source")
+    for s in store.list():
+        taken = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(s["created"]))
+        print(f"{s['id']:<26}{taken:<21}{s['files']:>7}{s['bytes']:>12}  {s['source']}")
+    print(f"Chunk store: {store.disk_usage()} bytes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
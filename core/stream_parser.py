@@ -0,0 +1,121 @@
+TAGS = {"THINK:": "reasoning", "SAY:": "talk", "ACT:": "action"}
+
+class ThoughtStreamParser:
+    """
+    Incremental THINK/SAY/ACT parser for the soul's token stream.
+    Every character is looked at once: only the first few characters of a
+    line are buffered (to recognise a tag split across chunks), the rest of
+    the line is sliced straight into events. feed() returns the events for
+    one chunk; finish() flushes whatever the stream ended on.
+
+    Events: {"type": "reasoning"|"talk", "content": str} and
+            {"type": "act", "raw": str} (one per complete ACT: line).
+    `closed` turns True once the ACT block is over (a non-ACT line follows
+    an ACT line), which is the caller's cue to stop generating.
+    """
+    def __init__(self):
+        self.mode = None  # None until the first tag, then reasoning/talk/action
+        self.closed = False
+        self.acted = False
+        self._parts = []
+        self._line_start = True
+        self._pending = ""  # Start-of-line text that may still become a tag
+        self._act_line = []
+
+    @property
+    def text(self):
+        """Everything fed so far (the full raw response)."""
+        return "".join(self._parts)
+
+    def feed(self, chunk):
+        events = []
+        if self.closed or not chunk:
+            return events
+        self._parts.append(chunk)
+        i, n = 0, len(chunk)
+        while i < n and not self.closed:
+            if self._line_start:
+                i = self._consume_line_start(chunk, i, events)
+                continue
+            nl = chunk.find("\n", i)
+            end = n if nl == -1 else nl + 1
+            self._content(chunk[i:end], events)
+            if nl != -1:
+                self._end_line(events)
+            i = end
+        return events
+
+    def finish(self):
+        """Flushes a trailing partial line (e.g. an ACT: without a final newline)."""
+        events = []
+        if self._pending and not self.closed:
+            self._content(self._pending, events)
+            self._pending = ""
+        if self._act_line:
+            self._emit_act(events)
+        return events
+
+    # --- internals ---
+
+    def _consume_line_start(self, chunk, i, events):
+        """Buffers one char of a line start; decides tag vs content as soon as possible."""
+        ch = chunk[i]
+        if ch == "\n":
+            # Blank line: just whitespace, stays a line start
+            self._content(self._pending + ch, events)
+            self._pending = ""
+            self._end_line(events)
+            return i + 1
+
+        self._pending += ch
+        head = self._pending.lstrip()
+        if not head:
+            return i + 1
+
+        for tag, mode in TAGS.items():
+            if head == tag:
+                self._switch(mode, events)
+                self._pending = ""
+                self._line_start = False
+                return i + 1
+            if tag.startswith(head):
+                return i + 1  # Still a possible tag prefix: need more input
+
+        # Not a tag: this line continues the current block
+        if self.acted and self.mode == "action":
+            self.closed = True
+            return i + 1
+        pending, self._pending = self._pending, ""
+        self._line_start = False
+        self._content(pending, events)
+        return i + 1
+
+    def _switch(self, mode, events):
+        if self.mode == "action" and self._act_line:
+            self._emit_act(events)
+        if self.acted and mode != "action":
+            self.closed = True
+        self.mode = mode
+
+    def _content(self, text, events):
+        if not text or self.mode is None:
+            return
+        if self.mode == "action":
+            self._act_line.append(text)
+            return
+        if events and events[-1].get("type") == self.mode:
+            events[-1]["content"] += text
+        else:
+            events.append({"type": self.mode, "content": text})
+
+    def _end_line(self, events):
+        self._line_start = True
+        if self.mode == "action" and self._act_line:
+            self._emit_act(events)
+
+    def _emit_act(self, events):
+        raw = "".join(self._act_line).strip()
+        self._act_line = []
+        if raw:
+            self.acted = True
+            events.append({"type": "act", "raw": raw})
@@ -0,0 +1,311 @@
+import math
+import time
+import logging
+import threading
+from array import array
+
+import psutil
+from config import settings
+
+NAN = float("nan")
+PROCESS_ATTRS = ['pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'status']
+
+class RingBuffer:
+    """
+    A fixed number of timestamped rows of `width` floats in flat array('d')s:
+    appending overwrites the oldest row and never allocates. Missing values
+    are NaN and are left out of the aggregates.
+    """
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.width = width
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity * width))
+        self.count = 0  # Rows ever appended
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, at, row):
+        slot = self.count % self.capacity
+        self.times[slot] = at
+        start = slot * self.width
+        self.values[start:start + self.width] = array('d', row)
+        self.count += 1
+
+    def latest(self):
+        if not self.count:
+            return None
+        start = (self.count - 1) % self.capacity * self.width
+        return self.values[start:start + self.width].tolist()
+
+    def window(self, seconds, now):
+        """Rows sampled in the last `seconds` before `now`, oldest first."""
+        rows = []
+        for i in range(self.count - 1, self.count - 1 - len(self), -1):
+            slot = i % self.capacity
+            if now - self.times[slot] > seconds:
+                break
+            rows.append(self.values[slot * self.width:(slot + 1) * self.width].tolist())
+        rows.reverse()
+        return rows
+
+    def column(self, seconds, now, index):
+        """One column's values (NaNs dropped) over the last `seconds`, newest first."""
+        values = []
+        for i in range(self.count - 1, self.count - 1 - len(self), -1):
+            slot = i % self.capacity
+            if now - self.times[slot] > seconds:
+                break
+            value = self.values[slot * self.width + index]
+            if not math.isnan(value):
+                values.append(value)
+        return values
+
+    def aggregate(self, seconds, now):
+        """Per-column {"mean", "min", "max"} over the window (None for a column with no values)."""
+        columns = [[] for _ in range(self.width)]
+        for row in self.window(seconds, now):
+            for column, value in zip(columns, row):
+                if not math.isnan(value):
+                    column.append(value)
+        return [{"mean": sum(c) / len(c), "min": min(c), "max": max(c)} if c else None for c in columns]
+
+class TelemetrySampler:
+    """
+    Layer 0: Telemetry.
+    One daemon thread samples CPU (total and per core), RAM, disk, disk and
+    network I/O rates, temperature and battery every TELEMETRY_INTERVAL
+    seconds into fixed-size ring buffers (TELEMETRY_HISTORY seconds each).
+    Per-process CPU is sampled every TELEMETRY_PROCESS_INTERVAL seconds. A
+    psutil CPU percentage is the delta since the previous call, so the
+    first call after startup usually reads 0.0. Here every reading covers
+    exactly one sampling interval, and tool calls read the newest sample
+    and windowed aggregates without touching /proc. The first reading
+    comes TELEMETRY_WARMUP seconds after start(). Resident modes start the
+    sampler. Until it has a sample (one-shot runs never start it), reads go
+    straight to psutil once. The thread's own CPU time is counted in stats().
+    """
+    SERIES = {  # name -> columns
+        "cpu": None,  # total, then one per core
+        "ram": ("percent", "used"),
+        "disk": ("percent", "read_per_s", "write_per_s"),
+        "net": ("sent_per_s", "recv_per_s"),
+        "thermal": ("celsius",),
+        "battery": ("percent", "plugged"),
+    }
+
+    def __init__(self, disk_path=".", interval=None, history=None, process_interval=None, warmup=None, source=psutil):
+        self.disk_path = disk_path
+        self.interval = interval or settings.TELEMETRY_INTERVAL
+        self.history = history or settings.TELEMETRY_HISTORY
+        self.process_interval = settings.TELEMETRY_PROCESS_INTERVAL if process_interval is None else process_interval
+        self.warmup = settings.TELEMETRY_WARMUP if warmup is None else warmup
+        self.source = source
+        self.logger = logging.getLogger("Umbrasol.Telemetry")
+        self.cores = source.cpu_count() or 1
+        capacity = max(1, int(self.history / self.interval))
+        self.buffers = {name: RingBuffer(capacity, len(columns) if columns else 1 + self.cores)
+                        for name, columns in self.SERIES.items()}
+        self.net_counters = {}
+        self.processes = []  # Top processes by CPU over the last process interval
+        self.samples = 0
+        self.busy = 0.0  # Thread CPU seconds spent sampling
+        self.started_at = None
+        self._counters = {}  # Previous (monotonic time, counters) per rate series
+        self._processes_at = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def ready(self):
+        """True once a sample is in; until then reads are direct one-off psutil reads."""
+        return self._ready.is_set()
+
+    def start(self, wait=None):
+        """Starts the sampler (idempotent); waits up to `wait` seconds for the first sample."""
+        with self._lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, daemon=True, name="telemetry")
+                self._thread.start()
+        self._ready.wait(self.warmup + 1.0 if wait is None else wait)
+        return self
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+
+    def sample(self, now=None):
+        """Takes one sample of every series (the thread calls this; tests may too)."""
+        started = time.thread_time()
+        now = time.monotonic() if now is None else now
+        rows = {name: self._row(name, now) for name in self.SERIES}
+        processes = None
+        if self._processes_at is None or now - self._processes_at >= self.process_interval:
+            processes = self._read_processes()
+            self._processes_at = now
+        with self._lock:
+            for name, row in rows.items():
+                self.buffers[name].append(now, row)
+            if processes is not None:
+                self.processes = processes
+            self.samples += 1
+            self.busy += time.thread_time() - started
+        self._ready.set()
+
+    def latest(self, series):
+        with self._lock:
+            return self.buffers[series].latest()
+
+    def current(self, series):
+        """The newest sample of a series, or a direct one-off read if there is none yet."""
+        return self.latest(series) if self.ready else self._row(series, time.monotonic())
+
+    def window(self, series, seconds, now=None):
+        with self._lock:
+            return self.buffers[series].window(seconds, time.monotonic() if now is None else now)
+
+    def aggregate(self, series, seconds, now=None):
+        """{column: {"mean", "min", "max"}} over the last `seconds` ("cpu" columns: total, core0, ...)."""
+        with self._lock:
+            stats = self.buffers[series].aggregate(seconds, time.monotonic() if now is None else now)
+        columns = self.SERIES[series] or ["total"] + [f"core{i}" for i in range(self.cores)]
+        return dict(zip(columns, stats))
+
+    def average(self, series, seconds, column=0, now=None):
+        """Mean of one column over the last `seconds` (e.g. average CPU over 5 minutes), or None."""
+        with self._lock:
+            values = self.buffers[series].column(seconds, time.monotonic() if now is None else now, column)
+        return round(sum(values) / len(values), 1) if values else None
+
+    def system_stats(self):
+        """The `stats` tool: the newest sample plus windowed CPU averages (a direct read before the first sample)."""
+        if not self.ready:
+            s = self.source
+            return {
+                "cpu_total": s.cpu_percent(),
+                "cpu_cores": s.cpu_percent(percpu=True),
+                "ram": s.virtual_memory().percent,
+                "disk": s.disk_usage(self.disk_path).percent,
+                "io": s.net_io_counters()._asdict(),
+            }
+        cpu, ram, disk = self.latest("cpu"), self.latest("ram"), self.latest("disk")
+        return {
+            "cpu_total": _value(cpu[0]),
+            "cpu_cores": [_value(v) for v in cpu[1:]],
+            "ram": _value(ram[0]),
+            "disk": _value(disk[0]),
+            "io": dict(self.net_counters),
+            "cpu_avg_1m": self.average("cpu", 60),
+            "cpu_avg_5m": self.average("cpu", 300),
+        }
+
+    def process_list(self, limit=None):
+        if not self.ready:
+            return self._read_processes()[:limit or settings.TELEMETRY_TOP_PROCESSES]
+        with self._lock:
+            return self.processes[:limit or settings.TELEMETRY_TOP_PROCESSES]
+
+    def stats(self):
+        """Sampler overhead: busy is the thread's CPU time, overhead its share of one core since start."""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "samples": self.samples,
+            "busy_seconds": round(self.busy, 4),
+            "ms_per_sample": round(self.busy / self.samples * 1000, 3) if self.samples else 0.0,
+            "overhead_pct": round(self.busy / elapsed * 100, 3) if elapsed else 0.0,
+        }
+
+    # --- internals ---
+
+    def _run(self):
+        self.started_at = time.monotonic()
+        try:
+            self._prime()
+        except Exception as e:
+            self.logger.warning(f"Telemetry priming failed: {e}")
+        due = time.monotonic() + self.warmup
+        while not self._stopped.wait(max(0.0, due - time.monotonic())):
+            try:
+                self.sample()
+            except Exception as e:
+                self.logger.error(f"Telemetry sample failed: {e}")
+            due += self.interval
+            if due < time.monotonic():  # Fell behind (suspend, overload): skip missed ticks
+                due = time.monotonic() + self.interval
+
+    def _prime(self):
+        """Starts psutil's CPU deltas (system and per process) so the first sample is a real one."""
+        started = time.thread_time()
+        self.source.cpu_percent()
+        self.source.cpu_percent(percpu=True)
+        for _ in self.source.process_iter(['cpu_percent']):
+            pass
+        now = time.monotonic()
+        self._rates("disk", now, self.source.disk_io_counters(), ("read_bytes", "write_bytes"))
+        self._rates("net", now, self.source.net_io_counters(), ("bytes_sent", "bytes_recv"))
+        self.busy += time.thread_time() - started
+
+    def _row(self, series, now):
+        s = self.source
+        if series == "cpu":
+            return self._read(lambda: [s.cpu_percent()] + s.cpu_percent(percpu=True), 1 + self.cores)
+        if series == "ram":
+            return self._read(lambda: (lambda vm: [vm.percent, vm.used])(s.virtual_memory()), 2)
+        if series == "disk":
+            return self._read(lambda: [s.disk_usage(self.disk_path).percent] + self._rates(
+                "disk", now, s.disk_io_counters(), ("read_bytes", "write_bytes")), 3)
+        if series == "net":
+            return self._read(lambda: self._rates("net", now, s.net_io_counters(), ("bytes_sent", "bytes_recv")), 2)
+        if series == "thermal":
+            return self._read(self._thermal, 1)
+        return self._read(self._battery, 2)
+
+    def _read(self, reader, width):
+        try:
+            row = [NAN if v is None else float(v) for v in reader()]
+        except Exception:
+            row = []
+        return (row + [NAN] * width)[:width]
+
+    def _rates(self, series, now, counters, fields):
+        """Per-second deltas of cumulative counters since the previous sample (NaN the first time)."""
+        if counters is None:
+            return [NAN] * len(fields)
+        if series == "net":
+            self.net_counters = counters._asdict()
+        current = [getattr(counters, f) for f in fields]
+        previous = self._counters.get(series)
+        self._counters[series] = (now, current)
+        if previous is None or now <= previous[0]:
+            return [NAN] * len(fields)
+        elapsed = now - previous[0]
+        return [max(0.0, (c - p) / elapsed) for c, p in zip(current, previous[1])]
+
+    def _thermal(self):
+        temps = self.source.sensors_temperatures() if hasattr(self.source, "sensors_temperatures") else None
+        return [next(iter(temps.values()))[0].current] if temps else [NAN]
+
+    def _battery(self):
+        battery = self.source.sensors_battery() if hasattr(self.source, "sensors_battery") else None
+        return [battery.percent, battery.power_plugged] if battery else [NAN, NAN]  # plugged may be None
+
+    def _read_processes(self):
+        procs = []
+        try:
+            for proc in self.source.process_iter(PROCESS_ATTRS):
+                procs.append(proc.info)
+        except Exception as e:
+            self.logger.debug(f"Process sample failed: {e}")
+        procs.sort(key=lambda p: p.get('cpu_percent') or 0.0, reverse=True)
+        return procs[:settings.TELEMETRY_TOP_PROCESSES]
+
+def _value(v):
+    return None if math.isnan(v) else round(v, 1)
@@ -1,5 +1,6 @@
 import subprocess
 import os
+import asyncio
 import sys
 import shutil
 import psutil
@@ -9,12 +10,17 @@ import threading
 import queue
 import abc
 
+from core.voice import SpeechPipeline
+from core.process_engine import ProcessEngine
+from core.shell_pool import ShellPool
+from core.window_tracker import WindowTracker
+from core.telemetry import TelemetrySampler
+
 try:
     from config import settings
 except ImportError:
     class settings:
         LOG_DIR = "logs"
-        SENSITIVE_PATTERNS = ["rm ", "mv ", "sudo"]
         PIPER_VOICE = "en_US-bryce-medium"
         PIPER_MODEL_DIR = "models/voice"
         PIPER_MODEL_PATH = os.path.join(PIPER_MODEL_DIR, f"{PIPER_VOICE}.onnx")
@@ -66,7 +72,7 @@ class BaseHands(abc.ABC):
     @abc.abstractmethod
     def get_network_stats(self): pass
     @abc.abstractmethod
-    def list_dir(self, path="."): pass
+    def list_dir(self, path=".", cwd=None): pass
     @abc.abstractmethod
     def capture_screen(self): pass
     @abc.abstractmethod
@@ -80,13 +86,51 @@ class BaseHands(abc.ABC):
     @abc.abstractmethod
     def stop_speaking(self): pass
 
+    def shell_command(self, command):
+        """What execute_shell_async runs for a command: a line for the platform shell by default."""
+        return command
+
+    async def execute_shell_async(self, command, on_output=None, session=None, cwd=None):
+        """
+        execute_shell without a thread: output streamed to on_output(stream,
+        text), capped, killed on cancel. Runs in the warm bash pool where
+        there is one (commands sharing a `session` key share cd and env, and
+        the session starts in `cwd`), else as a fresh process in `cwd`.
+        """
+        shells = getattr(self, "shells", None)
+        if shells is not None and settings.SHELL_POOL_ENABLED:
+            return await shells.run(command, key=session, on_output=on_output, cwd=cwd or self.cwd)
+        return await self.processes.run(self.shell_command(command), cwd=cwd or self.cwd, on_output=on_output)
+
+    async def shell_cwd(self, session):
+        """Where the pooled bash bound to a key currently is (after the plan's cd's), if there is one."""
+        shells = getattr(self, "shells", None)
+        return await shells.pwd(session) if shells is not None else None
+
+    async def release_shell(self, session):
+        """Ends the pooled bash session bound to a key, if any."""
+        shells = getattr(self, "shells", None)
+        if shells is not None:
+            await shells.release(session)
+
+    async def read_active_window_async(self):
+        """read_active_window for the event loop (a thread hop unless the platform tracks the focus)."""
+        return await asyncio.to_thread(self.read_active_window)
+
 class LinuxHands(BaseHands):
     def __init__(self):
         self.log_dir = settings.LOG_DIR
         self.cwd = os.getcwd()
+        self.processes = ProcessEngine()
+        self.shells = ShellPool(self.cwd) if ShellPool.available() else None
+        # Focus follower (started on the first read): the title is kept current instead of asked for
+        self.windows = WindowTracker() if settings.WINDOW_TRACKER_ENABLED and WindowTracker.available() else None
+        self.telemetry = TelemetrySampler(self.cwd)  # Sampling once started (resident modes); direct reads until then
         self.logger = logging.getLogger("Umbrasol.LinuxHands")
         
-        # PARALLEL VOICE LAYER
+        # PARALLEL VOICE LAYER: one persistent Piper -> audio sink pipeline (started on first use),
+        # spd-say per utterance when Piper or its voice model is missing
+        self.speech = SpeechPipeline() if SpeechPipeline.available() else None
         self.voice_queue = queue.Queue()
         self.current_proc = None
         self.voice_thread = threading.Thread(target=self._voice_worker, daemon=True)
@@ -97,15 +141,8 @@ class LinuxHands(BaseHands):
             try:
                 text = self.voice_queue.get()
                 if text is None: break
-                model_path = settings.PIPER_MODEL_PATH
-                if os.path.exists(model_path):
-                    play_cmd = "paplay" if shutil.which("paplay") else "aplay"
-                    cmd = f"echo '{text}' | piper --model {model_path} --length-scale 0.85 --output-raw | {play_cmd} --raw --rate 22050 --channels 1 --format s16le"
-                    self.current_proc = subprocess.Popen(cmd, shell=True, stderr=subprocess.DEVNULL)
-                    self.current_proc.wait()
-                else:
-                    self.current_proc = subprocess.Popen(["spd-say", text])
-                    self.current_proc.wait()
+                self.current_proc = subprocess.Popen(["spd-say", text])
+                self.current_proc.wait()
                 self.voice_queue.task_done()
                 self.current_proc = None
             except Exception as e: self.logger.error(f"Voice Error: {e}")
@@ -113,6 +150,9 @@ class LinuxHands(BaseHands):
     def stop_speaking(self):
         """Interrupt current speech safely."""
         try:
+            if self.speech:
+                self.speech.interrupt()
+
             # Clear pending items from queue safely
             while not self.voice_queue.empty():
                 try:
@@ -148,8 +188,9 @@ class LinuxHands(BaseHands):
         if not text or not text.strip(): return "ERROR: Empty text."
         import re
         clean = re.sub(r'[*_#`]', '', text).strip()
-        safe_text = clean.replace("'", "").replace('"', "")
-        self.voice_queue.put(safe_text)
+        if self.speech:
+            return "SUCCESS: queued" if self.speech.say(clean) else "ERROR: Speech pipeline unavailable"
+        self.voice_queue.put(clean)
         return "SUCCESS: queued"
 
     def execute_shell(self, command):
@@ -163,23 +204,14 @@ class LinuxHands(BaseHands):
         return {"identity": "Umbrasol Core", "os": platform.system(), "uptime": int(time.time()), "status": "CONSCIOUS"}
 
     def get_physical_state(self):
+        battery, thermal = self.telemetry.current("battery"), self.telemetry.current("thermal")
         state = {}
-        battery = psutil.sensors_battery()
-        state["battery"] = f"{battery.percent}%" if battery else "N/A"
-        try:
-            temps = psutil.sensors_temperatures()
-            state["thermal"] = f"{next(iter(temps.values()))[0].current}°C" if temps else "STABLE"
-        except: state["thermal"] = "STABLE"
+        state["battery"] = f"{battery[0]:g}%" if battery and battery[0] == battery[0] else "N/A"  # NaN: no battery
+        state["thermal"] = f"{thermal[0]}°C" if thermal and thermal[0] == thermal[0] else "STABLE"
         return state
 
     def get_system_stats(self):
-        return {
-            "cpu_total": psutil.cpu_percent(),
-            "cpu_cores": psutil.cpu_percent(percpu=True),
-            "ram": psutil.virtual_memory().percent,
-            "disk": psutil.disk_usage(self.cwd).percent,
-            "io": psutil.net_io_counters()._asdict()
-        }
+        return self.telemetry.system_stats()
 
     def manage_service(self, name, action="status"):
         """Linux-specific service control (systemd)."""
@@ -188,13 +220,20 @@ class LinuxHands(BaseHands):
         return res
 
     def read_active_window(self):
+        if self.windows is not None and self.windows.start().running:
+            return self.windows.title
         try:
-            res = subprocess.run("xprop -root _NET_ACTIVE_WINDOW", shell=True, capture_output=True, text=True)
+            res = subprocess.run(["xprop", "-root", "_NET_ACTIVE_WINDOW"], capture_output=True, text=True)
             win_id = res.stdout.split()[-1]
-            res = subprocess.run(f"xprop -id {win_id} WM_NAME", shell=True, capture_output=True, text=True)
-            return res.stdout.split(" = ")[-1].strip('"')
+            res = subprocess.run(["xprop", "-id", win_id, "WM_NAME"], capture_output=True, text=True)
+            return res.stdout.split(" = ")[-1].strip().strip('"')
         except: return "UNKNOWN"
 
+    async def read_active_window_async(self):
+        if self.windows is not None and self.windows.running:
+            return self.windows.title  # No thread hop: the tracker already has it
+        return await super().read_active_window_async()
+
     def ocr_screen(self):
         """Optical Character Recognition of the current screen."""
         try:
@@ -211,10 +250,7 @@ class LinuxHands(BaseHands):
 
     def get_process_list(self):
         try:
-            procs = []
-            for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'status']):
-                procs.append(proc.info)
-            return sorted(procs, key=lambda x: x['cpu_percent'], reverse=True)[:15]
+            return self.telemetry.process_list()
         except Exception as e: return f"ERROR: {e}"
 
     def suspend_process(self, pid):
@@ -287,9 +323,9 @@ class LinuxHands(BaseHands):
             return psutil.net_io_counters()._asdict()
         except Exception as e: return f"ERROR: {e}"
 
-    def list_dir(self, path="."):
+    def list_dir(self, path=".", cwd=None):
         try:
-            target = os.path.abspath(os.path.join(self.cwd, path))
+            target = os.path.abspath(os.path.join(cwd or self.cwd, path))
             return "\n".join(os.listdir(target))
         except Exception as e: return f"ERROR: {e}"
 
@@ -320,9 +356,14 @@ class WindowsHands(BaseHands):
     """Divine Hands for Windows. Uses psutil, pywin32, and native commands."""
     def __init__(self):
         self.cwd = os.getcwd()
+        self.processes = ProcessEngine()
+        self.telemetry = TelemetrySampler(self.cwd)  # Sampling once started (resident modes); direct reads until then
         self.logger = logging.getLogger("Umbrasol.WindowsHands")
         # Note: In a real Windows env, we would initialize win32com and pyttsx3 or similar.
 
+    def shell_command(self, command):
+        return ["powershell", "-Command", command]
+
     def execute_shell(self, command):
         try:
             # Use powershell for better consistency
@@ -339,7 +380,7 @@ class WindowsHands(BaseHands):
         return {"battery": f"{battery.percent}%" if battery else "N/A", "thermal": "N/A (Win sensors restricted)"}
 
     def get_system_stats(self):
-        return {"cpu_total": psutil.cpu_percent(), "ram": psutil.virtual_memory().percent, "disk": psutil.disk_usage(self.cwd).percent}
+        return self.telemetry.system_stats()
 
     def read_active_window(self):
         # Native PowerShell/user32.dll approach
@@ -367,7 +408,8 @@ class WindowsHands(BaseHands):
 
     def get_process_list(self):
         try:
-            return [{"pid": p.pid, "name": p.name(), "cpu": p.cpu_percent(), "mem": p.memory_percent()} for p in psutil.process_iter()][:15]
+            return [{"pid": p["pid"], "name": p["name"], "cpu": p["cpu_percent"], "mem": p["memory_percent"]}
+                    for p in self.telemetry.process_list()]
         except:
             res = self.execute_shell("Get-Process | Select-Object Id, ProcessName, CPU, WorkingSet | ConvertTo-Json")
             return res.get("output", "ERROR: Could not fetch process list")
@@ -411,7 +453,8 @@ class WindowsHands(BaseHands):
         return res.get("output", "ERROR: UI Tree access restricted.")
 
     def get_network_stats(self): return psutil.net_io_counters()._asdict()
-    def list_dir(self, path="."):
+    def list_dir(self, path=".", cwd=None):
+        path = os.path.join(cwd or self.cwd, path)
         res = self.execute_shell(f"Get-ChildItem -Path '{path}' | Select-Object Name | ConvertTo-Json")
         return res.get("output", str(os.listdir(path)))
 
@@ -470,6 +513,9 @@ class AndroidHands(BaseHands):
     """Divine Hands for Android (via Termux). Uses termux-api and standard Linux tools."""
     def __init__(self):
         self.cwd = os.getcwd()
+        self.processes = ProcessEngine()
+        self.shells = ShellPool(self.cwd) if ShellPool.available() else None
+        self.telemetry = TelemetrySampler(self.cwd)  # Sampling once started (resident modes); direct reads until then
         self.logger = logging.getLogger("Umbrasol.AndroidHands")
         self.voice_queue = queue.Queue()
         self.voice_thread = threading.Thread(target=self._voice_worker, daemon=True)
@@ -513,7 +559,7 @@ class AndroidHands(BaseHands):
         except: return {"battery": "N/A", "thermal": "N/A"}
 
     def get_system_stats(self):
-        return {"cpu_total": psutil.cpu_percent(), "ram": psutil.virtual_memory().percent, "disk": psutil.disk_usage(self.cwd).percent}
+        return self.telemetry.system_stats()
 
     def read_active_window(self):
         try:
@@ -572,8 +618,8 @@ class AndroidHands(BaseHands):
         return res.get("output", "ERROR: XML Dump failed.")
 
     def get_network_stats(self): return psutil.net_io_counters()._asdict()
-    def list_dir(self, path="."):
-        try: return "\n".join(os.listdir(path))
+    def list_dir(self, path=".", cwd=None):
+        try: return "\n".join(os.listdir(os.path.join(cwd or self.cwd, path)))
         except: return "ERROR: Access Denied"
 
     def capture_screen(self):
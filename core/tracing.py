@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import logging
+import argparse
+import functools
+import contextvars
+from contextlib import contextmanager
+from config import settings
+
+_current_trace = contextvars.ContextVar("umbrasol_trace", default=None)
+_current_span = contextvars.ContextVar("umbrasol_span", default=None)
+
+class Trace:
+    """All spans recorded for one request. Appends only; written once at the end."""
+    __slots__ = ("trace_id", "request", "spans", "started", "attrs")
+
+    def __init__(self, request):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.request = request
+        self.spans = []
+        self.started = time.time()
+        self.attrs = {}
+
+    def breakdown(self):
+        """{stage: seconds} for the top-level stages plus the individual sense probes."""
+        stages = {}
+        for span in sorted(self.spans, key=lambda s: s["ts"]):
+            if span["depth"] == 1 or (span["depth"] == 2 and span["parent"] == "sense"):
+                stages[span["name"]] = stages.get(span["name"], 0.0) + span["ms"] / 1000
+        return stages
+
+class Tracer:
+    """
+    Span-style latency tracing across the orchestrator layers.
+    Request context travels in contextvars, so spans opened in gathered tasks,
+    the executor or OmegaMemory attach to the right request without passing
+    anything around. Outside a trace every call is a cheap no-op.
+    """
+    def __init__(self, path=None, enabled=None, sample_rate=None):
+        self.path = path or settings.TRACE_LOG_PATH
+        self.enabled = settings.TRACE_ENABLED if enabled is None else enabled
+        self.sample_rate = settings.TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.logger = logging.getLogger("Umbrasol.Tracing")
+
+    def start_trace(self, request):
+        """Begins a trace for the current task. Returns a handle for end_trace()."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        trace = Trace(request)
+        return trace, _current_trace.set(trace), _current_span.set(("request", 0))
+
+    def end_trace(self, handle, total_seconds, **attrs):
+        """Closes the trace: records the root span and appends all spans to the log."""
+        if handle is None:
+            return None
+        trace, trace_token, span_token = handle
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        trace.attrs.update(attrs)
+        trace.spans.append({
+            "name": "request", "parent": None, "depth": 0, "ts": trace.started,
+            "ms": round(total_seconds * 1000, 3), "attrs": trace.attrs,
+        })
+        self._write(trace)
+        return trace
+
+    def annotate(self, **attrs):
+        """Attaches request-level attributes (e.g. which layer answered) to the current trace."""
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.attrs.update(attrs)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        trace = _current_trace.get()
+        if trace is None:
+            yield attrs
+            return
+        parent, depth = _current_span.get()
+        token = _current_span.set((name, depth + 1))
+        wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs["error"] = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            trace.spans.append({
+                "name": name, "parent": parent, "depth": depth + 1, "ts": wall,
+                "ms": round((time.perf_counter() - start) * 1000, 3), "attrs": attrs,
+            })
+
+    def record(self, name, seconds, **attrs):
+        """Adds an already-measured span (e.g. time-to-first-token) to the current trace."""
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        parent, depth = _current_span.get()
+        trace.spans.append({
+            "name": name, "parent": parent, "depth": depth + 1, "ts": time.time() - seconds,
+            "ms": round(seconds * 1000, 3), "attrs": attrs,
+        })
+
+    def traced(self, name):
+        """Decorator: wraps an async function in a span."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _write(self, trace):
+        lines = "".join(
+            json.dumps({"trace": trace.trace_id, **span}, default=str) + "\n" for span in trace.spans
+        )
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > settings.TRACE_MAX_BYTES:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a") as f:
+                f.write(lines)
+        except OSError as e:
+            self.logger.warning(f"Trace write failed: {e}")
+
+# Shared process-wide tracer (configured from settings)
+tracer = Tracer()
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+def summarize(paths, last=None):
+    """Returns {span name: sorted durations in ms} from one or more trace logs."""
+    durations = {}
+    traces_seen = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            for line in f:
+                try:
+                    span = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if span["name"] == "request":
+                    traces_seen.append(span["trace"])
+                durations.setdefault(span["name"], []).append((span["trace"], span["ms"]))
+
+    keep = set(traces_seen[-last:]) if last else None
+    return {
+        name: sorted(ms for trace_id, ms in values if keep is None or trace_id in keep)
+        for name, values in durations.items()
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage latency report from Umbrasol traces.")
+    parser.add_argument("--path", default=settings.TRACE_LOG_PATH)
+    parser.add_argument("--last", type=int, default=None, help="Only the N most recent requests")
+    parser.add_argument("--include-rotated", action="store_true")
+    args = parser.parse_args(argv)
+
+    paths = ([args.path + ".1"] if args.include_rotated else []) + [args.path]
+    stats = summarize(paths, last=args.last)
+    if not stats:
+        print(f"No traces found at {args.path}")
+        return 1
+
+    print(f"{'stage':<28}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}")
+    for name in sorted(stats, key=lambda n: (n != "request", n)):
+        values = stats[name]
+        if not values:
+            continue
+        print(f"{name:<28}{len(values):>7}{percentile(values, 50):>11.2f}"
+              f"{percentile(values, 95):>11.2f}{percentile(values, 99):>11.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
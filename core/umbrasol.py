@@ -5,18 +5,36 @@ import asyncio
 import logging
 import atexit
 import signal
+import uuid
+import functools
+import contextvars
 from concurrent.futures import ThreadPoolExecutor
 
 from core.tools import OperatorInterface
 from core.brain_v2 import MonolithSoul
 from core.cache import SemanticCache
+from core.negative_cache import NegativeCache, classify
 from core.habit import HabitManager
+from core.prefetch import HabitPrefetcher
 from core.omega_memory import OmegaMemory
 from core.omega_safety import OmegaSafety
 from core.internet import Internet
+from core.executor import ActionExecutor, SpeculativeDispatch
+from core.sense import fan_out, format_breakdown, REQUIRED
+from core.tracing import tracer
+from core.reflex import ReflexEngine
+from core.reflex_compiler import ReflexCompiler
+from core.voice import SentenceBuffer
 import re
 from config import settings
 
+# The listener of the request being executed: shell output is streamed to it as "output" events
+_request_listener = contextvars.ContextVar("umbrasol_listener", default=None)
+# The request's shell session key: its shell actions share one pooled bash (cd/export carry over)
+_request_shell = contextvars.ContextVar("umbrasol_shell", default=None)
+# The request's working directory: the daemon's client's, not the daemon's own
+_request_cwd = contextvars.ContextVar("umbrasol_cwd", default=None)
+
 # Configure Logging
 logging.basicConfig(
     filename=os.path.join(settings.LOG_DIR, "umbrasol.log"),
@@ -36,9 +54,17 @@ class UmbrasolCore:
         self.hands = OperatorInterface()
         self.memory = OmegaMemory()
         self.cache = SemanticCache(memory=self.memory)
+        self.failures = NegativeCache(memory=self.memory)
         self.habit = HabitManager(memory=self.memory)
         self.safety = OmegaSafety()
         self.net = Internet()
+        self.executor = ActionExecutor(self._safe_dispatch, self.safety, self.memory, cwd=self._action_cwd)
+        self.reflex = ReflexEngine.from_settings()
+        self.reflex_compiler = ReflexCompiler(self.memory, self.safety)
+        self._learned_reflexes = []
+        self._reflex_task = None
+        self.prefetch = HabitPrefetcher(self.habit, self._dispatch, self.safety, warm=self.soul.warm)
+        self._prefetch_task = None
         
         # Ensure directories exist
         os.makedirs(settings.LOG_DIR, exist_ok=True)
@@ -78,6 +104,15 @@ class UmbrasolCore:
         
         # HEALTH MONITOR
         asyncio.create_task(self._health_monitor())
+
+        # WARM SHELLS (shell actions skip the fork/exec of a fresh /bin/sh)
+        if getattr(self.hands, "shells", None) is not None and settings.SHELL_POOL_ENABLED:
+            await self.hands.shells.fill()
+
+        # LEARNED REFLEXES (mined from finished tasks, refreshed while resident)
+        if settings.REFLEX_PROMOTION:
+            await self._refresh_reflexes()
+            self._reflex_task = asyncio.create_task(self._reflex_loop())
         
         # RESUME PATH
         await self._handle_task_resume()
@@ -85,174 +120,355 @@ class UmbrasolCore:
         if self.voice_mode:
             await self._safe_dispatch("gui_speak", "System online. I am evolving.")
 
-    async def shutdown(self):
-        self.logger.info("Graceful shutdown initiated...")
+    def start_prefetch(self):
+        """Resident modes: sample telemetry, watch the active window and prefetch the habitual next tool."""
+        telemetry = getattr(self.hands, "telemetry", None)
+        if telemetry is not None:
+            telemetry.start(wait=0)  # One-shot runs never start it: their stats are one direct read
+        if settings.PREFETCH_ENABLED and self._prefetch_task is None:
+            windows = getattr(self.hands, "windows", None)
+            if windows is not None and windows.start(wait=0).running:
+                watching = self.prefetch.follow(windows.changes())  # Focus changes are pushed, not polled
+            else:
+                watching = self.prefetch.watch(self.hands.read_active_window_async)
+            self._prefetch_task = asyncio.create_task(watching)
+
+    async def close(self):
+        """Releases resources without exiting (one-shot CLI runs end here)."""
+        if getattr(self, '_reflex_task', None):
+            self._reflex_task.cancel()
+            self._reflex_task = None
+        if getattr(self, '_prefetch_task', None):
+            self._prefetch_task.cancel()
+            self._prefetch_task = None
+            self.prefetch.close()
+        if getattr(getattr(self, 'hands', None), 'shells', None) is not None:
+            await self.hands.shells.close()
+        if getattr(getattr(self, 'hands', None), 'windows', None) is not None:
+            self.hands.windows.close()
+        if getattr(getattr(self, 'hands', None), 'telemetry', None) is not None:
+            self.hands.telemetry.close()
+        if hasattr(self, 'soul'):
+            await self.soul.close()
+        if hasattr(self, 'cache'):
+            await self.cache.close()
         if hasattr(self, 'memory'):
             await self.memory.close()
         self._cleanup_sync()
+
+    async def shutdown(self):
+        self.logger.info("Graceful shutdown initiated...")
+        await self.close()
         sys.exit(0)
 
+    async def _refresh_reflexes(self):
+        """Mines newly finished tasks and rebuilds the reflex engine if the learned rules changed."""
+        try:
+            await self.reflex_compiler.compile()
+            rules = await self.reflex_compiler.active_rules()
+        except Exception as e:
+            self.logger.warning(f"Reflex compile failed: {e}")
+            return
+        if rules != self._learned_reflexes:
+            self._learned_reflexes = rules
+            self.reflex = ReflexEngine.from_settings(learned=rules)
+            self.logger.info(f"Reflex engine rebuilt with {len(rules)} learned phrases")
+
+    async def _reflex_loop(self):
+        while True:
+            await asyncio.sleep(settings.REFLEX_COMPILE_INTERVAL)
+            await self._refresh_reflexes()
+
     async def _health_monitor(self):
         while True:
             await asyncio.sleep(settings.HEALTH_CHECK_INTERVAL)
             self.logger.debug("Health Check: ACTIVE")
 
     async def _handle_task_resume(self):
-        pending = await self.memory.get_pending_tasks()
+        pending = await self.memory.get_pending_tasks(limit=settings.MAX_TASK_RESUME)
         if pending:
-            max_resume = min(len(pending), settings.MAX_TASK_RESUME)
-            pending = pending[:max_resume]
             print(f"[RECOVERY] Resuming {len(pending)} tasks...")
             
             for task in pending:
                 asyncio.create_task(self.execute(task['request'], task_id=task['id']))
 
-    async def execute(self, user_request: str, task_id: str | None = None) -> str | None:
+    async def execute(self, user_request: str, task_id: str | None = None, listener=None,
+                      cwd: str | None = None) -> str | None:
+        """
+        Runs one request through the layers. `listener` is an optional async
+        callable that receives every talk/reasoning/action/result/output event
+        (used by the daemon to stream progress back to its clients). `cwd` is
+        the directory the request runs in (the daemon's client's); ours by default.
+        """
         start_time = time.time()
-        
+        trace_handle = tracer.start_trace(user_request)
+        listening = _request_listener.set(listener)
+        shell = _request_shell.set(uuid.uuid4().hex)
+        working = _request_cwd.set(cwd or os.getcwd())
+        try:
+            return await self._execute(user_request, task_id, listener, start_time)
+        finally:
+            await self.hands.release_shell(_request_shell.get())
+            _request_cwd.reset(working)
+            _request_shell.reset(shell)
+            _request_listener.reset(listening)
+            trace = tracer.end_trace(trace_handle, time.time() - start_time)
+            self._report_latency(trace, start_time)
+
+    async def _execute(self, user_request, task_id, listener, start_time):
+        print(f"\n[Request]: {user_request}")
+
+        # LAYERS 1-3: PARALLEL SENSE (window context, interrupt, cache, task record)
+        window = asyncio.ensure_future(self._safe_dispatch("see_active", ""))
+        probes = {
+            "see_active": (window, "UNKNOWN"),
+            "stop_speaking": (self._safe_dispatch("stop_speaking", ""), None),
+            "cache": (self._cache_lookup(user_request, window), None),
+            "failures": (self.failures.get(user_request), {}),
+        }
         if not task_id:
-            task_id = await self.memory.add_task(user_request)
+            probes["add_task"] = (self.memory.add_task(user_request), REQUIRED)
         
-        print(f"\n[Request]: {user_request}")
+        with tracer.span("sense"):
+            sensed, _ = await fan_out(probes, settings.SENSE_DEADLINE)
+        
+        task_id = sensed.get("add_task", task_id)
         self.logger.info(f"Task {task_id} Initiated")
-
-        # LAYER 1: CONTEXT SENSING
-        active_window = await self._safe_dispatch("see_active", "")
+        active_window = sensed["see_active"]
         context_str = f"[Active Window: {active_window}]"
-        
-        # LAYER 2: INTERRUPT PREVIOUS
-        await self._safe_dispatch("stop_speaking", "")
 
         # LAYER 3: SEMANTIC CACHE
-        cached = await self.cache.get(user_request)
+        cached = sensed["cache"]
         if cached:
             print(f"[CACHE] Hit!")
+            await self._emit(listener, "action", actions=[{"tool": cached['tool'], "cmd": cached['command']}])
+            tracer.annotate(path="cache")
             result = await self._safe_dispatch(cached['tool'], cached['command'])
+            await self._emit(listener, "result", tool=cached['tool'], content=str(result))
             await self._log_result(result, start_time, task_id, cached['tool'], cached['command'])
             await self.memory.update_task_checkpoint(task_id, "completed", {"stage": "cache_hit"})
             return str(result)
 
-        # LAYER 4: INSTANT HEURISTICS
-        req = user_request.lower().strip()
-        word_count = len(req.split())
-        instant_map = getattr(settings, "INSTANT_MAP", {})
-        
-        if word_count < settings.HEURISTIC_WORD_THRESHOLD:
-            for key, (tool, cmd) in instant_map.items():
-                if key in req:
-                    print(f"[INSTANT] Matched: {tool}")
-                    result = await self._safe_dispatch(tool, cmd)
-                    await self._log_result(result, start_time, task_id, tool, cmd)
-                    await self.memory.update_task_checkpoint(task_id, "completed", {"stage": "heuristic"})
-                    return str(result)
+        # LAYER 4: INSTANT HEURISTICS (compiled reflexes, one pass, may yield several intents)
+        with tracer.span("heuristics"):
+            reflexes = self.reflex.resolve(user_request)
+
+        if reflexes:
+            print(f"[INSTANT] Matched: {', '.join(a['tool'] for a in reflexes)}")
+            tracer.annotate(path="heuristic")
+            await self._emit(listener, "action", actions=reflexes)
+            if len(reflexes) == 1:
+                tool, cmd = reflexes[0]["tool"], reflexes[0]["cmd"]
+                result = await self._safe_dispatch(tool, cmd)
+                await self._emit(listener, "result", tool=tool, content=str(result))
+                await self._log_result(result, start_time, task_id, tool, cmd)
+                success = classify(result) is None
+            else:
+                async def on_result(tool, cmd, res_str):
+                    await self._emit(listener, "result", tool=tool, content=res_str)
+
+                success, results = await self.executor.run(reflexes, task_id, on_result=on_result)
+                for r in results:
+                    await self._log_result(r["result"], start_time, task_id, r["tool"], r["cmd"])
+                result = self.executor.format_results(results)
+            # The plan and its outcome are what the reflex compiler mines (learned rules get demoted on failure)
+            await self.memory.update_task_checkpoint(task_id, "completed",
+                                                     {"stage": "heuristic", "actions": reflexes, "success": success})
+            return str(result)
+
+        # LAYER 3b: FAILURE CACHE (a request that keeps failing the same way is not sent to the brain again)
+        known_failures = sensed["failures"]
+        verdict = self.failures.verdict(known_failures)
+        if verdict:
+            print(f"[FAILURE CACHE] {verdict}")
+            tracer.annotate(path="negative_cache")
+            await self._emit(listener, "talk", content=verdict)
+            await self.memory.update_task_checkpoint(task_id, "failed", {"stage": "negative_cache"})
+            return verdict
+        if known_failures:
+            context_str += f" {self.failures.hint(known_failures)}"
 
         # LAYER 5: AI BRAIN
         print(f"[AI] Thinking...")
+        tracer.annotate(path="brain")
         await self.memory.update_task_checkpoint(task_id, "running", {"stage": "thinking"})
-        
+
+        # Read-only ACT lines start as soon as they stream in; the plan below claims or discards them
+        speculation = SpeculativeDispatch(self._safe_dispatch, self.safety) if settings.SPECULATIVE_DISPATCH else None
+        try:
+            return await self._think_and_act(user_request, task_id, listener, context_str, active_window, speculation,
+                                             known_failures)
+        finally:
+            if speculation:
+                discarded = await speculation.discard()
+                if speculation.started:
+                    tracer.annotate(speculative_started=speculation.started, speculative_used=speculation.used,
+                                    speculative_discarded=discarded)
+
+    async def _action_cwd(self):
+        """
+        The directory the request's next action runs in, where snapshot
+        targets are resolved: its shell session's (which follows the plan's
+        cd's) if it has one, else the request's.
+        """
+        return await self.hands.shell_cwd(_request_shell.get()) or _request_cwd.get()
+
+    def _cache_context(self, active_window):
+        """Dimensions a cached command may depend on: app and time slot (as habits see them) and cwd."""
+        context = {**self.habit.context(active_window), "cwd": _request_cwd.get() or os.getcwd()}
+        if not isinstance(active_window, str) or active_window == "UNKNOWN":
+            context["app"] = None  # App-bound entries are neither served nor learned blind
+        return context
+
+    async def _cache_lookup(self, user_request, window):
+        """Cache probe: entries bound to the app need the window, so this waits for that probe."""
+        return await self.cache.get(user_request, context=self._cache_context(await window))
+
+    async def _think_and_act(self, user_request, task_id, listener, context_str, active_window, speculation,
+                             known_failures=None):
         full_message = ""
         actions = []
-        
-        print(f"[AI] ", end="", flush=True)
-        async for chunk_data in self.soul.execute_task_stream(user_request, context=context_str):
-            if chunk_data["type"] == "talk":
-                content = chunk_data["content"]
-                # Filter out raw SAY: or THINK: leftovers if they slip through
-                content = re.sub(r"^(SAY|THINK|ACT):?\s*", "", content, flags=re.IGNORECASE)
-                full_message += content
-                sys.stdout.write(content)
-                sys.stdout.flush()
-                if self.voice_mode:
-                    await self._safe_dispatch("gui_speak", content.strip())
-            
-            elif chunk_data["type"] == "reasoning":
-                content = chunk_data["content"].strip()
-                if content:
-                    if "[Thinking]:" not in full_message:
-                        sys.stdout.write(f"\n[Thinking]: ")
-                        full_message += "[Thinking]: "
-                    sys.stdout.write(f"{content} ")
-                    sys.stdout.flush()
-            
-            elif chunk_data["type"] == "action":
-                actions.extend(chunk_data.get("actions", []))
-        print("\n") # End the AI response line
+        # Voice: streamed text is spoken in sentence-sized units, not per token chunk
+        speech = SentenceBuffer() if self.voice_mode else None
 
+        print(f"[AI] ", end="", flush=True)
+        with tracer.span("brain"):
+            mark = time.perf_counter()
+            first_chunk = True
+            async for chunk_data in self.soul.execute_task_stream(user_request, context=context_str):
+                if first_chunk:
+                    tracer.record("brain.ttft", time.perf_counter() - mark)
+                    first_chunk = False
 
-        # EXECUTION PATH
-        success = True
-        last_result = None
-        
-        for action in actions:
-            tool = action.get("tool", "stats")
-            cmd = action.get("cmd", "")
-            
-            # Safety Guards
-            risk = self.safety.analyze_risk(f"{tool} {cmd}")
-            if risk != "LOW":
-                print(f"[SAFETY] {risk} Risk Detected!")
-                if risk in ["MEDIUM", "HIGH"]:
-                    self.safety.snapshot(cmd) # Sync snapshot is okay here
-
-            # Self-Correction Loop
-            action_success = False
-            for attempt in range(settings.MAX_RETRIES + 1):
-                await self.memory.update_task_checkpoint(task_id, "running", {"stage": "executing", "tool": tool, "cmd": cmd})
-                
-                result = await self._safe_dispatch(tool, cmd)
-                last_result = result
-                res_str = str(result)
-                print(f"[Result]: {res_str[:200]}")
-               
-                if "ERROR" not in res_str and "BLOCKED" not in res_str:
-                    action_success = True
-                    break
-                
-                if attempt < settings.MAX_RETRIES:
-                    print(f"[AUTO-FIX] Retrying...")
-                    await asyncio.sleep(1) # Simple backoff
-            
-            if not action_success:
-                success = False
-                break
-        
-        # SYNTHESIS PASS: If tools were used, inform the AI of the result to provide a final summary
-        if actions and success:
-            print(f"[AI] Synthesizing results...")
-            async for chunk_data in self.soul.synthesis_stream(user_request, last_result):
                 if chunk_data["type"] == "talk":
                     content = chunk_data["content"]
+                    # Filter out raw SAY: or THINK: leftovers if they slip through
+                    content = re.sub(r"^(SAY|THINK|ACT):?\s*", "", content, flags=re.IGNORECASE)
                     full_message += content
                     sys.stdout.write(content)
                     sys.stdout.flush()
+                    await self._emit(listener, "talk", content=content)
+                    await self._speak(speech, content)
+                
+                elif chunk_data["type"] == "reasoning":
+                    content = chunk_data["content"].strip()
+                    if content:
+                        if "[Thinking]:" not in full_message:
+                            sys.stdout.write(f"\n[Thinking]: ")
+                            full_message += "[Thinking]: "
+                        sys.stdout.write(f"{content} ")
+                        sys.stdout.flush()
+                        await self._emit(listener, "reasoning", content=content)
+                
+                elif chunk_data["type"] == "early_action":
+                    if speculation:
+                        speculation.offer(chunk_data["action"])
 
+                elif chunk_data["type"] == "action":
+                    actions.extend(chunk_data.get("actions", []))
+                    await self._emit(listener, "action", actions=chunk_data.get("actions", []))
+        await self._speak(speech, final=True)
+        print("\n") # End the AI response line
+
+
+        # EXECUTION PATH (independent reads run concurrently, writes stay ordered)
+        async def on_result(tool, cmd, res_str):
+            await self._emit(listener, "result", tool=tool, content=res_str)
+
+        with tracer.span("tools", count=len(actions)):
+            success, results = await self.executor.run(actions, task_id, on_result=on_result, speculation=speculation,
+                                                       known_failures=known_failures)
+        last_result = results[-1]["result"] if results else None
+        
+        # SYNTHESIS PASS: If tools were used, inform the AI of the results to provide a final summary
+        if actions and success:
+            print(f"[AI] Synthesizing results...")
+            with tracer.span("synthesis"):
+                async for chunk_data in self.soul.synthesis_stream(user_request, self.executor.format_results(results)):
+                    if chunk_data["type"] == "talk":
+                        content = chunk_data["content"]
+                        full_message += content
+                        sys.stdout.write(content)
+                        sys.stdout.flush()
+                        await self._emit(listener, "talk", content=content)
+                        await self._speak(speech, content)
+                await self._speak(speech, final=True)
         
         # Patterns & Learning
         if success and len(actions) == 1:
-            await self.cache.set(user_request, actions[0]['tool'], actions[0]['cmd'])
-            await self.habit.learn(active_window, f"{actions[0]['tool']}:{actions[0]['cmd']}")
+            with tracer.span("learn"):
+                await self.cache.set(user_request, actions[0]['tool'], actions[0]['cmd'],
+                                     context=self._cache_context(active_window))
+                await self.habit.learn(active_window, f"{actions[0]['tool']}:{actions[0]['cmd']}")
 
-        await self.memory.update_task_checkpoint(task_id, "completed" if success else "failed", {"stage": "finished"})
-        print(f"[Time]: {time.time() - start_time:.3f}s")
+        if not success:
+            await self.failures.record(user_request, results)
+        elif known_failures:
+            await self.failures.clear(user_request)
+
+        plan = [{"tool": a.get("tool"), "cmd": a.get("cmd", "")} for a in actions]
+        await self.memory.update_task_checkpoint(task_id, "completed" if success else "failed",
+                                                 {"stage": "finished", "actions": plan})
         
         return full_message if full_message else str(last_result) if last_result else None
 
+    def _report_latency(self, trace, start_time):
+        """Prints the total and, when the request was traced, its per-stage breakdown."""
+        print(f"[Time]: {time.time() - start_time:.3f}s")
+        if trace is not None:
+            breakdown = format_breakdown(trace.breakdown())
+            print(f"[Latency]: {breakdown}")
+            self.logger.info(f"Trace {trace.trace_id} Latency: {breakdown}")
+
+    async def _speak(self, speech, content="", final=False):
+        """Feeds streamed text to the sentence buffer and speaks every unit it completes."""
+        if speech is None:
+            return
+        units = speech.feed(content) + (speech.flush() if final else [])
+        for unit in units:
+            await self._safe_dispatch("gui_speak", unit)
+
+    async def _emit(self, listener, event_type, **payload):
+        """Forwards an event to the request listener without letting it break the task."""
+        if listener is None:
+            return
+        try:
+            await listener({"type": event_type, **payload})
+        except Exception as e:
+            self.logger.warning(f"Listener Error ({event_type}): {e}")
+
+    async def _stream_output(self, stream, text):
+        """Shell output as it arrives, for the listener of the request that ran the command."""
+        await self._emit(_request_listener.get(), "output", tool="shell", stream=stream, content=text)
+
     async def _safe_dispatch(self, tool, cmd):
+        """Traced entry point for every tool call (a fresh prefetched result stands in for the call)."""
+        prefetched = self.prefetch.take(tool, cmd, _request_cwd.get())
+        if prefetched is not None:
+            tracer.annotate(prefetch="hit")
+            with tracer.span(f"tool.{tool}", prefetched=True):
+                return await prefetched
+        with tracer.span(f"tool.{tool}"):
+            return await self._dispatch(tool, cmd)
+
+    async def _dispatch(self, tool, cmd):
         """Unified dispatch to tools.py, handling both sync and async."""
+        cwd = _request_cwd.get()
         try:
             # Dispatch mapping
             dispatch = {
                 "physical": self.hands.get_physical_state,
                 "existence": self.hands.get_existence_stats,
                 "stats": self.hands.get_system_stats,
-                "see_active": self.hands.read_active_window,
+                "see_active": self.hands.read_active_window_async,
                 "see_raw": self.hands.ocr_screen,
                 "proc_list": self.hands.get_process_list,
                 "power": lambda: self.hands.power_control(cmd),
-                "shell": lambda: self.hands.execute_shell(cmd),
+                "shell": functools.partial(self.hands.execute_shell_async, cmd, on_output=self._stream_output,
+                                           session=_request_shell.get(), cwd=cwd),
                 "gui_speak": lambda: self.hands.gui_speak(cmd),
                 "stop_speaking": self.hands.stop_speaking,
-                "ls": lambda: self.hands.list_dir(cmd or "."),
+                "ls": lambda: self.hands.list_dir(cmd or ".", cwd=cwd),
                 "net": lambda: self.net.swift_search(cmd),
             }
             
@@ -282,6 +498,7 @@ class UmbrasolCore:
 
         print("[VOICE] Listening (Async)...")
         self.voice_mode = True 
+        self.start_prefetch()
         
         while True:
             # We use to_thread for ear.listen_once because VOSK is blocking
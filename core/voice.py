@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import threading
+import subprocess
+from config import settings
+
+# A sentence ends at terminal punctuation followed by whitespace (so "3.5" or "e.g.x" don't split) or a newline
+SENTENCE_END = re.compile(r"[.!?;:]+[\"')\]]*(?=\s)|\n")
+MARKUP = re.compile(r"[*_#`]")
+
+class SentenceBuffer:
+    """
+    Gathers streamed tokens into speakable units: a whole sentence, or the
+    first SENTENCE_BUFFER_WORDS words of a long one (cut at the last comma
+    in reach when there is one), so speech starts before the sentence ends.
+    """
+    def __init__(self, max_words=None):
+        self.max_words = max_words or settings.SENTENCE_BUFFER_WORDS
+        self._text = ""
+
+    def feed(self, chunk):
+        """Adds streamed text; returns the units that are now complete."""
+        self._text += chunk
+        units = []
+        while True:
+            cut = self._next_cut()
+            if cut is None:
+                break
+            unit, self._text = self._text[:cut], self._text[cut:]
+            unit = self._clean(unit)
+            if unit:
+                units.append(unit)
+        return units
+
+    def flush(self):
+        """Whatever is left when the stream ends."""
+        unit, self._text = self._clean(self._text), ""
+        return [unit] if unit else []
+
+    def _next_cut(self):
+        match = SENTENCE_END.search(self._text)
+        words = list(re.finditer(r"\S+", self._text[:match.end()] if match else self._text))
+        if match and len(words) <= self.max_words:
+            return match.end()
+        # Long sentence: only cut once the max_words-th word is complete (another word has started)
+        if len(words) <= self.max_words:
+            return None
+        limit = words[self.max_words - 1].end()
+        comma = self._text.rfind(",", 0, limit)
+        return comma + 1 if comma > 0 else limit
+
+    @staticmethod
+    def _clean(text):
+        return " ".join(MARKUP.sub("", text).split())
+
+class SpeechPipeline:
+    """
+    Layer 7: The Vocal Cords.
+    One long-lived Piper process turns lines of text into raw PCM and a pump
+    thread streams it into one long-lived audio sink (paplay/aplay), so the
+    voice model loads once instead of once per utterance. interrupt() drops
+    queued speech by restarting both processes, but only while something is
+    actually being spoken.
+    """
+    def __init__(self, model_path=None, synth_cmd=None, sink_cmd=None, sample_rate=None):
+        self.model_path = model_path or settings.PIPER_MODEL_PATH
+        self.sample_rate = sample_rate or self._sample_rate(self.model_path)
+        self.synth_cmd = synth_cmd or self._piper_cmd(self.model_path)
+        self.sink_cmd = sink_cmd or self._sink_cmd(self.sample_rate)
+        self.bytes_per_sec = self.sample_rate * 2  # 16-bit mono
+        self.logger = logging.getLogger("Umbrasol.Voice")
+        self._lock = threading.RLock()
+        self._synth = None
+        self._sink = None
+        self._busy_until = 0.0  # Monotonic time the audio handed to the sink runs out
+        self._awaiting = None  # perf_counter of the first line said while idle
+        self.first_audio = []  # Seconds from an idle say() to its first PCM byte
+        self.audio_seconds = 0.0
+
+    @staticmethod
+    def available(model_path=None):
+        model_path = model_path or settings.PIPER_MODEL_PATH
+        return bool(model_path and os.path.exists(model_path) and shutil.which("piper")
+                    and (shutil.which("paplay") or shutil.which("aplay")))
+
+    @property
+    def running(self):
+        return self._synth is not None and self._synth.poll() is None
+
+    @property
+    def speaking(self):
+        return self._awaiting is not None or time.monotonic() < self._busy_until
+
+    def start(self):
+        """Spawns the sink and the synthesiser (idempotent)."""
+        with self._lock:
+            if self.running:
+                return
+            self._kill()
+            sink = subprocess.Popen(self.sink_cmd, stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            synth = subprocess.Popen(self.synth_cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL)
+            self._sink, self._synth = sink, synth
+            threading.Thread(target=self._pump, args=(synth, sink), daemon=True).start()
+            self.logger.info(f"Speech pipeline started (synth pid {synth.pid}, sink pid {sink.pid})")
+
+    def say(self, text):
+        """Queues one line of speech; returns immediately."""
+        line = " ".join(text.split())
+        if not line:
+            return False
+        with self._lock:
+            for attempt in range(2):
+                self.start()
+                if not self.speaking:
+                    self._awaiting = time.perf_counter()
+                try:
+                    self._synth.stdin.write((line + "\n").encode())
+                    self._synth.stdin.flush()
+                    return True
+                except (BrokenPipeError, OSError) as e:
+                    self.logger.warning(f"Speech pipeline broke ({e}), restarting")
+                    self._kill()
+        return False
+
+    def interrupt(self):
+        """Silences queued and playing speech. Returns True if anything was cut off."""
+        with self._lock:
+            if not self.speaking:
+                return False
+            self._kill()
+        # Reload the voice in the background so the next answer doesn't pay for it
+        threading.Thread(target=self.start, daemon=True).start()
+        return True
+
+    def close(self):
+        with self._lock:
+            self._kill()
+
+    # --- internals ---
+
+    def _pump(self, synth, sink):
+        fd = synth.stdout.fileno()
+        try:
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                now = time.perf_counter()
+                if self._awaiting is not None and synth is self._synth:
+                    self.first_audio.append(now - self._awaiting)
+                    self._awaiting = None
+                duration = len(chunk) / self.bytes_per_sec
+                self._busy_until = max(self._busy_until, time.monotonic()) + duration
+                self.audio_seconds += duration
+                sink.stdin.write(chunk)
+                sink.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError):
+            pass  # Killed by interrupt()/close()
+
+    def _kill(self):
+        for proc in (self._synth, self._sink):
+            if proc is None:
+                continue
+            for stream in (proc.stdin, proc.stdout):
+                try:
+                    if stream:
+                        stream.close()
+                except OSError:
+                    pass
+            if proc.poll() is None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.wait()
+        self._synth = self._sink = None
+        self._awaiting = None
+        self._busy_until = 0.0
+
+    @staticmethod
+    def _sample_rate(model_path):
+        """Piper voices ship a <model>.onnx.json with their sample rate (lessac-low is 16 kHz)."""
+        try:
+            with open(f"{model_path}.json") as f:
+                return int(json.load(f)["audio"]["sample_rate"])
+        except (OSError, TypeError, KeyError, ValueError):
+            return settings.TTS_SAMPLE_RATE
+
+    @staticmethod
+    def _piper_cmd(model_path):
+        return ["piper", "--model", str(model_path), "--output-raw", "--length-scale", str(settings.TTS_LENGTH_SCALE)]
+
+    @staticmethod
+    def _sink_cmd(sample_rate):
+        if shutil.which("paplay"):
+            return ["paplay", "--raw", f"--rate={sample_rate}", "--channels=1", "--format=s16le"]
+        return ["aplay", "-q", "-t", "raw", "-r", str(sample_rate), "-c", "1", "-f", "S16_LE"]
@@ -0,0 +1,209 @@
+import os
+import re
+import shutil
+import asyncio
+import logging
+import threading
+import subprocess
+from config import settings
+
+UNKNOWN = "UNKNOWN"
+
+_ACTIVE = re.compile(r"^_NET_ACTIVE_WINDOW\(WINDOW\): window id # (0x[0-9a-fA-F]+)")
+_NAME = re.compile(r'^(_NET_WM_NAME|WM_NAME)(?:\([^)]*\) = "(.*)"|:\s+not found\.)\s*$')
+_ESCAPE = re.compile(r"\\(.)")
+
+class WindowTracker:
+    """
+    Layer 1b: Window Tracker.
+    Follows the focused window instead of asking for it on every request.
+    One `xprop -spy` on the root window reports each _NET_ACTIVE_WINDOW
+    change. A second one, on the focused window, reports its title changes
+    (a browser switching tabs) and is replaced on every focus change. The
+    current title is kept in memory, so a read is an attribute lookup.
+    Subscribers are called on each change from the tracker's threads;
+    changes() turns that into an async iterator. A root spy that exits
+    (X restarted) is respawned after WINDOW_TRACKER_RESTART_DELAY seconds.
+    """
+    def __init__(self, root_cmd=None, title_cmd=None, restart_delay=None):
+        self.root_cmd = root_cmd or ["xprop", "-root", "-spy", "_NET_ACTIVE_WINDOW"]
+        # window id -> argv of the spy on that window's title
+        self.title_cmd = title_cmd or (lambda window_id: ["xprop", "-id", window_id, "-spy", "_NET_WM_NAME", "WM_NAME"])
+        self.restart_delay = settings.WINDOW_TRACKER_RESTART_DELAY if restart_delay is None else restart_delay
+        self.logger = logging.getLogger("Umbrasol.WindowTracker")
+        self.window_id = None
+        self.title = UNKNOWN
+        self.changes_seen = 0
+        self.restarts = 0
+        self._names = {}  # Title properties reported for the focused window
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._ready = threading.Event()  # Set once the first title (or no window) is known
+        self._stopped = threading.Event()
+        self._root = None
+        self._title_spy = None
+        self._thread = None
+
+    @staticmethod
+    def available():
+        return os.name == "posix" and bool(os.environ.get("DISPLAY")) and shutil.which("xprop") is not None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stopped.is_set()
+
+    def start(self, wait=None):
+        """Starts following the focus (idempotent); waits up to `wait` seconds for the first title."""
+        with self._lock:
+            if self._thread is None and not self._stopped.is_set():
+                try:
+                    root = self._spawn(self.root_cmd)
+                except OSError as e:
+                    self.logger.warning(f"Window tracker failed to start: {e}")
+                    self._stopped.set()
+                    return self
+                self._thread = threading.Thread(target=self._follow_root, args=(root,), daemon=True,
+                                                name="window-tracker")
+                self._thread.start()
+        self._ready.wait(settings.WINDOW_TRACKER_FIRST_WAIT if wait is None else wait)
+        return self
+
+    def subscribe(self, callback):
+        """Calls callback(window_id, title) on every change; returns the function that unsubscribes it."""
+        with self._lock:
+            self._subscribers.append(callback)
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    async def changes(self):
+        """Async iterator over titles: the current one, then one per change."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        def forward(window_id, title):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, title)
+            except RuntimeError:  # The loop is gone
+                pass
+        with self._lock:  # A change lands either in the snapshot or in the queue, never both
+            unsubscribe = self.subscribe(forward)
+            current = self.title if self._ready.is_set() else None
+        try:
+            if current is not None:
+                yield current
+            while True:
+                yield await queue.get()
+        finally:
+            unsubscribe()
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            spies, self._root, self._title_spy = [self._root, self._title_spy], None, None
+        for proc in spies:
+            self._stop(proc)
+
+    def stats(self):
+        return {"window_id": self.window_id, "title": self.title, "changes": self.changes_seen,
+                "restarts": self.restarts, "running": self.running}
+
+    # --- internals ---
+
+    def _spawn(self, cmd):
+        return subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                text=True, encoding="utf-8", errors="replace", bufsize=1)
+
+    def _follow_root(self, root):
+        while True:
+            with self._lock:
+                self._root = root
+            for line in root.stdout:
+                self._on_active(line)
+            root.wait()
+            if self._stopped.is_set():
+                return
+            self.restarts += 1
+            self.logger.warning(f"Window spy exited ({root.returncode}); respawning in {self.restart_delay}s")
+            self._focus(None)
+            if self._stopped.wait(self.restart_delay):
+                return
+            try:
+                root = self._spawn(self.root_cmd)
+            except OSError as e:
+                self.logger.warning(f"Window tracker stopped: {e}")
+                return
+
+    def _follow_title(self, spy, window_id):
+        for line in spy.stdout:
+            self._on_title(window_id, line)
+        spy.wait()
+
+    def _on_active(self, line):
+        match = _ACTIVE.match(line)
+        window_id = match.group(1) if match and int(match.group(1), 16) else None
+        if window_id != self.window_id:
+            self._focus(window_id)
+        elif window_id is None and not self._ready.is_set():
+            self._publish(None, UNKNOWN)  # Nothing focused at start: that is the first answer
+
+    def _focus(self, window_id):
+        """Switches the title spy to a newly focused window (None: no window, or X is gone)."""
+        with self._lock:
+            old, self._title_spy = self._title_spy, None
+            self.window_id = window_id
+            self._names = {}
+            if window_id is not None and not self._stopped.is_set():
+                try:
+                    self._title_spy = self._spawn(self.title_cmd(window_id))
+                    threading.Thread(target=self._follow_title, args=(self._title_spy, window_id),
+                                     daemon=True).start()
+                except OSError as e:
+                    self.logger.warning(f"Title spy failed for {window_id}: {e}")
+                    window_id = None
+        self._stop(old)
+        if window_id is None:
+            self._publish(None, UNKNOWN)
+
+    def _on_title(self, window_id, line):
+        match = _NAME.match(line)
+        if match is None:
+            return
+        with self._lock:
+            if window_id != self.window_id:
+                return  # A late line from the previously focused window
+            self._names[match.group(1)] = _ESCAPE.sub(r"\1", match.group(2) or "")
+            title = self._names.get("_NET_WM_NAME")
+            if not title:
+                if "WM_NAME" not in self._names:
+                    return  # xprop reports WM_NAME next; don't publish an UNKNOWN in between
+                title = self._names["WM_NAME"] or UNKNOWN
+        self._publish(window_id, title)
+
+    def _publish(self, window_id, title):
+        with self._lock:
+            changed = title != self.title
+            self.title = title
+            if changed:
+                self.changes_seen += 1
+            subscribers = list(self._subscribers)
+            self._ready.set()
+        if not changed:
+            return
+        for callback in subscribers:
+            try:
+                callback(window_id, title)
+            except Exception as e:
+                self.logger.error(f"Window subscriber failed: {e}")
+
+    @staticmethod
+    def _stop(proc):
+        if proc is None or proc.poll() is not None:
+            return
+        proc.terminate()
+        try:
+            proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
@@ -1,24 +1,77 @@
 import sys
 import os
+import json
 import asyncio
 
 # Ensure we can import from core
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from core.umbrasol import UmbrasolCore
+# NOTE: UmbrasolCore is imported lazily. The client path must stay cheap so a
+# request forwarded to a warm daemon does not pay the full boot cost again.
 
-async def main():
-    voice_mode = "--voice" in sys.argv
+async def run_local(command, voice_mode=False):
+    from core.umbrasol import UmbrasolCore
     agent = UmbrasolCore(voice_mode=voice_mode)
     await agent.initialize()
-    
-    if voice_mode:
-        await agent.listen_loop()
+
+    try:
+        if voice_mode:
+            await agent.listen_loop()
+        else:
+            return await agent.execute(command)
+    finally:
+        await agent.close()
+
+async def run_daemon():
+    from core.umbrasol import UmbrasolCore
+    from core.daemon import UmbrasolDaemon
+    agent = UmbrasolCore(voice_mode=False)
+    await agent.initialize()
+    agent.start_prefetch()
+    await UmbrasolDaemon(agent).serve_forever()
+
+async def run_client(command):
+    """
+    Returns (handled, result). Not handled means no daemon took the request
+    (connecting or sending failed), so it is safe to run it locally. A
+    daemon lost after that may have run some steps already: RequestLost.
+    """
+    from core.daemon import UmbrasolClient
+    client = UmbrasolClient()
+    if not client.is_available():
+        return False, None
+    try:
+        return True, await client.execute(command)
+    except (OSError, asyncio.TimeoutError):
+        return False, None
+
+async def main():
+    voice_mode = "--voice" in sys.argv
+
+    if "--serve" in sys.argv:
+        await run_daemon()
+    elif "--metrics" in sys.argv:
+        from core.daemon import UmbrasolClient
+        client = UmbrasolClient()
+        if not client.is_available():
+            print("No daemon running (start one with --serve).")
+        else:
+            print(json.dumps(await client.metrics(), indent=2))
+    elif voice_mode:
+        await run_local(None, voice_mode=True)
     elif len(sys.argv) > 1:
         # Reconstruct command excluding flags
         command = " ".join([arg for arg in sys.argv[1:] if not arg.startswith("--")])
         if command:
-            result = await agent.execute(command)
+            handled, result = False, None
+            if "--local" not in sys.argv:
+                from core.daemon import RequestLost
+                try:
+                    handled, result = await run_client(command)
+                except RequestLost as e:
+                    sys.exit(f"\n[Umbrasol]: ERROR: {e}")  # Not retried locally: its steps may have run
+            if not handled:
+                result = await run_local(command)
             if result:
                 print(f"\n[Umbrasol]: {result}")
         else:
@@ -26,7 +79,10 @@ async def main():
     else:
         print("\nUsage:")
         print("  python main.py --voice         # Hands-free mode")
-        print("  python main.py \"command\"       # Single execution")
+        print("  python main.py --serve         # Resident daemon (keeps the core warm)")
+        print("  python main.py --metrics       # Prefetch and cache hit rates of the daemon")
+        print("  python main.py \"command\"       # Single execution (uses the daemon if running)")
+        print("  python main.py --local \"cmd\"   # Single execution, always in-process")
 
 if __name__ == "__main__":
     try:
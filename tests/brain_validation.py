@@ -0,0 +1,94 @@
+import sys
+import os
+import json
+import asyncio
+import unittest
+from unittest.mock import patch
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.brain_v2 import Brain
+
+class FakeOllama:
+    """Minimal HTTP/1.1 keep-alive server streaming /api/generate chunks."""
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":")[1])
+                await reader.readexactly(length)
+                self.requests += 1
+
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n\r\n")
+                lines = [json.dumps({"response": t, "done": False}) for t in self.tokens]
+                lines.append(json.dumps({"done": True, "eval_count": len(self.tokens), "eval_duration": 500_000_000}))
+                for line in lines:
+                    data = (line + "\n").encode()
+                    writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+class TestPooledBrain(unittest.TestCase):
+    """Keep-alive reuse and per-call latency stats of Brain.think_stream."""
+
+    def test_calls_share_one_connection(self):
+        async def scenario():
+            ollama = FakeOllama(["THINK: ", "hi", "\nACT: stats"])
+            brain = Brain(base_url=await ollama.start())
+            try:
+                first = [c async for c in brain.think_stream("a")]
+                second = [c async for c in brain.think_stream("b")]
+                return ollama, first, second, brain.last_stats
+            finally:
+                await brain.close()
+                await ollama.stop()
+
+        ollama, first, second, stats = asyncio.run(scenario())
+        self.assertEqual("".join(first), "THINK: hi\nACT: stats")
+        self.assertEqual(first, second)
+        self.assertEqual(ollama.requests, 2)
+        self.assertEqual(ollama.connections, 1)
+        self.assertEqual(stats["tokens"], 3)
+        self.assertEqual(stats["tokens_per_sec"], 6.0)  # Ollama's eval_count / eval_duration
+        self.assertIsNotNone(stats["ttft"])
+
+    def test_connection_error_is_reported_and_client_closes(self):
+        async def scenario():
+            brain = Brain(base_url="http://127.0.0.1:9")
+            with patch("core.brain_v2.settings.BRAIN_CONNECT_TIMEOUT", 0.5):
+                chunks = [c async for c in brain.think_stream("x")]
+            client = brain._client
+            await brain.close()
+            return chunks, client, brain
+
+        chunks, client, brain = asyncio.run(scenario())
+        self.assertTrue(chunks[0].startswith("ERROR:"))
+        self.assertTrue(client.is_closed)
+        self.assertIsNone(brain._client)
+        self.assertIsNone(brain.last_stats["ttft"])
+
+if __name__ == "__main__":
+    unittest.main()
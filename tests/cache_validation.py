@@ -0,0 +1,240 @@
+import sys
+import os
+import asyncio
+import sqlite3
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.cache import SemanticCache
+from core.omega_memory import OmegaMemory
+from core.semantic_index import HashedNgramEmbedder, VectorIndex
+
+class TestEmbedding(unittest.TestCase):
+    """Hashed n-gram vectors: fillers ignored, paraphrases close, unrelated requests far."""
+
+    def setUp(self):
+        self.embedder = HashedNgramEmbedder(dim=256)
+
+    def similarity(self, a, b):
+        return float(self.embedder.embed(a) @ self.embedder.embed(b))
+
+    def test_fillers_and_punctuation_do_not_matter(self):
+        self.assertAlmostEqual(self.similarity("check the battery", "battery status?"), 1.0, places=5)
+
+    def test_unrelated_requests_are_far_apart(self):
+        self.assertLess(self.similarity("battery level", "list files in core"), 0.5)
+
+    def test_nearest_row(self):
+        index = VectorIndex(256)
+        for i, text in enumerate(["battery level", "cpu load", "list files in core"]):
+            index.add(str(i), self.embedder.embed(text))
+        key, score = index.nearest(self.embedder.embed("what is the cpu load"))
+        self.assertEqual(key, "1")
+        self.assertGreater(score, 0.99)
+
+class TestSemanticCache(unittest.TestCase):
+    """Exact tier first, paraphrase tier second, argument guard, index persistence."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "memory.db")
+
+    def run_with_cache(self, scenario):
+        async def wrapper():
+            memory = OmegaMemory(db_path=self.path)
+            cache = SemanticCache(memory=memory)
+            try:
+                return await scenario(cache)
+            finally:
+                await cache.close()
+                await memory.close()
+        return asyncio.run(wrapper())
+
+    def test_paraphrase_hits_semantic_tier(self):
+        async def scenario(cache):
+            await cache.set("show me the battery level", "physical", "")
+            await cache.memory.flush()
+            exact = await cache.get("Show me the battery level ")
+            fuzzy = await cache.get("battery level please")
+            miss = await cache.get("list running processes")
+            return exact, fuzzy, miss, cache.stats()
+        exact, fuzzy, miss, stats = self.run_with_cache(scenario)
+        self.assertEqual(exact["tool"], "physical")
+        self.assertEqual(fuzzy["tool"], "physical")
+        self.assertIsNone(miss)
+        self.assertEqual((stats["lru_hits"], stats["semantic_hits"], stats["lookups"]), (1, 1, 3))
+
+    def test_argument_tools_need_their_arguments(self):
+        async def scenario(cache):
+            cache.threshold = 0.5  # Close enough on similarity alone; only the guard tells them apart
+            await cache.set("search the weather in paris", "net", "weather in paris")
+            await cache.memory.flush()
+            return await cache.get("search weather in paris please"), await cache.get("search the weather in parma")
+        same, other = self.run_with_cache(scenario)
+        self.assertEqual(same["command"], "weather in paris")
+        self.assertIsNone(other)
+
+    def test_index_is_saved_and_rebuilt(self):
+        async def populate(cache):
+            await cache.set("show cpu load", "stats", "")
+        self.run_with_cache(populate)
+        self.assertTrue(os.path.exists(os.path.join(os.path.dirname(self.path), "memory.vectors.npz")))
+
+        async def reload(cache):
+            hit = await cache.get("cpu load now")
+            return hit, len(cache.index)
+        hit, entries = self.run_with_cache(reload)
+        self.assertEqual((hit["tool"], entries), ("stats", 1))
+
+        # A row the saved index never saw forces a rebuild from the table
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("INSERT INTO semantic_cache (hash, tool, command, request) VALUES ('x', 'ls', '.', 'list files')")
+        hit, entries = self.run_with_cache(reload)
+        self.assertEqual(entries, 2)
+
+class TestCacheTiers(unittest.TestCase):
+    """In-process LRU in front of the table: eviction, TTL, hit tracking and pruning."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "memory.db")
+
+    def run_with_cache(self, scenario, **kwargs):
+        async def wrapper():
+            memory = OmegaMemory(db_path=self.path)
+            cache = SemanticCache(memory=memory, **kwargs)
+            cache.embedder = None  # Exact tiers only
+            try:
+                return await scenario(cache)
+            finally:
+                await cache.close()
+                await memory.close()
+        return asyncio.run(wrapper())
+
+    def test_lru_evicts_least_recently_used_and_falls_back_to_table(self):
+        async def scenario(cache):
+            for name in ("a", "b", "c"):
+                await cache.set(f"request {name}", "stats", name)
+            await cache.get("request a")  # a is now newer than b
+            await cache.set("request d", "stats", "d")  # evicts b
+            await cache.memory.flush()
+            evicted = cache._hash("request b") not in cache._lru
+            b = await cache.get("request b")  # served by the table, back in the LRU
+            return evicted, b, cache.stats()
+        evicted, b, stats = self.run_with_cache(scenario, max_entries=3)
+        self.assertTrue(evicted)
+        self.assertEqual(b["command"], "b")
+        self.assertEqual((stats["lru_hits"], stats["exact_hits"], stats["evictions"]), (1, 1, 2))
+
+    def test_idle_entries_expire(self):
+        async def scenario(cache):
+            await cache.set("battery", "physical", "")
+            await cache.memory.flush()
+            fresh = await cache.get("battery")
+            with sqlite3.connect(self.path) as conn:
+                conn.execute("UPDATE semantic_cache SET last_hit = datetime('now', '-2 hours')")
+            key = cache._hash("battery")
+            entry, _ = cache._lru[key]
+            cache._lru[key] = (entry, time.time() - 7200)
+            return fresh, await cache.get("battery"), cache.stats()
+        fresh, stale, stats = self.run_with_cache(scenario, ttl=3600)
+        self.assertIsNotNone(fresh)
+        self.assertIsNone(stale)
+        self.assertEqual((stats["expired"], stats["misses"]), (1, 1))
+
+    def test_hits_are_written_back_and_prune_keeps_recent_rows(self):
+        async def scenario(cache):
+            for i in range(5):
+                await cache.set(f"request {i}", "stats", str(i))
+            await cache.memory.flush()
+            with sqlite3.connect(self.path) as conn:
+                conn.execute("UPDATE semantic_cache SET created_at = datetime('now', '-1 day')")
+            for _ in range(3):
+                await cache.get("request 3")
+            with patch("core.cache.settings.CACHE_MAX_ROWS", 2):
+                removed = await cache.prune()
+            await cache.memory.flush()
+            with sqlite3.connect(self.path) as conn:
+                rows = dict(conn.execute("SELECT command, hits FROM semantic_cache").fetchall())
+            return removed, rows, len(cache._lru)
+        removed, rows, lru = self.run_with_cache(scenario)
+        self.assertEqual(removed, 3)
+        self.assertEqual(rows["3"], 3)  # Most recently hit survives, with its hit count
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(lru, 2)
+
+class TestContextKeys(unittest.TestCase):
+    """Entries bound to app / cwd / slot are only served in the context they were learned in."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "memory.db")
+        self.core_dir = {"app": "Code", "cwd": "/src/core", "slot": "Morning"}
+        self.tests_dir = {"app": "Code", "cwd": "/src/tests", "slot": "Morning"}
+
+    def run_with_cache(self, scenario):
+        async def wrapper():
+            memory = OmegaMemory(db_path=self.path)
+            cache = SemanticCache(memory=memory)
+            try:
+                result = await scenario(cache)
+                cache._lru.clear()  # Also prove the table lookups
+                return result, await scenario(cache)
+            finally:
+                await cache.close()
+                await memory.close()
+        return asyncio.run(wrapper())
+
+    def test_dimensions_come_from_tool_and_wording(self):
+        cache = SemanticCache(memory=OmegaMemory(db_path=self.path))
+        self.assertEqual(cache.dimensions("list files in utils", "ls"), ("cwd",))
+        self.assertEqual(cache.dimensions("what is this", "stats"), ("app", "cwd"))
+        self.assertEqual(cache.dimensions("battery level", "physical"), ())
+
+    def test_cwd_bound_entry(self):
+        async def scenario(cache):
+            await cache.set("list files in utils", "ls", "utils", context=self.core_dir)
+            await cache.memory.flush()
+            return (await cache.get("list files in utils", context=self.core_dir),
+                    await cache.get("list files in utils", context=self.tests_dir),
+                    await cache.get("list the files in utils please", context=self.tests_dir),
+                    await cache.get("list files in utils"))
+        for same, other, paraphrase, blind in self.run_with_cache(scenario):
+            self.assertEqual(same, {"tool": "ls", "command": "utils"})
+            self.assertIsNone(other)
+            self.assertIsNone(paraphrase)
+            self.assertIsNone(blind)
+
+    def test_wording_binds_to_app(self):
+        async def scenario(cache):
+            await cache.set("what is this", "see_active", "", context=self.core_dir)
+            await cache.set("what is this", "see_tree", "", context={**self.core_dir, "app": "Firefox"})
+            await cache.memory.flush()
+            return (await cache.get("what is this", context=self.core_dir),
+                    await cache.get("what is this", context={**self.core_dir, "app": "Firefox"}),
+                    await cache.get("what is this", context={**self.core_dir, "app": "Terminal"}))
+        for code, firefox, terminal in self.run_with_cache(scenario):
+            self.assertEqual(code["tool"], "see_active")
+            self.assertEqual(firefox["tool"], "see_tree")
+            self.assertIsNone(terminal)
+
+    def test_context_free_entries_serve_everywhere(self):
+        async def scenario(cache):
+            await cache.set("battery level", "physical", "", context=self.core_dir)
+            await cache.memory.flush()
+            return await cache.get("battery level", context=self.tests_dir), await cache.get("battery level")
+        for hits in self.run_with_cache(scenario):
+            self.assertEqual([hit["tool"] for hit in hits], ["physical", "physical"])
+
+    def test_unknown_context_is_not_cached(self):
+        async def scenario(cache):
+            await cache.set("list files in utils", "ls", "utils", context={"app": "Code"})
+            await cache.memory.flush()
+            return await cache.get("list files in utils", context=self.core_dir)
+        for hit in self.run_with_cache(scenario):
+            self.assertIsNone(hit)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.daemon import UmbrasolDaemon, UmbrasolClient, RequestLost
+
+class FakeCore:
+    """Stands in for UmbrasolCore: emits a fixed event sequence."""
+    def __init__(self):
+        self.requests = []
+        self.cwds = []
+
+    async def execute(self, user_request, task_id=None, listener=None, cwd=None):
+        self.requests.append(user_request)
+        self.cwds.append(cwd)
+        await listener({"type": "reasoning", "content": "checking"})
+        await listener({"type": "action", "actions": [{"tool": "stats", "cmd": ""}]})
+        await listener({"type": "result", "tool": "stats", "content": "cpu 1%"})
+        await listener({"type": "talk", "content": "All good."})
+        return "All good."
+
+class TestResidentDaemon(unittest.TestCase):
+    """Round-trips requests through the Unix socket protocol."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, "umbrasol.sock")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _run(self, scenario):
+        async def runner():
+            core = FakeCore()
+            daemon = UmbrasolDaemon(core, socket_path=self.socket_path)
+            server = asyncio.create_task(daemon.serve_forever())
+            while not os.path.exists(self.socket_path):
+                await asyncio.sleep(0.01)
+            try:
+                return core, await scenario(UmbrasolClient(socket_path=self.socket_path))
+            finally:
+                server.cancel()
+                await asyncio.gather(server, return_exceptions=True)
+        return asyncio.run(runner())
+
+    def test_streams_events_in_order(self):
+        async def scenario(client):
+            return [event async for event in client.stream("check stats")]
+
+        core, events = self._run(scenario)
+        self.assertEqual(core.requests, ["check stats"])
+        self.assertEqual([e["type"] for e in events], ["reasoning", "action", "result", "talk", "done"])
+        self.assertEqual(events[-1]["result"], "All good.")
+
+    def test_ping_and_concurrent_clients(self):
+        async def scenario(client):
+            pong = await client.ping()
+            results = await asyncio.gather(*(client.execute(f"req {i}") for i in range(5)))
+            return pong, results
+
+        core, (pong, results) = self._run(scenario)
+        self.assertEqual(pong["type"], "pong")
+        self.assertEqual(results, ["All good."] * 5)
+        self.assertEqual(sorted(core.requests), [f"req {i}" for i in range(5)])
+
+    def test_requests_run_in_the_client_cwd(self):
+        async def scenario(client):
+            await client.execute("list files")
+            await client.execute("list files", cwd=self.tmp.name)
+            return await client.execute("list files", cwd="relative/dir")
+
+        core, bad = self._run(scenario)
+        self.assertEqual(core.cwds, [os.getcwd(), self.tmp.name])
+        self.assertIn("Bad working directory", bad)
+
+    def test_lost_daemon_is_not_a_connect_failure(self):
+        async def serve(replies):
+            async def handle(reader, writer):
+                await reader.readline()  # The request was taken
+                writer.write(replies)
+                await writer.drain()
+                writer.close()
+            return await asyncio.start_unix_server(handle, path=self.socket_path)
+
+        async def scenario():
+            client = UmbrasolClient(socket_path=self.socket_path)
+            with self.assertRaises(OSError):  # Nothing listening: safe to run locally
+                await client.execute("reboot")
+            outcomes = []
+            for replies in (b'{"type": "talk", "content": "ok"}\n', b'{"type": "tal'):
+                server = await serve(replies)
+                try:
+                    await client.execute("reboot")
+                except RequestLost as e:
+                    outcomes.append(str(e))
+                finally:
+                    server.close()
+                    await server.wait_closed()
+                    if os.path.exists(self.socket_path):
+                        os.unlink(self.socket_path)
+            return outcomes
+
+        closed, truncated = asyncio.run(scenario())
+        self.assertIn("Daemon closed the connection", closed)
+        self.assertIn("mid-request", truncated)
+
+    def test_socket_removed_on_stop(self):
+        async def scenario(client):
+            return client.is_available()
+
+        _, available = self._run(scenario)
+        self.assertTrue(available)
+        self.assertFalse(os.path.exists(self.socket_path))
+
+if __name__ == "__main__":
+    unittest.main()
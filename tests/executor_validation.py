@@ -0,0 +1,94 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch, AsyncMock
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.executor import ActionExecutor
+from core.omega_safety import OmegaSafety
+from config import settings
+
+class FakeMemory:
+    def __init__(self):
+        self.checkpoints = []
+
+    async def update_task_checkpoint(self, task_id, status, checkpoint_data, durable=None):
+        self.checkpoints.append((status, checkpoint_data))
+
+class TestActionExecutor(unittest.TestCase):
+    """Plan shape, concurrency and failure semantics of the action executor."""
+
+    def setUp(self):
+        self.safety = OmegaSafety()
+        self.memory = FakeMemory()
+        self.executor = ActionExecutor(self._dispatch, self.safety, self.memory)
+
+    async def _dispatch(self, tool, cmd):
+        await asyncio.sleep(0.1)
+        return f"{tool} ok"
+
+    def test_reads_grouped_and_shell_is_barrier(self):
+        actions = [
+            {"tool": "stats", "cmd": ""}, {"tool": "net", "cmd": "weather"},
+            {"tool": "shell", "cmd": "date"}, {"tool": "ls", "cmd": "."},
+        ]
+        stages = self.executor.plan(actions)
+        self.assertEqual([[a["tool"] for a, _ in stage] for stage in stages], [["stats", "net"], ["shell"], ["ls"]])
+
+    def test_risky_read_is_not_parallelised(self):
+        stages = self.executor.plan([{"tool": "ls", "cmd": "."}, {"tool": "ls", "cmd": "$(whoami)"}])
+        self.assertEqual(len(stages), 2)
+
+    def test_independent_reads_overlap(self):
+        actions = [{"tool": "stats", "cmd": ""}, {"tool": "net", "cmd": "q"}, {"tool": "ls", "cmd": "."}]
+        start = time.perf_counter()
+        success, results = asyncio.run(self.executor.run(actions, task_id=1))
+        elapsed = time.perf_counter() - start
+        self.assertTrue(success)
+        self.assertLess(elapsed, 0.25)
+        self.assertEqual([r["tool"] for r in results], ["stats", "net", "ls"])
+
+    def test_failed_stage_stops_plan_after_retries(self):
+        calls = []
+
+        async def dispatch(tool, cmd):
+            calls.append(tool)
+            return "ERROR: boom" if tool == "shell" else "ok"
+
+        executor = ActionExecutor(dispatch, self.safety, self.memory)
+        actions = [{"tool": "shell", "cmd": "false"}, {"tool": "stats", "cmd": ""}]
+        with patch("core.executor.asyncio.sleep", new=AsyncMock()):
+            success, results = asyncio.run(executor.run(actions, task_id=1))
+        self.assertFalse(success)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(calls, ["shell"] * (settings.MAX_RETRIES + 1))
+
+    def test_snapshot_targets_follow_the_action_cwd(self):
+        tmp = tempfile.mkdtemp()
+        build = os.path.join(tmp, "build")
+        os.makedirs(os.path.join(build, "out"))
+        with open(os.path.join(build, "out", "a.o"), "w") as f:
+            f.write("object")
+        safety = OmegaSafety(os.path.join(tmp, "store"))
+
+        async def cwd():
+            return build  # Where the plan's shell session cd'd to
+
+        executor = ActionExecutor(self._dispatch, safety, self.memory, cwd=cwd)
+        asyncio.run(executor.run([{"tool": "shell", "cmd": "rm -rf out"}], task_id=1))
+        self.assertEqual([s["source"] for s in safety.store.list()], [os.path.join(build, "out")])
+
+    def test_format_results_keeps_every_result(self):
+        text = ActionExecutor.format_results([
+            {"tool": "stats", "cmd": "", "result": "cpu 3%"},
+            {"tool": "ls", "cmd": ".", "result": "main.py"},
+        ])
+        self.assertEqual(text, "[stats]: cpu 3%\n[ls .]: main.py")
+
+if __name__ == "__main__":
+    unittest.main()
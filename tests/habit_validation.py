@@ -0,0 +1,118 @@
+import sys
+import os
+import json
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.omega_memory import OmegaMemory
+from core.habit import HabitManager
+from config import settings
+
+T0 = 1_800_000_000.0
+HALF_LIFE = settings.HABIT_HALF_LIFE_DAYS * 86400
+
+class TestHabitRows(unittest.TestCase):
+    """Decayed habit rows: migrations, atomic increments, top-1 and Markov prediction."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "memory.db")
+
+    def run_with_memory(self, body):
+        async def scenario():
+            memory = OmegaMemory(db_path=self.path)
+            try:
+                return await body(memory)
+            finally:
+                await memory.close()
+        return asyncio.run(scenario())
+
+    def test_blob_table_is_migrated_once(self):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE habits (
+                    context_key TEXT PRIMARY KEY, counts TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )""")
+            conn.execute("INSERT INTO habits (context_key, counts) VALUES (?, ?)",
+                         ("Morning|Firefox", json.dumps({"stats:": 4, "ls:.": 1})))
+            conn.execute("INSERT INTO habits (context_key, counts) VALUES (?, ?)", ("Night|Code", "not json"))
+
+        scores = self.run_with_memory(lambda m: m.get_habit("Morning|Firefox"))
+        self.assertAlmostEqual(scores["stats:"], 4, places=3)
+        self.assertAlmostEqual(scores["ls:."], 1, places=3)
+        # A second start finds the row table and leaves it alone
+        again = self.run_with_memory(lambda m: m.get_habit("Morning|Firefox"))
+        self.assertAlmostEqual(again["stats:"], 4, places=3)
+        with sqlite3.connect(self.path) as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertNotIn("habits_blob", tables)
+
+    def test_count_rows_gain_a_rank(self):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("""
+                CREATE TABLE habits (
+                    context_key TEXT NOT NULL, command TEXT NOT NULL, count INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (context_key, command)
+                )""")
+            conn.execute("CREATE INDEX idx_habits_top ON habits(context_key, count DESC)")
+            conn.execute("INSERT INTO habits (context_key, command, count) VALUES ('Night|Code', 'ls:.', 8)")
+
+        top = self.run_with_memory(lambda m: m.top_habit("Night|Code"))
+        self.assertEqual(top[0], "ls:.")
+        self.assertAlmostEqual(top[1], 8, places=3)
+
+    def test_concurrent_learns_do_not_lose_increments(self):
+        async def body(memory):
+            await asyncio.gather(*(memory.increment_habit("Night|Code", "stats:", now=T0) for _ in range(50)))
+            await memory.flush()
+            return await memory.top_habit("Night|Code", now=T0), await memory.get_habit("Night|Code", now=T0)
+
+        (command, score), _ = self.run_with_memory(body)
+        self.assertEqual(command, "stats:")
+        self.assertAlmostEqual(score, 50, places=6)
+
+    def test_scores_decay_with_half_life(self):
+        async def body(memory):
+            for _ in range(4):
+                await memory.increment_habit("Night|Code", "stats:", now=T0)
+            await memory.increment_habit("Night|Code", "ls:.", now=T0 + 2 * HALF_LIFE)
+            await memory.increment_habit("Night|Code", "ls:.", now=T0 + 2 * HALF_LIFE)
+            await memory.flush()
+            return (await memory.get_habit("Night|Code", now=T0 + HALF_LIFE),
+                    await memory.top_habit("Night|Code", now=T0 + 2 * HALF_LIFE))
+
+        one_half_life, (top, score) = self.run_with_memory(body)
+        self.assertAlmostEqual(one_half_life["stats:"], 2.0, places=6)
+        # 4 old uses are worth 1 after two half-lives; 2 fresh ones win
+        self.assertEqual(top, "ls:.")
+        self.assertAlmostEqual(score, 2.0, places=6)
+
+    def test_markov_next_beats_slot_favourite(self):
+        async def body(memory):
+            habit = HabitManager(memory=memory)
+            window = "notes - Code"
+            for _ in range(3):
+                await habit.learn(window, "stats:", now=T0)
+                await habit.learn(window, "ls:.", now=T0)
+            await habit.learn(window, "stats:", now=T0)
+            await memory.flush()
+            after_stats = await habit.predict(window, threshold=2, now=T0)
+            plan = await memory._read(
+                "EXPLAIN QUERY PLAN SELECT command, rank FROM habits WHERE context_key = ? ORDER BY rank DESC LIMIT 1",
+                ("x",), fresh=True,
+            )
+            return after_stats, await habit.predict("Nowhere", now=T0), " ".join(row[3] for row in plan)
+
+        (command, score), unknown, plan = self.run_with_memory(body)
+        self.assertEqual(command, "ls:.")  # Follows stats 3 times out of 3
+        self.assertAlmostEqual(score, 3.0, places=6)
+        self.assertEqual(unknown, (None, 0))
+        self.assertIn("idx_habits_rank", plan)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import sys
+import os
+import json
+import time
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.intent import IntentExtractor
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_corpus.json")
+
+with open(CORPUS_PATH) as f:
+    CORPUS = json.load(f)
+
+class TestIntentExtractor(unittest.TestCase):
+    """Corpus accuracy and throughput of the precompiled intent extractor."""
+
+    def setUp(self):
+        self.extractor = IntentExtractor()
+
+    def test_act_corpus(self):
+        for case in CORPUS["act"]:
+            with self.subTest(raw=case["raw"]):
+                self.assertEqual(self.extractor.parse_act(case["raw"]), case["expect"])
+
+    def test_fallback_corpus(self):
+        for case in CORPUS["fallback"]:
+            with self.subTest(request=case["request"]):
+                self.assertEqual(self.extractor.from_request(case["request"], case["response"]), case["expect"])
+
+    def test_keywords_match_whole_words_only(self):
+        # "ls" in "also", "ram" in "program", "net" in "planet"
+        self.assertEqual(self.extractor.tools_in("also a program about the planet"), [])
+
+    def test_throughput(self):
+        cases = CORPUS["fallback"]
+        rounds = 200
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for case in cases:
+                self.extractor.from_request(case["request"], case["response"])
+        per_call = (time.perf_counter() - start) / (rounds * len(cases))
+        # Loose floor: the compiled path runs in tens of microseconds
+        self.assertLess(per_call, 0.002)
+
+if __name__ == "__main__":
+    unittest.main()
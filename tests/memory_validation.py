@@ -0,0 +1,144 @@
+import sys
+import os
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.omega_memory import OmegaMemory
+
+def committed_status(path, task_id):
+    """What a crash would leave behind: the state as seen by another connection."""
+    with sqlite3.connect(path) as conn:
+        row = conn.execute("SELECT status FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    return row[0] if row else None
+
+class TestWriteBehind(unittest.TestCase):
+    """Group commits, durable checkpoints and flush on close."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "memory.db")
+
+    def test_writes_are_visible_before_commit_and_committed_later(self):
+        async def scenario():
+            memory = OmegaMemory(db_path=self.path)
+            try:
+                with patch("core.omega_memory.settings.MEMORY_COMMIT_INTERVAL", 0.05):
+                    task_id = await memory.add_task("check ram")
+                    await memory.update_task_checkpoint(task_id, "running", {"stage": "thinking"})
+                    pending = await memory.get_pending_tasks()
+                    before = committed_status(self.path, task_id)
+                    await asyncio.sleep(0.15)
+                    after = committed_status(self.path, task_id)
+                return pending, before, after, memory.commits
+            finally:
+                await memory.close()
+
+        pending, before, after, commits = asyncio.run(scenario())
+        self.assertEqual([t["status"] for t in pending], ["running"])
+        self.assertIsNone(before)
+        self.assertEqual(after, "running")
+        self.assertEqual(commits, 1)
+
+    def test_terminal_status_is_durable_at_once(self):
+        async def scenario():
+            memory = OmegaMemory(db_path=self.path)
+            try:
+                with patch("core.omega_memory.settings.MEMORY_COMMIT_INTERVAL", 10):
+                    task_id = await memory.add_task("check ram")
+                    await memory.log_action("stats()", "ok", "LOW")
+                    await memory.update_task_checkpoint(task_id, "completed", {"stage": "finished"})
+                    return committed_status(self.path, task_id), memory.commits
+            finally:
+                await memory.close()
+
+        self.assertEqual(asyncio.run(scenario()), ("completed", 1))
+
+    def test_concurrent_requests_share_commits(self):
+        async def request(memory, i):
+            task_id = await memory.add_task(f"r{i}")
+            await memory.log_action("stats()", "ok", "LOW")
+            await memory.set_cache(f"h{i}", "stats", "")
+            await memory.update_task_checkpoint(task_id, "completed", {"stage": "finished"})
+
+        async def scenario():
+            memory = OmegaMemory(db_path=self.path)
+            try:
+                await memory.ensure_db()
+                await asyncio.gather(*(request(memory, i) for i in range(50)))
+                return memory.writes, memory.commits
+            finally:
+                await memory.close()
+
+        writes, commits = asyncio.run(scenario())
+        self.assertEqual(writes, 200)
+        self.assertLess(commits, 25)
+
+    def test_close_flushes_pending_writes(self):
+        async def scenario():
+            memory = OmegaMemory(db_path=self.path)
+            with patch("core.omega_memory.settings.MEMORY_COMMIT_INTERVAL", 10):
+                task_id = await memory.add_task("check ram")
+                await memory.close()
+            return task_id
+
+        task_id = asyncio.run(scenario())
+        self.assertEqual(committed_status(self.path, task_id), "pending")
+
+class TestStorageProfile(unittest.TestCase):
+    """Pragmas, indexes and the read-only pool."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "memory.db")
+
+    def test_wal_and_indexes(self):
+        async def scenario():
+            memory = OmegaMemory(db_path=self.path)
+            try:
+                await memory.ensure_db()
+                mode = (await memory._read("PRAGMA journal_mode", fresh=True, one=True))[0]
+                plan = await memory._read(
+                    "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE status NOT IN ('completed', 'failed') ORDER BY +id LIMIT 10",
+                    fresh=True,
+                )
+                indexes = await memory._read("SELECT name FROM sqlite_master WHERE type = 'index'", fresh=True)
+                return mode, " ".join(row[3] for row in plan), {row[0] for row in indexes}
+            finally:
+                await memory.close()
+
+        mode, plan, indexes = asyncio.run(scenario())
+        self.assertEqual(mode.lower(), "wal")
+        self.assertIn("idx_tasks_open", plan)
+        self.assertTrue({"idx_tasks_open", "idx_audit_timestamp"} <= indexes)
+
+    def test_pool_reads_see_committed_writes_and_are_read_only(self):
+        async def scenario():
+            memory = OmegaMemory(db_path=self.path)
+            try:
+                await memory.set_cache("h", "stats", "")
+                stale = await memory.get_cache("h")  # Not committed yet: invisible to the pool
+                await memory.flush()
+                cached = await memory.get_cache("h")
+                reader = await memory._idle_readers.get()
+                try:
+                    await reader.execute("DELETE FROM semantic_cache")
+                    writable = True
+                except Exception:
+                    writable = False
+                memory._idle_readers.put_nowait(reader)
+                return stale, cached, writable, len(memory._readers)
+            finally:
+                await memory.close()
+
+        stale, cached, writable, readers = asyncio.run(scenario())
+        self.assertIsNone(stale)
+        self.assertEqual(cached, {"tool": "stats", "command": ""})
+        self.assertFalse(writable)
+        self.assertEqual(readers, 2)
+
+if __name__ == "__main__":
+    unittest.main()
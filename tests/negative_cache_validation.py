@@ -0,0 +1,95 @@
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch, AsyncMock
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.negative_cache import NegativeCache, classify
+from core.executor import ActionExecutor
+from core.omega_memory import OmegaMemory
+from core.omega_safety import OmegaSafety
+from config import settings
+
+class FakeMemory:
+    async def update_task_checkpoint(self, task_id, status, checkpoint_data, durable=None):
+        pass
+
+class TestNegativeCache(unittest.TestCase):
+    """Error classes, TTLs, the immediate verdict and clearing on success."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "memory.db")
+
+    def test_classify(self):
+        self.assertIsNone(classify("CPU: 3%"))
+        self.assertEqual(classify("BLOCKED: Tool 'teleport' not found"), "unknown_tool")
+        self.assertEqual(classify("BLOCKED: High risk command"), "blocked")
+        self.assertEqual(classify("ERROR: Offline. Cannot reach search engine."), "transient")
+        self.assertEqual(classify("ERROR: tesseract missing. Run: pkg install tesseract"), "unavailable")
+        self.assertEqual(classify("ERROR: boom"), "error")
+
+    def test_failures_expire_count_and_clear(self):
+        async def scenario():
+            memory = OmegaMemory(db_path=self.path)
+            failures = NegativeCache(memory)
+            try:
+                failed = [{"tool": "teleport", "cmd": "mars", "result": "BLOCKED: Tool 'teleport' not found", "success": False},
+                          {"tool": "net", "cmd": "mars", "result": "ERROR: Offline.", "success": False}]
+                await failures.record("Go to Mars", failed, now=1000)
+                once = await failures.get("go to mars", now=1001)
+                await failures.record("go to mars", failed[:1], now=1002)
+                twice = await failures.get("go to mars", now=1003)
+                later = await failures.get("go to mars", now=1000 + settings.NEGATIVE_CACHE_TTL["transient"] + 5)
+                await failures.clear("go to mars")
+                cleared = await failures.get("go to mars", now=1004)
+                return once, twice, later, cleared, failures
+            finally:
+                await memory.close()
+        once, twice, later, cleared, failures = asyncio.run(scenario())
+        self.assertEqual(once[("net", "mars")]["error_class"], "transient")
+        self.assertIsNone(failures.verdict(once))  # One failure: the brain gets another go (with a hint)
+        self.assertIn("teleport(mars) -> unknown_tool", failures.hint(once))
+        self.assertIn("not found", failures.verdict(twice))
+        self.assertEqual(list(later), [("teleport", "mars")])  # The transient entry expired first
+        self.assertEqual(cleared, {})
+
+class TestExecutorWithFailures(unittest.TestCase):
+    """Known deterministic failures are not dispatched; deterministic errors are not retried."""
+
+    def setUp(self):
+        self.calls = []
+        self.executor = ActionExecutor(self._dispatch, OmegaSafety(), FakeMemory())
+
+    async def _dispatch(self, tool, cmd):
+        self.calls.append(tool)
+        return {"teleport": "BLOCKED: Tool 'teleport' not found", "net": "ERROR: Offline."}.get(tool, "ok")
+
+    def run_plan(self, actions, known=None):
+        with patch("core.executor.asyncio.sleep", new=AsyncMock()):
+            return asyncio.run(self.executor.run(actions, 1, known_failures=known))
+
+    def test_deterministic_error_is_not_retried(self):
+        success, _ = self.run_plan([{"tool": "teleport", "cmd": "mars"}])
+        self.assertFalse(success)
+        self.assertEqual(self.calls, ["teleport"])
+
+    def test_known_failures_skip_dispatch_or_retries(self):
+        known = {
+            ("teleport", "mars"): {"error_class": "unknown_tool", "message": "BLOCKED: Tool 'teleport' not found"},
+            ("net", "mars"): {"error_class": "transient", "message": "ERROR: Offline."},
+        }
+        success, results = self.run_plan([{"tool": "teleport", "cmd": "mars"}], known)
+        self.assertEqual((success, self.calls), (False, []))
+        self.assertIn("not found", results[0]["result"])
+        self.run_plan([{"tool": "net", "cmd": "mars"}], known)
+        self.assertEqual(self.calls, ["net"])  # One attempt, no retries
+        self.calls.clear()
+        self.run_plan([{"tool": "net", "cmd": "mars"}])
+        self.assertEqual(self.calls, ["net"] * (settings.MAX_RETRIES + 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.prefetch import HabitPrefetcher
+from core.omega_safety import OmegaSafety
+
+class FakeHabit:
+    def __init__(self, predictions):
+        self.predictions = predictions
+
+    async def predict(self, window, now=None):
+        return self.predictions.get(window, (None, 0))
+
+class TestHabitPrefetcher(unittest.TestCase):
+    """Window change -> prefetch or warm-up, and the hit / wasted-work accounting."""
+
+    def setUp(self):
+        self.calls = []
+        self.warms = 0
+        habit = FakeHabit({
+            "main.py - Code": ("ls:core", 5.0),
+            "Firefox": ("net:weather", 4.0),
+            "Terminal": ("shell:make", 9.0),
+        })
+        self.prefetch = HabitPrefetcher(habit, self._dispatch, OmegaSafety(), warm=self._warm, ttl=5)
+
+    async def _dispatch(self, tool, cmd):
+        self.calls.append((tool, cmd))
+        await asyncio.sleep(0.01)
+        return f"{tool} {cmd} ok"
+
+    async def _warm(self):
+        self.warms += 1
+
+    def test_prefetched_result_is_taken_once(self):
+        async def scenario():
+            await self.prefetch.on_window_change("main.py - Code")
+            first = self.prefetch.take("ls", "core")
+            return await first, self.prefetch.take("ls", "core")
+
+        result, second = asyncio.run(scenario())
+        self.assertEqual(result, "ls core ok")
+        self.assertIsNone(second)
+        self.assertEqual(self.calls, [("ls", "core")])
+        self.assertEqual(self.prefetch.stats()["hit_rate"], 1.0)
+
+    def test_cwd_bound_result_is_only_taken_in_its_cwd(self):
+        async def scenario():
+            await self.prefetch.on_window_change("main.py - Code")  # Runs in the process cwd
+            elsewhere = self.prefetch.take("ls", "core", cwd=os.path.dirname(os.getcwd()))
+            here = self.prefetch.take("ls", "core", cwd=os.getcwd())
+            return elsewhere, await here
+
+        elsewhere, here = asyncio.run(scenario())
+        self.assertIsNone(elsewhere)  # Another client's cwd lists its own directory
+        self.assertEqual(here, "ls core ok")
+
+    def test_unused_prefetch_is_wasted_on_next_change(self):
+        async def scenario():
+            await self.prefetch.on_window_change("main.py - Code")
+            await asyncio.sleep(0.05)
+            await self.prefetch.on_window_change("Firefox")
+            return await self.prefetch.take("net", "weather")
+
+        self.assertEqual(asyncio.run(scenario()), "net weather ok")
+        stats = self.prefetch.stats()
+        self.assertEqual((stats["prefetches"], stats["hits"], stats["wasted"]), (2, 1, 1))
+        self.assertEqual(stats["wasted_ratio"], 0.5)
+        self.assertGreater(stats["wasted_seconds"], 0)
+
+    def test_expired_prefetch_is_not_used(self):
+        async def scenario():
+            self.prefetch.ttl = 0
+            await self.prefetch.on_window_change("main.py - Code")
+            await asyncio.sleep(0.02)
+            return self.prefetch.take("ls", "core")
+
+        self.assertIsNone(asyncio.run(scenario()))
+        self.assertEqual(self.prefetch.stats()["wasted"], 1)
+
+    def test_follow_reacts_to_pushed_changes(self):
+        async def pushed():
+            for window in ["main.py - Code", "main.py - Code", "", "Firefox"]:
+                yield window
+
+        async def scenario():
+            await self.prefetch.follow(pushed())
+            return await self.prefetch.take("net", "weather")
+
+        self.assertEqual(asyncio.run(scenario()), "net weather ok")
+        self.assertEqual(self.prefetch.stats()["prefetches"], 2)  # Repeats and blanks are no change
+
+    def test_write_tool_warms_model_instead(self):
+        async def scenario():
+            await self.prefetch.on_window_change("Terminal")
+            await self.prefetch.on_window_change("Unknown app")
+
+        asyncio.run(scenario())
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.warms, 2)
+        self.assertEqual(self.prefetch.stats()["prefetches"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.process_engine import ProcessEngine
+
+def alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"  # An unreaped orphan is dead too
+    except FileNotFoundError:
+        return False
+
+@unittest.skipUnless(os.path.isdir("/proc"), "POSIX shell commands and /proc")
+class TestProcessEngine(unittest.TestCase):
+    """The execute_shell contract, streaming, output caps and process-group kills."""
+
+    def test_contract_and_streaming(self):
+        events = []
+        async def on_output(stream, text):
+            events.append((stream, text))
+        engine = ProcessEngine()
+        ok = asyncio.run(engine.run("echo hello; echo oops >&2", on_output=on_output))
+        failed = asyncio.run(engine.run("echo partial; echo broken >&2; exit 3"))
+        self.assertEqual(ok, {"exit_code": 0, "output": "hello\n"})
+        self.assertEqual(failed, {"exit_code": 3, "output": "broken\n"})
+        self.assertEqual(sorted(events), [("stderr", "oops\n"), ("stdout", "hello\n")])
+        self.assertEqual(asyncio.run(engine.run(["printf", "%s", "argv"]))["output"], "argv")
+
+    def test_output_cap_keeps_head_and_tail(self):
+        streamed = []
+        async def on_output(stream, text):
+            streamed.append(text)
+        engine = ProcessEngine(output_limit=1000, tail=100)
+        result = asyncio.run(engine.run("seq 1 10000", on_output=on_output))
+        self.assertTrue(result["output"].startswith("1\n2\n"))
+        self.assertTrue(result["output"].endswith("9999\n10000\n"))
+        self.assertIn("bytes truncated", result["output"])
+        self.assertLessEqual(len("".join(streamed)), 1000 + 40)  # Streaming stops at the cap too
+        self.assertEqual(engine.stats()["truncated"], 1)
+
+    def test_timeout_kills_the_process_group(self):
+        pidfile = os.path.join(tempfile.mkdtemp(), "child.pid")
+        engine = ProcessEngine(kill_grace=0.5)
+        start = time.perf_counter()
+        result = asyncio.run(engine.run(f"sleep 30 & echo $! > {pidfile}; wait", timeout=0.5))
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(result["exit_code"], -1)
+        self.assertIn("timed out", result["output"])
+        with open(pidfile) as f:
+            child = int(f.read())
+        time.sleep(0.1)
+        self.assertFalse(alive(child))
+
+    def test_cancel_kills_the_command(self):
+        pidfile = os.path.join(tempfile.mkdtemp(), "shell.pid")
+        engine = ProcessEngine(kill_grace=0.5)
+        async def scenario():
+            task = asyncio.create_task(engine.run(f"echo $$ > {pidfile}; exec sleep 30"))
+            await asyncio.sleep(0.3)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        asyncio.run(scenario())
+        with open(pidfile) as f:
+            self.assertFalse(alive(int(f.read())))
+        self.assertEqual(engine.stats()["cancelled"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
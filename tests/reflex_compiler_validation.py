@@ -0,0 +1,84 @@
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.omega_memory import OmegaMemory
+from core.reflex import ReflexEngine
+from core.reflex_compiler import ReflexCompiler
+
+class TestReflexCompiler(unittest.TestCase):
+    """Mining finished tasks into learned reflexes: thresholds, eligibility, demotion."""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "memory.db")
+
+    def run_with_compiler(self, scenario):
+        async def wrapper():
+            memory = OmegaMemory(db_path=self.path)
+            try:
+                return await scenario(ReflexCompiler(memory), memory)
+            finally:
+                await memory.close()
+        return asyncio.run(wrapper())
+
+    @staticmethod
+    async def finish(memory, request, actions, ok=True, stage="finished"):
+        task_id = await memory.add_task(request)
+        checkpoint = {"stage": stage, "actions": actions}
+        if stage == "heuristic":
+            checkpoint["success"] = ok
+        await memory.update_task_checkpoint(task_id, "completed" if ok or stage == "heuristic" else "failed", checkpoint)
+
+    def test_repeated_brain_resolution_is_promoted_and_matched(self):
+        async def scenario(compiler, memory):
+            for _ in range(3):
+                await self.finish(memory, "Show running programs, please", [{"tool": "proc_list", "cmd": ""}])
+            first = await compiler.compile()
+            again = await compiler.compile()
+            return first, again, await compiler.active_rules()
+        first, again, rules = self.run_with_compiler(scenario)
+        self.assertEqual(first["promoted"], ["show running programs please"])
+        self.assertEqual(again["tasks"], 0)  # Incremental: nothing new to mine
+        engine = ReflexEngine.from_settings(learned=rules)
+        self.assertEqual(engine.resolve("show running programs please?"), [{"tool": "proc_list", "cmd": ""}])
+
+    def test_thresholds_and_eligibility(self):
+        async def scenario(compiler, memory):
+            for _ in range(3):
+                await self.finish(memory, "what is this", [{"tool": "see_active", "cmd": ""}])  # Window-bound wording
+                await self.finish(memory, "check disk", [{"tool": "stats", "cmd": ""}])
+                await self.finish(memory, "wipe scratch", [{"tool": "shell", "cmd": "rm -rf /tmp/scratch"}])
+                await self.finish(memory, "show the docs", [{"tool": "ls", "cmd": "docs"}])  # cwd-relative
+            await self.finish(memory, "check disk", [{"tool": "gpu", "cmd": ""}])  # 3/4 < 0.9 confidence
+            await self.finish(memory, "ping twice", [{"tool": "net", "cmd": "ping"}])  # Support 1
+            return await compiler.compile()
+        summary = self.run_with_compiler(scenario)
+        self.assertEqual(summary["promoted"], [])
+
+    def test_failures_retire_and_demotion_sticks(self):
+        async def scenario(compiler, memory):
+            for _ in range(3):
+                await self.finish(memory, "uptime please", [{"tool": "existence", "cmd": ""}])
+                await self.finish(memory, "cpu temperature", [{"tool": "gpu", "cmd": ""}])
+            promoted = (await compiler.compile())["promoted"]
+            # The learned reflex fails when it fires -> back to the brain
+            await self.finish(memory, "cpu temperature", [{"tool": "gpu", "cmd": ""}], ok=False, stage="heuristic")
+            retired = (await compiler.compile())["retired"]
+            # Demoted by hand: more successes never bring it back
+            await compiler.demote("Uptime please!")
+            for _ in range(3):
+                await self.finish(memory, "uptime please", [{"tool": "existence", "cmd": ""}])
+            await compiler.compile()
+            return promoted, retired, await compiler.active_rules()
+        promoted, retired, rules = self.run_with_compiler(scenario)
+        self.assertEqual(promoted, ["cpu temperature", "uptime please"])
+        self.assertEqual(retired, ["cpu temperature"])
+        self.assertEqual(rules, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import sys
+import os
+import random
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.reflex import ReflexEngine
+
+class TestReflexEngine(unittest.TestCase):
+    """Word boundaries, synonyms, priorities and compound resolution."""
+
+    def setUp(self):
+        self.engine = ReflexEngine.from_settings()
+
+    def test_word_boundaries(self):
+        self.assertEqual(self.engine.match("run my program"), [])
+        self.assertEqual(self.engine.match("ramp up the fan"), [])
+        self.assertEqual([m.key for m in self.engine.match("ram?")], ["ram"])
+
+    def test_synonyms_map_to_their_key(self):
+        matches = self.engine.match("battery status and memory usage")
+        self.assertEqual([(m.key, m.tool) for m in matches], [("battery", "physical"), ("ram", "stats")])
+
+    def test_priority_beats_length(self):
+        engine = ReflexEngine(
+            {"window": ("see_tree", ""), "active window title": ("stats", ""), "active window": ("see_active", "")},
+            priorities={"active window": 10},
+        )
+        self.assertEqual([m.tool for m in engine.match("show the active window title")], ["see_active"])
+
+    def test_compound_request_skips_llm(self):
+        actions = self.engine.resolve("Check my battery, RAM and list files please")
+        self.assertEqual(actions, [
+            {"tool": "physical", "cmd": ""}, {"tool": "stats", "cmd": ""}, {"tool": "ls", "cmd": "."},
+        ])
+
+    def test_duplicate_intents_collapse(self):
+        self.assertEqual(self.engine.resolve("cpu and ram"), [{"tool": "stats", "cmd": ""}])
+
+    def test_uncovered_requests(self):
+        # Long and not fully covered: the brain must handle it
+        self.assertEqual(self.engine.resolve("Check battery and tell me a poem"), [])
+        # Short: classic single-intent behaviour
+        self.assertEqual(self.engine.resolve("battery poem"), [{"tool": "physical", "cmd": ""}])
+
+    def test_agrees_with_brute_force(self):
+        rng = random.Random(3)
+        words = ["ram", "cpu", "battery", "power", "stats", "list", "files", "x", "program", "active", "window"]
+        for _ in range(500):
+            text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+            padded = f" {text} "
+            expected = {phrase for phrase, *_ in self.engine.patterns if f" {phrase} " in padded}
+            found = {hit.phrase for hit in self.engine.scan(text)[1]}
+            self.assertEqual(found, expected, text)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.omega_safety import OmegaSafety, judged_text
+
+class TestRiskAnalysis(unittest.TestCase):
+    """The compiled rule set: levels, quoting, comments and the memo."""
+
+    def setUp(self):
+        self.safety = OmegaSafety()
+
+    def assertRisk(self, level, *commands):
+        for command in commands:
+            self.assertEqual(self.safety.analyze_risk(command), level, command)
+
+    def test_levels(self):
+        self.assertRisk("HIGH", "shell rm -rf build", "shell rm -fr build", "shell RM  -r -f build",
+                        "shell dd if=a.img of=/dev/sdb", "power reboot", "shell cat x > /dev/sda")
+        self.assertRisk("MEDIUM", "shell rm notes.txt", "shell mv a b", "shell sudo apt install vim",
+                        "shell ls > listing.txt", "shell curl -o page.html example.com", "shell kill 42")
+        self.assertRisk("LOW", "shell date", "net weather in Paris", "ls docs", "shell ls > /dev/null 2>&1",
+                        "shell grep -c rmdir log.txt")
+
+    def test_quoted_text_is_data(self):
+        self.assertRisk("LOW", 'shell echo "rm -rf /"', "shell git commit -m 'rm the old > files'",
+                        "shell ls # rm -rf /")
+        # The shell still expands substitutions inside double quotes, and a newline ends a comment
+        self.assertRisk("HIGH", 'shell echo "$(rm -rf /)"', "shell ls # tidy\nrm -rf /")
+        self.assertRisk("MEDIUM", "shell echo `date`", "shell echo 'unbalanced rm x")
+        self.assertEqual(judged_text("""echo 'a' "b" "$(c)" # d"""), "echo   $(c) ")
+        self.assertEqual(judged_text("""git commit -m 'x' && "ls" 'a b'"""), "git commit -m  && ls a b")
+
+    def test_quoted_code_is_judged(self):
+        # Quoted text that a shell, eval, su, ssh or an interpreter runs is code, not data
+        self.assertRisk("HIGH", "shell sh -c 'rm -rf /'", 'shell bash -c "rm -rf ~"', "shell eval 'rm -rf /home'",
+                        "shell su -c 'reboot'", "shell ssh host 'sudo shutdown now'", 'shell echo "rm -rf /" | sh',
+                        'shell python3 -c "import shutil; shutil.rmtree(\'/\')"',
+                        "shell sudo bash -lc 'mkfs.ext4 /dev/sdb1'")
+        # The shell removes quotes before it runs a word: quoted command words and operands are code
+        self.assertRisk("HIGH", "shell 'reboot'", 'shell systemctl "reboot"', 'shell "mkfs.ext4" /dev/sdb1',
+                        'shell "rm" -rf /', "shell 'r''m' -rf /", 'shell sudo "shutdown" -h now',
+                        'shell dd if=/dev/zero "of=/dev/sda"', "shell echo 'x' > '/dev/sda'")
+        self.assertRisk("MEDIUM", "shell sh -c 'mv a b'", 'shell python -c "import os; os.remove(\'x\')"')
+        self.assertRisk("LOW", "shell sh -c 'ls -la'", 'shell echo "rm -rf /" | grep rm')
+
+    def test_long_rm_options(self):
+        self.assertRisk("HIGH", "shell rm --recursive --force /", "shell rm --force -r build",
+                        "shell rm -v -R -f build", "shell rm -Rf build")
+        self.assertRisk("MEDIUM", "shell rm --recursive build", "shell rm -f notes.txt", "shell rm -i -v x")
+
+    def test_memo_is_keyed_on_normalised_command(self):
+        before = OmegaSafety.stats()["memo_hits"]
+        self.safety.analyze_risk("shell   uptime  -p")
+        OmegaSafety().analyze_risk("SHELL uptime -p")
+        self.assertEqual(OmegaSafety.stats()["memo_hits"], before + 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import sys
+import os
+import time
+import asyncio
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.sense import fan_out, REQUIRED
+
+async def probe(value, delay=0.0, fail=False):
+    await asyncio.sleep(delay)
+    if fail:
+        raise RuntimeError("probe failed")
+    return value
+
+class TestSenseFanOut(unittest.TestCase):
+    """Deadline, default and failure handling of the parallel sense stage."""
+
+    def test_probes_run_concurrently(self):
+        start = time.perf_counter()
+        values, timings = asyncio.run(fan_out({
+            "a": (probe(1, 0.05), None), "b": (probe(2, 0.05), None), "c": (probe(3, 0.05), None),
+        }, deadline=1.0))
+        self.assertLess(time.perf_counter() - start, 0.12)
+        self.assertEqual(values, {"a": 1, "b": 2, "c": 3})
+        self.assertEqual(set(timings), {"a", "b", "c"})
+
+    def test_late_probe_is_defaulted(self):
+        start = time.perf_counter()
+        values, timings = asyncio.run(fan_out({
+            "fast": (probe("ok"), None), "slow": (probe("late", 5.0), "UNKNOWN"),
+        }, deadline=0.05))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(values, {"fast": "ok", "slow": "UNKNOWN"})
+        self.assertIsNone(timings["slow"])
+
+    def test_required_probe_outlives_deadline(self):
+        values, _ = asyncio.run(fan_out({"task": (probe(42, 0.1), REQUIRED)}, deadline=0.01))
+        self.assertEqual(values["task"], 42)
+
+    def test_failures(self):
+        values, _ = asyncio.run(fan_out({"cache": (probe(None, fail=True), "MISS")}, deadline=0.1))
+        self.assertEqual(values["cache"], "MISS")
+        with self.assertRaises(RuntimeError):
+            asyncio.run(fan_out({"task": (probe(None, fail=True), REQUIRED)}, deadline=0.1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.shell_pool import ShellPool
+
+@unittest.skipUnless(ShellPool.available(), "bash not installed")
+class TestShellPool(unittest.TestCase):
+    """Framing, per-key state, isolation, recycling and timeouts."""
+
+    def run_pool(self, scenario, **options):
+        async def wrapper():
+            pool = ShellPool(**options)
+            await pool.fill()
+            try:
+                return await scenario(pool)
+            finally:
+                await pool.close()
+        return asyncio.run(wrapper())
+
+    def test_framing_and_exit_codes(self):
+        async def scenario(pool):
+            return [
+                await pool.run("printf 'no newline'"),
+                await pool.run("echo out; echo err >&2; exit 3"),
+                await pool.run("if then"),
+                await pool.run("cat"),  # stdin is /dev/null, not the framing pipe
+                await pool.run("echo still framed"),
+            ]
+        plain, failed, syntax, cat, after = self.run_pool(scenario)
+        self.assertEqual(plain, {"exit_code": 0, "output": "no newline"})
+        self.assertEqual(failed, {"exit_code": 3, "output": "err\n"})
+        self.assertEqual(syntax["exit_code"], 2)
+        self.assertEqual(cat, {"exit_code": 0, "output": ""})
+        self.assertEqual(after["output"], "still framed\n")
+
+    def test_state_is_per_key_and_recycled(self):
+        async def scenario(pool):
+            await pool.run("cd /; export PLAN=one", key="a")
+            same = await pool.run("pwd; echo $PLAN", key="a")
+            other = await pool.run("pwd; echo ${PLAN:-unset}", key="b")
+            unkeyed = await pool.run("cd /; export LEAK=1")
+            after = await pool.run("pwd; echo ${LEAK:-clean}")
+            await pool.release("a")
+            again = await pool.run("pwd; echo ${PLAN:-unset}", key="a")
+            return same, other, unkeyed, after, again, pool.stats()
+        same, other, unkeyed, after, again, stats = self.run_pool(scenario, cwd="/tmp")
+        self.assertEqual(same["output"], "/\none\n")
+        self.assertEqual(other["output"], "/tmp\nunset\n")
+        self.assertEqual(after["output"], "/tmp\nclean\n")
+        self.assertEqual(again["output"], "/tmp\nunset\n")
+        self.assertGreaterEqual(stats["warm"], 3)
+
+    def test_cwd_is_where_a_session_starts(self):
+        async def scenario(pool):
+            return [
+                await pool.run("pwd", cwd="/usr"),
+                await pool.run("pwd", key="a", cwd="/usr"),
+                await pool.run("cd /; pwd", key="a", cwd="/usr"),
+                await pool.run("pwd", key="a", cwd="/usr"),  # The plan's own cd wins from here on
+                await pool.run("pwd", cwd="/nonexistent-umbrasol"),
+            ]
+        unkeyed, first, cd, after, missing = self.run_pool(scenario, cwd="/tmp")
+        self.assertEqual([unkeyed["output"], first["output"], cd["output"], after["output"]],
+                         ["/usr\n", "/usr\n", "/\n", "/\n"])
+        self.assertEqual(missing["exit_code"], 1)
+
+    def test_pwd_follows_the_plan(self):
+        async def scenario(pool):
+            before = await pool.pwd("a")
+            await pool.run("mkdir -p /tmp/umbrasol-pwd && cd /tmp/umbrasol-pwd", key="a", cwd="/")
+            return before, await pool.pwd("a"), await pool.run("echo still framed", key="a")
+        before, after, framed = self.run_pool(scenario)
+        self.assertIsNone(before)  # No session bound yet: the request's own cwd applies
+        self.assertEqual(after, "/tmp/umbrasol-pwd")
+        self.assertEqual(framed["output"], "still framed\n")
+
+    def test_exit_and_timeout_replace_the_session(self):
+        async def scenario(pool):
+            await pool.run("cd /", key="a")
+            ended = await pool.run("exit 7", key="a")
+            next_one = await pool.run("pwd", key="a")  # Not silently run in a fresh session elsewhere
+            await pool.release("a")
+            reused = await pool.run("echo alive", key="a")
+            await pool.run("cd /", key="b")
+            keyed_timeout = await pool.run("sleep 30", key="b", timeout=0.2)
+            after_timeout = await pool.run("pwd", key="b")
+            timed_out = await pool.run("sleep 30", timeout=0.2)
+            return ended, next_one, reused, after_timeout, timed_out, await pool.run("echo ok"), pool.stats()
+        ended, next_one, reused, after_timeout, timed_out, ok, stats = self.run_pool(scenario, kill_grace=0.2)
+        self.assertEqual(ended, {"exit_code": 7, "output": ""})
+        self.assertEqual(next_one["exit_code"], -1)
+        self.assertIn("session of this request ended", next_one["output"])
+        self.assertEqual(reused["output"], "alive\n")  # A released key starts over
+        self.assertIn("session of this request ended", after_timeout["output"])
+        self.assertEqual(timed_out["exit_code"], -1)
+        self.assertEqual(ok["output"], "ok\n")
+        self.assertEqual(stats["timeouts"], 2)
+
+    def test_streaming_holds_back_the_sentinel(self):
+        chunks = []
+        async def on_output(stream, text):
+            chunks.append(text)
+        async def scenario(pool):
+            return await pool.run("seq 1 20000", on_output=on_output)
+        result = self.run_pool(scenario)
+        self.assertEqual("".join(chunks), result["output"])
+        self.assertNotIn("UMBRASOL", result["output"])
+
+if __name__ == "__main__":
+    unittest.main()
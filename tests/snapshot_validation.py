@@ -0,0 +1,88 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.snapshot_store import SnapshotStore
+from core.omega_safety import OmegaSafety, snapshot_targets
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+class TestSnapshotStore(unittest.TestCase):
+    """Chunk dedup, unchanged-file reuse, restore and retention."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.project = os.path.join(self.tmp, "project")
+        write(os.path.join(self.project, "a.txt"), b"alpha" * 1000)
+        write(os.path.join(self.project, "copy.txt"), b"alpha" * 1000)  # Same content: stored once
+        write(os.path.join(self.project, "src", "big.bin"), os.urandom(10_000))
+        os.symlink("a.txt", os.path.join(self.project, "link"))
+        self.store = SnapshotStore(os.path.join(self.tmp, "store"), chunk_size=4096)
+
+    def test_dedup_and_unchanged_files(self):
+        first = self.store.snapshot(self.project)
+        usage = self.store.disk_usage()
+        self.assertEqual(usage, 5000 + 10_000)  # copy.txt shares a.txt's chunks
+        write(os.path.join(self.project, "a.txt"), b"beta")
+        second = self.store.snapshot(self.project)
+        chunks = {e["path"]: e.get("chunks") for e in second["entries"]}
+        self.assertEqual(chunks["src/big.bin"], {e["path"]: e.get("chunks") for e in first["entries"]}["src/big.bin"])
+        self.assertEqual(self.store.disk_usage(), usage + 4)
+        self.assertEqual([s["id"] for s in self.store.list()], [second["id"], first["id"]])
+
+    def test_restore_after_delete_and_edit(self):
+        manifest = self.store.snapshot(self.project)
+        big = read(os.path.join(self.project, "src", "big.bin"))
+        os.remove(os.path.join(self.project, "src", "big.bin"))
+        write(os.path.join(self.project, "a.txt"), b"clobbered")
+        self.store.restore(manifest["id"])
+        self.assertEqual(read(os.path.join(self.project, "src", "big.bin")), big)
+        self.assertEqual(read(os.path.join(self.project, "a.txt")), b"alpha" * 1000)
+        elsewhere = self.store.restore(manifest["id"], os.path.join(self.tmp, "copy"))
+        self.assertEqual(os.readlink(os.path.join(elsewhere, "link")), "a.txt")
+
+    def test_gc_keeps_newest_and_sweeps_chunks(self):
+        store = SnapshotStore(self.store.root, chunk_size=4096, keep=1)
+        old = store.snapshot(os.path.join(self.project, "src", "big.bin"))
+        store.snapshot(os.path.join(self.project, "a.txt"))  # Pushes the first one out
+        self.assertEqual([s["source"] for s in store.list()], [os.path.join(self.project, "a.txt")])
+        self.assertEqual(store.disk_usage(), 5000)
+        self.assertNotIn(old["id"], [s["id"] for s in store.list()])
+        self.assertEqual(store.gc(now=time.time() + store.max_age + 1)["snapshots"], 1)
+        self.assertEqual(store.disk_usage(), 0)
+
+    def test_size_limit(self):
+        store = SnapshotStore(self.store.root, max_source_bytes=1000)
+        self.assertIsNone(store.snapshot(self.project))
+
+class TestSafetySnapshots(unittest.TestCase):
+    """The paths a command names are snapshotted in a worker thread."""
+
+    def test_targets_and_async_snapshot(self):
+        tmp = tempfile.mkdtemp()
+        notes = os.path.join(tmp, "notes.txt")
+        write(notes, b"keep me")
+        self.assertEqual(snapshot_targets(f"mv -f {notes} '{tmp}/missing' # {tmp}"), [notes])
+        self.assertEqual(snapshot_targets(notes), [notes])
+        self.assertEqual(snapshot_targets("rm -f notes.txt", cwd=tmp), [notes])  # Relative to where it runs
+        safety = OmegaSafety(os.path.join(tmp, "store"))
+        taken = asyncio.run(safety.snapshot_async(f"rm {notes}"))
+        os.remove(notes)
+        safety.store.restore(taken[0])
+        self.assertEqual(read(notes), b"keep me")
+
+if __name__ == "__main__":
+    unittest.main()
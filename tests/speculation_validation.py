@@ -0,0 +1,92 @@
+import sys
+import os
+import time
+import asyncio
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.executor import ActionExecutor, SpeculativeDispatch
+from core.omega_safety import OmegaSafety
+
+class FakeMemory:
+    async def update_task_checkpoint(self, task_id, status, checkpoint_data, durable=None):
+        pass
+
+class TestSpeculativeDispatch(unittest.TestCase):
+    """Which ACT lines start early, reuse by the executor and discarding."""
+
+    def setUp(self):
+        self.calls = []
+        self.cancelled = []
+        self.safety = OmegaSafety()
+
+    async def _dispatch(self, tool, cmd):
+        self.calls.append((tool, cmd))
+        try:
+            await asyncio.sleep(0.2)
+        except asyncio.CancelledError:
+            self.cancelled.append((tool, cmd))
+            raise
+        return f"{tool} ok"
+
+    def test_only_low_risk_reads_before_a_barrier_start(self):
+        async def scenario():
+            spec = SpeculativeDispatch(self._dispatch, self.safety)
+            offered = [
+                spec.offer({"tool": "stats", "cmd": ""}),
+                spec.offer({"tool": "ls", "cmd": "$(whoami)"}),  # Risky: barrier
+                spec.offer({"tool": "net", "cmd": "weather"}),   # After the barrier
+            ]
+            started = list(spec._pending)
+            await spec.discard()
+            return offered, started
+
+        offered, started = asyncio.run(scenario())
+        self.assertEqual(offered, [True, False, False])
+        self.assertEqual(started, [("stats", "")])
+
+    def test_shell_is_never_speculated(self):
+        async def scenario():
+            spec = SpeculativeDispatch(self._dispatch, self.safety)
+            return spec.offer({"tool": "shell", "cmd": "date"})
+
+        self.assertFalse(asyncio.run(scenario()))
+        self.assertEqual(self.calls, [])
+
+    def test_executor_reuses_started_call(self):
+        async def scenario():
+            spec = SpeculativeDispatch(self._dispatch, self.safety)
+            executor = ActionExecutor(self._dispatch, self.safety, FakeMemory())
+            actions = [{"tool": "stats", "cmd": ""}, {"tool": "ls", "cmd": "."}]
+            for action in actions:
+                spec.offer(action)
+            await asyncio.sleep(0.15)  # The model keeps generating meanwhile
+            start = time.perf_counter()
+            success, results = await executor.run(actions, task_id=1, speculation=spec)
+            return success, results, time.perf_counter() - start, spec
+
+        success, results, elapsed, spec = asyncio.run(scenario())
+        self.assertTrue(success)
+        self.assertEqual([r["result"] for r in results], ["stats ok", "ls ok"])
+        self.assertEqual(len(self.calls), 2)  # No second dispatch
+        self.assertLess(elapsed, 0.15)
+        self.assertEqual((spec.started, spec.used), (2, 2))
+
+    def test_contradicted_call_is_cancelled(self):
+        async def scenario():
+            spec = SpeculativeDispatch(self._dispatch, self.safety)
+            executor = ActionExecutor(self._dispatch, self.safety, FakeMemory())
+            spec.offer({"tool": "net", "cmd": "old query"})
+            _, results = await executor.run([{"tool": "net", "cmd": "new query"}], task_id=1, speculation=spec)
+            return results, await spec.discard(), spec
+
+        results, discarded, spec = asyncio.run(scenario())
+        self.assertEqual(results[0]["cmd"], "new query")
+        self.assertEqual(discarded, 1)
+        self.assertEqual(self.cancelled, [("net", "old query")])
+        self.assertEqual((spec.used, spec.discarded), (0, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import os
+import random
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.stream_parser import ThoughtStreamParser
+
+SAMPLE = "THINK: User wants RAM.\nTHE plan: check stats.\nSAY: On it!\nACT: stats,\nACT: ls,core\nSAY: trailing chatter"
+
+def replay(chunks):
+    parser = ThoughtStreamParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+        if parser.closed:
+            break
+    events.extend(parser.finish())
+    return parser, events
+
+def collapse(events):
+    """Merges adjacent content events so different chunkings compare equal."""
+    merged = []
+    for e in events:
+        if merged and e["type"] != "act" and merged[-1]["type"] == e["type"]:
+            merged[-1] = {"type": e["type"], "content": merged[-1]["content"] + e["content"]}
+        else:
+            merged.append(dict(e))
+    return merged
+
+class TestThoughtStreamParser(unittest.TestCase):
+    """Typed events, tags split across chunks and the end of the ACT block."""
+
+    def test_whole_response(self):
+        parser, events = replay([SAMPLE])
+        self.assertEqual(collapse(events), [
+            {"type": "reasoning", "content": " User wants RAM.\nTHE plan: check stats.\n"},
+            {"type": "talk", "content": " On it!\n"},
+            {"type": "act", "raw": "stats,"},
+            {"type": "act", "raw": "ls,core"},
+        ])
+        self.assertTrue(parser.closed)
+
+    def test_any_chunking_gives_same_events(self):
+        expected = collapse(replay([SAMPLE])[1])
+        rng = random.Random(5)
+        for _ in range(300):
+            chunks, i = [], 0
+            while i < len(SAMPLE):
+                step = rng.randint(1, 5)
+                chunks.append(SAMPLE[i:i + step])
+                i += step
+            self.assertEqual(collapse(replay(chunks)[1]), expected, chunks)
+
+    def test_char_by_char(self):
+        self.assertEqual(collapse(replay(list(SAMPLE))[1]), collapse(replay([SAMPLE])[1]))
+
+    def test_act_without_trailing_newline(self):
+        parser, events = replay(["THINK: time\nAC", "T: shell,", "date"])
+        self.assertEqual(events[-1], {"type": "act", "raw": "shell,date"})
+        self.assertFalse(parser.closed)
+
+    def test_untagged_preamble_is_ignored_but_kept(self):
+        parser, events = replay(["Sure! ", "Here goes\nTHINK: x"])
+        self.assertEqual(collapse(events), [{"type": "reasoning", "content": " x"}])
+        self.assertEqual(parser.text, "Sure! Here goes\nTHINK: x")
+
+    def test_prose_after_act_closes_stream(self):
+        parser = ThoughtStreamParser()
+        parser.feed("ACT: stats\n")
+        self.assertFalse(parser.closed)
+        parser.feed("I have now")
+        self.assertTrue(parser.closed)
+        self.assertEqual(parser.feed("more tokens"), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import sys
+import os
+import math
+import unittest
+from collections import namedtuple
+from types import SimpleNamespace
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.telemetry import RingBuffer, TelemetrySampler
+
+NetIO = namedtuple("NetIO", "bytes_sent bytes_recv")
+DiskIO = namedtuple("DiskIO", "read_bytes write_bytes")
+
+class FakePsutil:
+    """psutil's sampling surface, scripted: counters grow by a fixed amount per call."""
+    def __init__(self, cores=2):
+        self.cores = cores
+        self.calls = []
+        self.ticks = 0
+        self.load = [10.0, 30.0, 50.0, 70.0]
+
+    def cpu_count(self):
+        return self.cores
+
+    def cpu_percent(self, percpu=False):
+        self.calls.append("cpu_percent")
+        value = self.load[self.ticks % len(self.load)]
+        if percpu:
+            self.ticks += 1
+            return [value] * self.cores
+        return value
+
+    def virtual_memory(self):
+        return SimpleNamespace(percent=42.0, used=4 * 2**30)
+
+    def disk_usage(self, path):
+        return SimpleNamespace(percent=61.5)
+
+    def disk_io_counters(self):
+        return DiskIO(self.ticks * 4096, self.ticks * 8192)
+
+    def net_io_counters(self):
+        return NetIO(self.ticks * 1000, self.ticks * 3000)
+
+    def sensors_temperatures(self):
+        return {}
+
+    def sensors_battery(self):
+        return SimpleNamespace(percent=80, power_plugged=None)
+
+    def process_iter(self, attrs=None):
+        self.calls.append("process_iter")
+        return [SimpleNamespace(info={"pid": pid, "name": f"p{pid}", "cpu_percent": cpu, "memory_percent": 1.0})
+                for pid, cpu in ((1, 0.5), (2, 90.0), (3, 12.0))]
+
+class TestRingBuffer(unittest.TestCase):
+    """Wrap-around, time windows and NaN-aware aggregates."""
+
+    def test_wraps_and_windows(self):
+        ring = RingBuffer(capacity=3, width=2)
+        self.assertIsNone(ring.latest())
+        for t in range(5):
+            ring.append(float(t), [t, float("nan") if t == 3 else t * 10])
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(ring.latest(), [4.0, 40.0])
+        self.assertEqual([row[0] for row in ring.window(10, now=4.0)], [2.0, 3.0, 4.0])  # Oldest two overwritten
+        self.assertEqual([row[0] for row in ring.window(1, now=4.0)], [3.0, 4.0])
+        first, second = ring.aggregate(10, now=4.0)
+        self.assertEqual(first, {"mean": 3.0, "min": 2.0, "max": 4.0})
+        self.assertEqual(second, {"mean": 30.0, "min": 20.0, "max": 40.0})  # The NaN is left out
+        self.assertEqual(ring.column(10, 4.0, 1), [40.0, 20.0])
+
+class TestTelemetrySampler(unittest.TestCase):
+    """Samples, rates and windowed averages from a scripted psutil, and the sampling thread."""
+
+    def sampler(self, **options):
+        self.source = FakePsutil()
+        options.setdefault("process_interval", 5.0)
+        return TelemetrySampler("/", interval=1.0, history=60, source=self.source, **options)
+
+    def test_samples_rates_and_averages(self):
+        telemetry = self.sampler()
+        for t in range(8):
+            telemetry.sample(now=100.0 + t)
+        self.assertEqual(telemetry.latest("net"), [1000.0, 3000.0])  # Bytes per second between samples
+        self.assertEqual(telemetry.latest("disk"), [61.5, 4096.0, 8192.0])
+        self.assertTrue(math.isnan(telemetry.latest("thermal")[0]))
+        self.assertEqual(telemetry.latest("battery")[0], 80.0)
+        self.assertTrue(math.isnan(telemetry.latest("battery")[1]))  # power_plugged unknown
+        self.assertEqual(telemetry.average("cpu", 3.5, now=107.0), 40.0)  # Last four: 10, 30, 50, 70
+        self.assertEqual(telemetry.aggregate("cpu", 60, now=107.0)["core1"]["max"], 70.0)
+
+        stats = telemetry.system_stats()
+        self.assertEqual(len(stats["cpu_cores"]), 2)
+        self.assertEqual((stats["ram"], stats["disk"]), (42.0, 61.5))
+        self.assertEqual(stats["io"], {"bytes_sent": 8000, "bytes_recv": 24000})
+        self.assertIn("cpu_avg_5m", stats)
+
+    def test_process_list_is_sampled_on_its_own_cadence(self):
+        telemetry = self.sampler()
+        for t in range(7):
+            telemetry.sample(now=float(t))
+        self.assertEqual(self.source.calls.count("process_iter"), 2)  # At 0s and 5s
+        self.assertEqual([p["pid"] for p in telemetry.process_list()], [2, 3, 1])
+        self.assertEqual(len(telemetry.process_list(limit=1)), 1)
+
+    def test_reads_are_direct_until_the_sampler_runs(self):
+        telemetry = self.sampler()
+        stats = telemetry.system_stats()  # One-shot runs: one psutil read, no warmup wait
+        self.assertEqual((stats["cpu_total"], stats["ram"], stats["disk"]), (10.0, 42.0, 61.5))
+        self.assertNotIn("cpu_avg_5m", stats)
+        self.assertEqual(telemetry.current("battery")[0], 80.0)
+        self.assertEqual([p["pid"] for p in telemetry.process_list()], [2, 3, 1])
+        self.assertFalse(telemetry.running or telemetry.ready)
+        self.assertIsNone(telemetry.latest("cpu"))  # Nothing went into the ring buffers
+
+    def test_thread_primes_before_the_first_sample(self):
+        telemetry = self.sampler(warmup=0.05)
+        self.assertIsNone(telemetry.latest("cpu"))
+        telemetry.start(wait=2)
+        try:
+            self.assertTrue(telemetry.running)
+            self.assertEqual(self.source.calls[:2], ["cpu_percent", "cpu_percent"])  # Primed, then sampled
+            self.assertGreaterEqual(telemetry.stats()["samples"], 1)
+            self.assertGreater(telemetry.stats()["busy_seconds"], 0)
+        finally:
+            telemetry.close()
+        self.assertFalse(telemetry.running)
+
+if __name__ == "__main__":
+    unittest.main()
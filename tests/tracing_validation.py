@@ -0,0 +1,81 @@
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.tracing import Tracer, percentile, summarize
+
+class TestTracing(unittest.TestCase):
+    """Span nesting, context propagation and the percentile report."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "traces.jsonl")
+        self.tracer = Tracer(path=self.path, enabled=True, sample_rate=1.0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _spans(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_spans_follow_gathered_tasks(self):
+        tracer = self.tracer
+
+        async def child(name):
+            with tracer.span(name):
+                await asyncio.sleep(0.01)
+
+        async def request():
+            handle = tracer.start_trace("check stats")
+            with tracer.span("sense"):
+                await asyncio.gather(child("sense.a"), child("sense.b"))
+            tracer.record("brain.ttft", 0.25)
+            tracer.annotate(path="brain")
+            return tracer.end_trace(handle, 0.5)
+
+        trace = asyncio.run(request())
+        spans = {s["name"]: s for s in self._spans()}
+        self.assertEqual(spans["sense.a"]["parent"], "sense")
+        self.assertEqual(spans["sense.b"]["depth"], 2)
+        self.assertEqual(spans["brain.ttft"]["ms"], 250.0)
+        self.assertEqual(spans["request"]["attrs"], {"path": "brain"})
+        self.assertEqual(set(trace.breakdown()), {"sense", "sense.a", "sense.b", "brain.ttft"})
+
+    def test_noop_outside_trace_and_when_disabled(self):
+        with self.tracer.span("orphan"):
+            pass
+        disabled = Tracer(path=self.path, enabled=False)
+        self.assertIsNone(disabled.start_trace("x"))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_errors_are_tagged(self):
+        handle = self.tracer.start_trace("boom")
+        with self.assertRaises(ValueError):
+            with self.tracer.span("tool.shell"):
+                raise ValueError("bad")
+        self.tracer.end_trace(handle, 0.1)
+        span = next(s for s in self._spans() if s["name"] == "tool.shell")
+        self.assertEqual(span["attrs"]["error"], "ValueError")
+
+    def test_percentiles_and_summary(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        for i in range(3):
+            handle = self.tracer.start_trace(f"req {i}")
+            self.tracer.record("cache", 0.001 * (i + 1))
+            self.tracer.end_trace(handle, 0.01)
+        stats = summarize([self.path], last=2)
+        self.assertEqual(stats["cache"], [2.0, 3.0])
+        self.assertEqual(len(stats["request"]), 2)
+
+if __name__ == "__main__":
+    unittest.main()
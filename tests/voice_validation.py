@@ -0,0 +1,97 @@
+import sys
+import os
+import time
+import tempfile
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.voice import SentenceBuffer, SpeechPipeline
+
+# Stand-in for piper: "loads" once, then 1000 bytes of PCM per word of each stdin line
+FAKE_SYNTH = (
+    "import sys, time\n"
+    "time.sleep(0.2)\n"
+    "for line in sys.stdin:\n"
+    "    sys.stdout.buffer.write(b'\\0' * 1000 * len(line.split()))\n"
+    "    sys.stdout.buffer.flush()\n"
+)
+# Stand-in for paplay: keeps every byte it was sent
+FAKE_SINK = (
+    "import sys\n"
+    "with open(sys.argv[1], 'wb', buffering=0) as out:\n"
+    "    while chunk := sys.stdin.buffer.read1(65536):\n"
+    "        out.write(chunk)\n"
+)
+
+def feed_all(buffer, chunks):
+    units = []
+    for chunk in chunks:
+        units.extend(buffer.feed(chunk))
+    return units + buffer.flush()
+
+class TestSentenceBuffer(unittest.TestCase):
+    """Token chunks -> speakable units."""
+
+    def test_sentences_split_on_punctuation(self):
+        tokens = ["Hello", " there", ".", " RAM", " is", " at", " 42", "%!", " Done"]
+        self.assertEqual(feed_all(SentenceBuffer(8), tokens), ["Hello there.", "RAM is at 42%!", "Done"])
+
+    def test_decimal_point_is_not_a_sentence_end(self):
+        self.assertEqual(feed_all(SentenceBuffer(8), ["Load", " is", " 3", ".", "5", " now."]), ["Load is 3.5 now."])
+
+    def test_long_sentence_cut_at_word_limit(self):
+        text = "one two three four, five six seven eight nine ten eleven."
+        units = feed_all(SentenceBuffer(6), [c + " " for c in text.split()])
+        self.assertEqual(units, ["one two three four,", "five six seven eight nine ten", "eleven."])
+
+    def test_unit_waits_for_complete_word(self):
+        buffer = SentenceBuffer(2)
+        self.assertEqual(buffer.feed("alpha bra"), [])
+        self.assertEqual(buffer.feed("vo charlie"), ["alpha bravo"])
+
+    def test_markup_is_stripped(self):
+        self.assertEqual(feed_all(SentenceBuffer(8), ["**Bold** `code`\n"]), ["Bold code"])
+
+class TestSpeechPipeline(unittest.TestCase):
+    """One synthesiser and one sink for many utterances."""
+
+    def setUp(self):
+        self.out = tempfile.NamedTemporaryFile(delete=False).name
+        self.pipeline = SpeechPipeline(
+            model_path="unused", sample_rate=1000,
+            synth_cmd=[sys.executable, "-c", FAKE_SYNTH],
+            sink_cmd=[sys.executable, "-c", FAKE_SINK, self.out],
+        )
+
+    def tearDown(self):
+        self.pipeline.close()
+        os.remove(self.out)
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_utterances_share_one_process(self):
+        self.assertTrue(self.pipeline.say("hello there"))
+        pid = self.pipeline._synth.pid
+        self.assertTrue(self.pipeline.say("three more words"))
+        self.assertEqual(self.pipeline._synth.pid, pid)
+        self.assertTrue(self.wait_for(lambda: self.pipeline.audio_seconds >= 2.5))  # 5 words of 1000 B at 2000 B/s
+        self.assertEqual(len(self.pipeline.first_audio), 1)
+        self.assertTrue(self.wait_for(lambda: os.path.getsize(self.out) == 5000))
+
+    def test_interrupt_only_when_speaking(self):
+        self.assertFalse(self.pipeline.interrupt())
+        self.pipeline.say("a fairly long sentence to keep the sink busy for a while")
+        self.assertTrue(self.wait_for(lambda: self.pipeline.audio_seconds > 0))
+        self.assertTrue(self.pipeline.speaking)
+        self.assertTrue(self.pipeline.interrupt())
+        self.assertTrue(self.wait_for(lambda: self.pipeline.running))  # Reloaded in the background
+        self.assertFalse(self.pipeline.speaking)
+
+if __name__ == "__main__":
+    unittest.main()
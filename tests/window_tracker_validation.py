@@ -0,0 +1,108 @@
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import unittest
+
+# Ensure the project root is in the path
+sys.path.append(os.getcwd())
+
+from core.window_tracker import WindowTracker, UNKNOWN
+
+def titles(window_id):
+    """A fake title spy: reports a title for the window, then stays up like `xprop -spy` does."""
+    return ["sh", "-c", f"echo '_NET_WM_NAME(UTF8_STRING) = \"Window {window_id}\"'; exec sleep 30"]
+
+def wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+@unittest.skipUnless(os.name == "posix", "fake spies are sh scripts")
+class TestWindowTracker(unittest.TestCase):
+    """xprop -spy parsing, focus and title changes, subscribers and respawns, against fake spies."""
+
+    def setUp(self):
+        self.fifo = os.path.join(tempfile.mkdtemp(), "root")
+        os.mkfifo(self.fifo)
+        self.trackers = []
+
+    def tearDown(self):
+        for tracker in self.trackers:
+            tracker.close()
+
+    def tracker(self, **options):
+        options.setdefault("root_cmd", ["cat", self.fifo])
+        options.setdefault("title_cmd", titles)
+        tracker = WindowTracker(**options)
+        self.trackers.append(tracker)
+        return tracker
+
+    def focus(self, writer, window_id):
+        writer.write(f"_NET_ACTIVE_WINDOW(WINDOW): window id # {window_id}\n")
+        writer.flush()
+
+    def test_focus_changes_are_pushed(self):
+        tracker = self.tracker()
+        seen = []
+        tracker.subscribe(lambda window_id, title: seen.append((window_id, title)))
+        tracker.start(wait=0)
+        with open(self.fifo, "w") as writer:
+            self.focus(writer, "0x1a00007")
+            self.assertTrue(wait_for(lambda: tracker.title == "Window 0x1a00007"))
+            self.focus(writer, "0x2c00003")
+            self.assertTrue(wait_for(lambda: tracker.title == "Window 0x2c00003"))
+            self.focus(writer, "0x0")  # Nothing focused
+            self.assertTrue(wait_for(lambda: tracker.title == UNKNOWN))
+        self.assertEqual(seen, [("0x1a00007", "Window 0x1a00007"), ("0x2c00003", "Window 0x2c00003"),
+                                (None, UNKNOWN)])
+        self.assertEqual(tracker.stats()["changes"], 3)
+
+    def test_title_parsing(self):
+        tracker = self.tracker()
+        tracker.window_id = "0x1"
+        tracker._on_title("0x1", '_NET_WM_NAME(UTF8_STRING) = "say \\"hi\\" \\\\ bye"\n')
+        self.assertEqual(tracker.title, 'say "hi" \\ bye')
+        tracker._on_title("0x1", '_NET_WM_NAME(UTF8_STRING) = "Inbox - Mail"\n')
+        self.assertEqual(tracker.title, "Inbox - Mail")  # A title change on the same window
+        tracker._on_title("0x9", '_NET_WM_NAME(UTF8_STRING) = "late"\n')
+        self.assertEqual(tracker.title, "Inbox - Mail")  # The previous window's spy is ignored
+
+        tracker._names = {}
+        tracker._on_title("0x1", "_NET_WM_NAME:  not found.\n")
+        self.assertEqual(tracker.title, "Inbox - Mail")  # No UNKNOWN before WM_NAME is in
+        tracker._on_title("0x1", 'WM_NAME(STRING) = "xterm"\n')
+        self.assertEqual(tracker.title, "xterm")
+
+    def test_changes_iterator(self):
+        tracker = self.tracker().start(wait=0)
+        async def scenario():
+            received = []
+            with await asyncio.to_thread(open, self.fifo, "w") as writer:
+                self.focus(writer, "0x11")
+                async for title in tracker.changes():
+                    received.append(title)
+                    if len(received) == 2:
+                        break
+                    self.focus(writer, "0x22")
+            return received
+        self.assertEqual(asyncio.run(scenario()), ["Window 0x11", "Window 0x22"])
+        self.assertEqual(tracker._subscribers, [])
+
+    def test_respawn_after_the_spy_exits(self):
+        script = "echo '_NET_ACTIVE_WINDOW(WINDOW): window id # 0x5'; exit 1"
+        tracker = self.tracker(root_cmd=["sh", "-c", script], restart_delay=0.05)
+        tracker.start()
+        self.assertTrue(wait_for(lambda: tracker.restarts >= 2))
+        self.assertTrue(tracker.running)
+        tracker.close()
+        self.assertFalse(tracker.running)
+
+    def test_missing_spy_is_not_running(self):
+        tracker = self.tracker(root_cmd=["umbrasol-no-such-xprop"])
+        self.assertFalse(tracker.start(wait=0).running)
+
+if __name__ == "__main__":
+    unittest.main()